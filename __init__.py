@@ -2,21 +2,30 @@
 
 import os
 import re
+import shutil
+import sys
+import tempfile
 import time
 from datetime import timedelta
-from .nVector import nVector
-from mathutils import Vector, Matrix
-from mathutils.geometry import intersect_sphere_sphere_2d
+from . import nProgram as nprogram
+from .nProgram import nProgram
+from .nSource import nSource
+from .nStock import nStock, TOOL_FLAT, TOOL_BALL, TOOL_V
+from .nDraw import nToolpath, nCursor, nSurface, nDashboard, pixel_size, \
+    STYLE_G0, STYLE_G1, STYLE_G2, STYLE_G3, STYLE_POINT, STYLE_SELECTED, STYLE_DONE
+from . import nCache as ncache
+from . import nRedraw as nredraw
+from . import nConvert as nconvert
+from mathutils import Vector
 import math
+import numpy as np
 
 import blf
 import bgl
 import bpy
-import gpu
-import bmesh
-from gpu_extras.batch import batch_for_shader
 
 from bpy_extras.io_utils import ImportHelper, ExportHelper
+from bpy.app.handlers import persistent
 from bpy.types import (
     Text,
     Scene,
@@ -36,6 +45,7 @@ from bpy.props import (
     PointerProperty,
     BoolVectorProperty,
     CollectionProperty,
+    IntVectorProperty,
     FloatVectorProperty
 )
 from bpy_extras.view3d_utils import (
@@ -86,6 +96,40 @@ class NCNC_Prefs(AddonPreferences):
 
     last_preset: StringProperty()
 
+    use_cache: BoolProperty(
+        name="Cache Programs",
+        default=True,
+        description="Save the read G-code programs to the disk. The same code opens without reading again"
+    )
+    cache_folder: StringProperty(
+        name="Cache Folder",
+        subtype="DIR_PATH",
+        description="Folder of the cached programs. If empty, the temporary folder is used"
+    )
+    cache_size: IntProperty(
+        name="Cache Size (MB)",
+        default=512,
+        min=1,
+        description="Least recently used programs are removed when the folder is bigger than this"
+    )
+
+    max_fps: IntProperty(
+        name="Max Redraw FPS",
+        default=30,
+        min=1,
+        max=240,
+        description="Viewport and panels are redrawn at most this many times a second, and only when they change"
+    )
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "max_fps")
+        layout.prop(self, "use_cache")
+        col = layout.column()
+        col.active = self.use_cache
+        col.prop(self, "cache_folder")
+        col.prop(self, "cache_size")
+
 
 text_editor_files = []
 
@@ -98,6 +142,26 @@ class NCNC_PR_Texts(PropertyGroup):
         min=0,
         max=100
     )
+    parallel: BoolProperty(
+        name="Parallel Reading",
+        default=False,
+        description="Read big G-code programs in worker processes, using all cores"
+    )
+
+    def update_arc_tolerance(self, context):
+        if self.active_text:
+            self.active_text.ncnc_pr_text.load()
+
+    arc_tolerance: FloatProperty(
+        name="Arc Tolerance",
+        default=0.01,
+        min=0.0001,
+        max=1,
+        precision=4,
+        unit="LENGTH",
+        description="Greatest distance between the arcs (G2, G3) and their drawn lines. Smaller is smoother",
+        update=update_arc_tolerance
+    )
 
     def template_texts(self, layout, context=None):
         row = layout.row(align=True)
@@ -192,13 +256,30 @@ class NCNC_OT_TextsOpen(Operator, ImportHelper):
         default='*.text;*.txt;*.cnc;*.nc;*.tap;*.ngc;*.gc;*.gcode;*.ncnc;*.ncc',
         options={'HIDDEN'}
     )
+    stream: BoolProperty(
+        name="Stream",
+        default=False,
+        description="Don't copy the file into a Text. Read it from the disk while loading and sending"
+    )
+
+    # Files bigger than this are always streamed (Bytes)
+    stream_min_size = 64 * 1024 * 1024
 
     def execute(self, context):
-        with open(self.filepath, 'r') as f:
-            txt = bpy.data.texts.new(os.path.basename(self.filepath))
-            txt.write(f.read())
-            if context.scene.ncnc_pr_texts.texts_items:
-                context.scene.ncnc_pr_texts.texts = txt.name
+        name = os.path.basename(self.filepath)
+
+        if self.stream or os.path.getsize(self.filepath) >= self.stream_min_size:
+            # Only a note is written to the Text. The code stays in the file
+            txt = bpy.data.texts.new(name)
+            txt.write(f"(nCNC -> Streamed from the file. Edit the file itself)\n({self.filepath})\n")
+            txt.ncnc_pr_text.filepath = self.filepath
+        else:
+            with open(self.filepath, 'r') as f:
+                txt = bpy.data.texts.new(name)
+                txt.write(f.read())
+
+        if context.scene.ncnc_pr_texts.texts_items:
+            context.scene.ncnc_pr_texts.texts = txt.name
 
         return {'FINISHED'}
 
@@ -222,7 +303,11 @@ class NCNC_OT_TextsSave(Operator, ExportHelper):
     def execute(self, context):
         active = context.scene.ncnc_pr_texts.active_text
 
-        if active:
+        if active and active.ncnc_pr_text.filepath:
+            shutil.copyfile(active.ncnc_pr_text.filepath, self.filepath)
+            self.report({"INFO"}, "Exported")
+
+        elif active:
             text = active.as_string()
             with open(self.filepath, "wb") as f:
                 f.write(text.encode("ASCII"))
@@ -241,6 +326,7 @@ class NCNC_OT_TextsRemove(Operator):
     def execute(self, context):
         txt = context.scene.ncnc_pr_texts.active_text
         if txt:
+            forget_text(txt.as_pointer())
             bpy.data.texts.remove(txt)
         return {"FINISHED"}
 
@@ -248,263 +334,80 @@ class NCNC_OT_TextsRemove(Operator):
 # #################################
 # #################################
 # #################################
-class NCNC_PR_Lines(PropertyGroup):
-    co: FloatVectorProperty()
-
-
-class NCNC_PR_TextLine(PropertyGroup):
-    lines: CollectionProperty(type=NCNC_PR_Lines)
-    index: IntProperty()
-    ismove: BoolProperty(default=False)
-
-    code_full: StringProperty()
-    code: StringProperty()
-    comment: StringProperty()
-
-    mode_distance: IntProperty(default=90)
-    mode_plane: IntProperty(default=17)
-    mode_units: IntProperty(default=21)
-    mode_move: IntProperty(default=0)
-
-    xyz_in_code: FloatVectorProperty()
-    ijk_in_code: FloatVectorProperty()
-
-    xyz: FloatVectorProperty()
-    ijk: FloatVectorProperty()
+# Parsed programs of the texts -> {Text.as_pointer(): nProgram} Keys -> text_key
+programs = {}
 
-    r: FloatProperty()
-    f: FloatProperty()
+# Texts which are read in this session. prev_str is saved in the blend file, programs aren't
+read_texts = set()
 
-    length: FloatProperty(default=0)
-    pause: FloatProperty(default=0)
-    error: BoolProperty(default=False)
+# Files of the streamed texts -> {Text.as_pointer(): nSource}
+sources = {}
 
-    def get_estimated_time(self):
-        f = 500 if self.mode_move == 0 else self.f
-        return (self.length / (f * (1 if self.mode_units == 21 else 25.4))) * 60
-
-    estimated_time: FloatProperty(get=get_estimated_time)
-
-    def load(self, value: str):
-        ismove_xyz = False
-        ismove_ijk = False
-        ismove_r = False
-
-        self.code_full = value
-        self.prev_line = self.id_data.ncnc_pr_text.lines[self.index - 1]
-
-        # ###############################################
-        # ####################################### Comment
-        for i in re.findall(r'\([^()]*\)', value):
-            self.comment += i
-            value = value.replace(i, "")
-
-        # ###############################################
-        # ########################################  G0-3
-        value = value.upper()
-        self.code = value
-
-        for rex, key in [(r'G *(9[01])(?:\D|$)', "mode_distance"),
-                         (r'G *(1[7-9])(?:\D|$)', "mode_plane"),
-                         (r'G *(2[01])(?:\D|$)', "mode_units"),
-                         (r'G *(0?[0-3])(?:\D|$)', "mode_move"),
-                         ]:
-            fn = re.findall(rex, value)
-            exec(f"self.{key} = int(fn[0]) if {len(fn) == 1} else self.prev_line.{key}")
-
-        if self.prev_line:
-            self.xyz = self.prev_line.xyz
-
-        # ###############################################
-        # ################################ X0.0 Y0.0 Z0.0
-        for j, v in enumerate("XYZ"):
-            ps = re.findall(f'{v} *([+-]?\d*\.?\d*)', value)
-            if len(ps) == 1 and re.sub("[+-.]", "", ps[0]).isdigit():
-                ismove_xyz = True
-                self.xyz_in_code[j] = float(ps[0])
-                self.xyz[j] = float(ps[0]) + (self.xyz[j] if self.mode_distance == 91 else 0)
-                self.xyz[j] *= (1 if self.mode_units == 21 else 25.4)
-
-        # ###############################################
-        # ################################ I0.0 J0.0 K0.0
-        for j, v in enumerate("IJK"):
-            ps = re.findall(f'{v} *([+-]?\d*\.?\d*)', value)
-            if len(ps) == 1 and re.sub("[+-.]", "", ps[0]).isdigit():
-                ismove_ijk = True
-                self.ijk_in_code[j] = float(ps[0])
-                self.ijk[j] = float(ps[0]) * (1 if self.mode_units == 21 else 25.4)
-
-        # ###############################################
-        # ############################################# F
-
-        ps = re.findall('F *([+]?\d*\.?\d*)', value)
-        if len(ps) == 1 and re.sub("[+.]", "", ps[0]).isdigit():
-            self.f = float(ps[0])
-        else:
-            self.f = self.prev_line.f
-
-        ps = re.findall('R *([+-]?\d*\.?\d*)', value)
-        if len(ps) == 1 and re.sub("[+-.]", "", ps[0]).isdigit():
-            ismove_r = True
-            self.r = float(ps[0]) * (1 if self.mode_units == 21 else 25.4)
-            if ismove_ijk:
-                self.error = True
-
-        # ###############################################
-        # ######################################## PAUSE
-        ps = re.findall('G4 *P([+]?\d*\.?\d*)', value)
-        if len(ps) == 1 and re.sub("[+.]", "", ps[0]).isdigit():
-            self.pause = float(ps[0])
-
-        if (ismove_xyz and self.mode_move in (0, 1)) or (ismove_xyz and ismove_ijk) or (ismove_xyz and ismove_r):
-            self.ismove = True
-
-        if self.ismove and not self.error:
-            for i in self.calc_lines():
-                a = self.lines.add()
-                a.co = i
-
-        if self.error:
-            self.mode_distance = self.prev_line.mode_distance
-            self.mode_plane = self.prev_line.mode_plane
-            self.mode_units = self.prev_line.mode_units
-            self.mode_move = self.prev_line.mode_move
-            self.xyz = self.prev_line.xyz
-            self.ismove = False
-            self.f = self.prev_line.f
-        return
+# Names of the texts of the keys above -> {Text.as_pointer(): name}
+#   Undo, redo and loading reallocate the texts. Keys which aren't the same texts anymore are forgotten -> forget_texts
+text_names = {}
 
-    def calc_lines(self, step: int = 0):
-        """For this item"""
-        mv = self.mode_move
-        prev_xyz = Vector(self.prev_line.xyz)
-        xyz = Vector(self.xyz)
+# Worker processes for parallel reading and converting
+reader_pool = None
 
-        if mv in (0, 1):
-            self.length = (prev_xyz - xyz).length
-            return prev_xyz, xyz
 
-        # If the R code is used, we must convert the R code to IJK
-        # +R: Short angle way
-        # -R: Long angle way
-        if self.r:
-            # Reference:
-            # https://docs.blender.org/api/current/mathutils.geometry.html?highlight=intersect_sphere_sphere_2d#mathutils.geometry.intersect_sphere_sphere_2d
+def get_cache():
+    """Cache of the read programs. None if disabled"""
+    addon = bpy.context.preferences.addons.get(__name__)
+    prefs = addon.preferences if addon else None
+    if prefs and not prefs.use_cache:
+        return None
 
-            r = abs(self.r)
-            distance = round((xyz - prev_xyz).length / 2, 3)
+    folder = bpy.path.abspath(prefs.cache_folder) if prefs and prefs.cache_folder else ""
+    return ncache.nCache(folder or os.path.join(tempfile.gettempdir(), "nCNC"),
+                         limit=(prefs.cache_size if prefs else 512) * 1024 * 1024)
 
-            # Distance greater than diameter
-            if distance > round(r, 3):
-                self.error = True
-                return []
 
-            # Distance equal to diameter
-            elif distance == round(r, 3):
-                ijk = (xyz + prev_xyz) / 2
+def remove_source(key):
+    source = sources.pop(key, None)
+    if source:
+        source.close()
 
-            # Distance smaller than diameter
-            else:
-                intersects = intersect_sphere_sphere_2d(prev_xyz[:2], r, xyz[:2], r)
 
-                if mv == 3:
-                    ijk = intersects[self.r > 0]
-                else:
-                    ijk = intersects[self.r < 0]
+def text_key(text):
+    """Key of the text in programs, read_texts and sources"""
+    key = text.as_pointer()
+    text_names[key] = text.name
+    return key
 
-                ijk = Vector((*ijk[:], 0))
 
-            ijk = ijk - prev_xyz
-        else:
-            ijk = Vector(self.ijk)
+def forget_text(key):
+    """Removes the program, the source... of the key"""
+    programs.pop(key, None)
+    read_texts.discard(key)
+    remove_source(key)
+    text_names.pop(key, None)
 
-        center = prev_xyz + ijk
 
-        bm = bmesh.new()
+@persistent
+def forget_texts(*args):
+    """Forgets the keys whose texts are removed or reallocated (Undo, redo, load).
+    An old key would keep its program in memory, or its address could be used by another text"""
+    names = {i.as_pointer(): i.name for i in bpy.data.texts}
+    for key, name in list(text_names.items()):
+        if names.get(key) != name:
+            forget_text(key)
 
-        # Uyarı Buradan sonrası G17 düzlemi için hesaplanmıştır.
-        # Diğer düzlemler için düzenlemek kolay.
-        # Farkettiysen, Vektörlerin Z'lerinin yerine 0 yazdık.
-        # Oraları düzenleyerek diğer düzlemler için uygulayabilirsin.
 
-        # From the CENTER to the CURRENT POINT
-        v1 = prev_xyz - center
-        v1.z = 0
+def get_reader_pool():
+    global reader_pool
+    if not reader_pool:
+        # Blender 2.90 -> bpy.app.binary_path_python, Newer -> sys.executable
+        python = getattr(bpy.app, "binary_path_python", "") or sys.executable
+        reader_pool = nprogram.executor(python=python)
+    return reader_pool
 
-        # From the CENTER to the POINT of DESTINATION
-        v2 = xyz - center
-        v2.z = 0
 
-        try:
-            if abs(v1.length - v2.length) > 0.01:
-                raise Exception
-
-            # Angle between V1 and V2 (RADIANS)
-            angle = v1.angle(v2)
-        except:
-            self.error = True
-            return []
-
-        if v1.cross(v2).z > 0 and mv == 2:
-            angle = math.radians(360) - angle
-        elif v1.cross(v2).z < 0 and mv == 3:
-            angle = math.radians(360) - angle
-        elif v1.cross(v2).z == 0:
-            angle = math.radians(360 if not self.r else 180)
-
-        self.length = angle * v1.length
-
-        # Angle between V1 and V2 (DEGREES)
-        angle_degrees = math.degrees(angle)
-
-        if step:
-            pass
-        elif v1.length < 10:
-            step = math.ceil(angle_degrees / 10)
-        elif v1.length < 50:
-            step = math.ceil(angle_degrees / 5)
-        else:
-            step = math.ceil(angle_degrees / 2)
-
-        # ####### !!!
-        # Bu kısımda axis'i güncelle ileride
-        # Çünkü, G17, G18 vs düzlemine göre axis değişir
-        bmesh.ops.spin(bm,
-                       geom=[bm.verts.new(prev_xyz)],
-                       axis=(0, 0, (1 if mv == 2 else -1)),
-                       # axis=(.7, 0, (1 if mv == 2 else -1)),
-                       steps=step,
-                       angle=-angle,
-                       cent=center
-                       )
-        # print("\n"*2)
-        # print("Prev :", prev_xyz)
-        # print("XYZ :", xyz)
-        # print("IJK :", ijk)
-        # print("Center :", center)
-        # print("Vector1 :", v1)
-        # print("Vector2 :", v2)
-        # print("Angle :", angle)
-        # print("Degrees", angle_degrees)
-        # print("Cross :", v1.cross(v2))
-        # print("Dot :", round(v1.dot(v2), 3))
-
-        lines = []
-
-        z_step = (xyz.z - prev_xyz.z) / step if step else 0
-
-        for n, t in enumerate(bm.verts):
-            x = round(t.co.x, 3)
-            y = round(t.co.y, 3)
-            z = round(t.co.z + n * z_step, 3)
-
-            lines.append((prev_xyz.x, prev_xyz.y, prev_xyz.z))
-            prev_xyz.x = x
-            prev_xyz.y = y
-            prev_xyz.z = z
-            lines.append((prev_xyz.x, prev_xyz.y, prev_xyz.z))
-
-        return lines
+def remove_reader_pool():
+    global reader_pool
+    if reader_pool:
+        reader_pool.shutdown(wait=False)
+        reader_pool = None
 
 
 class NCNC_PR_Text(PropertyGroup):
@@ -517,23 +420,59 @@ class NCNC_PR_Text(PropertyGroup):
     last_cur_index: IntProperty()
     last_end_index: IntProperty()
 
-    lines: CollectionProperty(
-        type=NCNC_PR_TextLine,
-        name="Objects",
-        description="All Object Items Collection",
-    )
+    # If given, the code is read from this file (Streamed) instead of the text
+    filepath: StringProperty(subtype="FILE_PATH")
+
+    @property
+    def program(self) -> nProgram:
+        key = text_key(self.id_data)
+        if key not in programs:
+            programs[key] = nProgram()
+        return programs[key]
+
+    @property
+    def source(self):
+        """Memory-mapped file of the streamed text. None if the file can't be opened"""
+        key = text_key(self.id_data)
+        if key not in sources:
+            try:
+                sources[key] = nSource(bpy.path.abspath(self.filepath))
+            except OSError:
+                return None
+        return sources[key]
+
+    def code_lines(self):
+        """Lines of the code -> list or nSource"""
+        if self.filepath:
+            return self.source or []
+        return self.id_data.as_string().splitlines()
 
     # Total Line
-    count: IntProperty()
+    def get_count(self):
+        return self.program.count
+
+    count: IntProperty(get=get_count)
 
     # Milimeters
-    distance_to_travel: FloatProperty()
+    def get_distance_to_travel(self):
+        return self.program.distance
+
+    distance_to_travel: FloatProperty(get=get_distance_to_travel)
 
     # Seconds
-    estimated_time: FloatProperty()
+    def get_estimated_time(self):
+        return self.program.time
+
+    estimated_time: FloatProperty(get=get_estimated_time)
+
+    def get_minimum(self):
+        return self.program.minimum.tolist()
 
-    minimum: FloatVectorProperty()
-    maximum: FloatVectorProperty()
+    def get_maximum(self):
+        return self.program.maximum.tolist()
+
+    minimum: FloatVectorProperty(get=get_minimum)
+    maximum: FloatVectorProperty(get=get_maximum)
 
     def event_control(self):
         cur_ind = self.id_data.current_line_index + 1
@@ -545,63 +484,107 @@ class NCNC_PR_Text(PropertyGroup):
             self.last_end_index = end_ind
             self.event_selected = True
 
-        self.load()
-
-    def get_points(self):
-        return [c.xyz for c in self.lines if c.ismove]
-
-    def get_lines(self, move_mode=0):
-        self.event = False
-        lines = []
-        for c in self.lines:
-            if c.ismove and (c.mode_move == move_mode):
-                lines.extend([i.co[:] for i in c.lines])
+            # Selection is being dragged. The text is checked for changes when it stops (as_string is costly)
+            return
 
-        return lines
+        self.load()
 
-    def get_selected(self):
-        self.event_selected = False
+    def get_selection(self):
+        """Selected rows -> (start, end)"""
         if self.isrun and self.isrun[-1]:
-            return []
+            return 0, 0
+        return self.last_cur_index, self.last_end_index
 
-        count = len(self.lines)
+    # If the changed lines are less than this, they are re-parsed at once instead of loading again
+    incremental_limit = 10000
 
-        if count >= self.last_end_index > self.last_cur_index:
-            lines = []
-            for i in range(self.last_cur_index, self.last_end_index):
-                line = self.lines[i]
-                if line.ismove:
-                    lines.extend([i.co[:] for i in line.lines])
-            return lines
+    def load(self):
+        key = text_key(self.id_data)
 
-        return [(0, 0, 0), (0, 0, 0)]
+        # Not read since the add-on or the blend file was loaded
+        fresh = key not in read_texts
+        read_texts.add(key)
 
-    def load(self):
-        if not self.ismodified:
+        program = self.program
+        tolerance = bpy.context.scene.ncnc_pr_texts.arc_tolerance
+        if not fresh and not self.ismodified and program.tolerance == tolerance:
             return
 
+        code = self.get_signature()
+
+        # Only changed lines are parsed again, if the program has been loaded already
+        if program.count and not self.filepath and program.tolerance == tolerance and \
+                not (self.isrun and self.isrun[-1]):
+            code_lines = code.splitlines()
+            start, old_end, new_end = program.diff(code_lines)
+            if max(old_end, new_end) - start < self.incremental_limit:
+                program.update(code_lines)
+                self.prev_str = code
+                self.event = True
+                self.event_selected = True
+                return
+
         count = len(self.isrun)
         if count:
             self.isrun[-1] = False
 
+        remove_source(key)
+
+        # Same code has been read before -> From the cache
+        cache = get_cache()
+        self.cache_key = self.get_cache_key(tolerance) if cache else ""
+        arrays = cache.get(self.cache_key) if cache else None
+        if arrays is not None:
+            program = nProgram.from_arrays(arrays, None if self.filepath else self.code_lines())
+            program.tolerance = tolerance
+            programs[key] = program
+            self.prev_str = code
+            self.event = True
+            self.event_selected = True
+            return
+
         self.isrun.append(True)
 
         # ####################
         # Before Reset to vars
-        self.lines.clear()
-        self.count = 0
-        self.distance_to_travel = 0
-        self.estimated_time = 0
-        self.minimum = (0, 0, 0)
-        self.maximum = (0, 0, 0)
+        # Code lines of the streamed files aren't kept. They are in the file
+        program.store_codes = not self.filepath
+        program.tolerance = tolerance
+        program.clear()
 
         bpy.ops.ncnc.gcode(text_name=self.id_data.name, run_index=count)
-        self.prev_str = self.id_data.as_string()
+        self.prev_str = code
 
     prev_str: StringProperty()
 
+    # Key of the program in the cache -> nCache
+    cache_key: StringProperty()
+
+    def get_cache_key(self, tolerance):
+        if self.filepath:
+            source = self.source
+            code = source.data if source else b""
+        else:
+            code = self.id_data.as_string()
+        return ncache.key(code, nprogram.VERSION, tolerance)
+
+    def save_cache(self):
+        cache = get_cache()
+        if cache and self.cache_key:
+            cache.put(self.cache_key, self.program.to_arrays())
+
+    def get_signature(self):
+        """Code of the text. For the streamed files -> Path, size and modification time"""
+        if not self.filepath:
+            return self.id_data.as_string()
+        try:
+            stat = os.stat(bpy.path.abspath(self.filepath))
+        except OSError:
+            return ""
+        return f"{self.filepath}:{stat.st_size}:{stat.st_mtime_ns}"
+
     def get_ismodified(self):
-        return self.id_data.as_string() != self.prev_str
+        return self.get_signature() != self.prev_str
 
     ismodified: BoolProperty(get=get_ismodified)
 
@@ -611,10 +594,21 @@ class NCNC_PR_Text(PropertyGroup):
             name="NCNC_PR_Text Name",
             description="NCNC_PR_Text Description",
             type=cls)
+        for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+            handlers.append(forget_texts)
 
     @classmethod
     def unregister(cls):
+        for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+            if forget_texts in handlers:
+                handlers.remove(forget_texts)
         del Text.ncnc_pr_text
+        programs.clear()
+        read_texts.clear()
+        text_names.clear()
+        for key in list(sources):
+            remove_source(key)
+        remove_reader_pool()
 
 
 class NCNC_OT_Text(Operator):
@@ -628,7 +622,26 @@ class NCNC_OT_Text(Operator):
     code_lines = []
     last_index = 0
     pr_txt = None
-    delay = .1
+    delay = .01
+
+    # Parsing time in one tick (seconds). Less than half of the tick (delay), the rest is for the UI
+    budget = .004
+
+    # Line count parsed between two time checks. Adapts to the speed of the parser
+    batch = 64
+
+    # Parallel reading -> Programs shorter than this are read here
+    parallel_min_lines = 20000
+    chunk_size = 10000
+    futures = None
+    chunk_state = None
+
+    # Lines are prescanned in batches between the time checks. Scanned until -> scan_index
+    scan_batch = 1000
+    scan_index = 0
+
+    # Merging of the parsed chunks to the program, a little at each tick -> nProgram.extend_parts_steps
+    merge_steps = None
 
     # Added radius R value reading feature in G code.
     # Reference
@@ -650,10 +663,11 @@ class NCNC_OT_Text(Operator):
         self.pr_txt = bpy.data.texts[self.text_name].ncnc_pr_text
         context.window_manager.modal_handler_add(self)
 
-        line_0 = self.pr_txt.lines.add()
-        line_0.load("G0 G90 G17 G21 X0 Y0 Z0 F500")
+        self.code_lines = self.pr_txt.code_lines()
 
-        self.code_lines = self.pr_txt.id_data.as_string().splitlines()
+        if context.scene.ncnc_pr_texts.parallel and len(self.code_lines) >= self.parallel_min_lines:
+            self.futures = []
+            self.chunk_state = self.pr_txt.program.state(0)
 
         return self.timer_add(context)
 
@@ -669,49 +683,115 @@ class NCNC_OT_Text(Operator):
 
     def modal(self, context, event):
         if not self.pr_txt.isrun[self.run_index]:
+            for f in self.futures or ():
+                f.cancel()
             return self.timer_remove(context)
 
+        # Only the ticks are used. Other events (mouse move etc.) are for the UI
+        if event.type != "TIMER":
+            return {'PASS_THROUGH'}
+
         pr = self.pr_txt
+        program = pr.program
+        count = len(self.code_lines)
 
-        context.scene.ncnc_pr_texts.loading = (self.last_index / len(self.code_lines)) * 100
+        context.scene.ncnc_pr_texts.loading = (self.last_index / count) * 100 if count else 0
 
-        loop_count = 100 if event.type == "TIMER" else 20
-        for no, code in enumerate(self.code_lines[self.last_index:], start=self.last_index + 1):
-            pr.event = True
-            pr.event_selected = True
-            self.last_index += 1
+        budget = self.budget
+        deadline = time.perf_counter() + budget
 
-            pr.count = no
+        if self.futures is not None:
+            return self.modal_parallel(context, deadline)
 
-            l = pr.lines.add()
-            l.index = no
-            l.load(code)
+        while self.last_index < count:
+            t = time.perf_counter()
+            end = min(self.last_index + self.batch, count)
+            program.extend(self.code_lines[self.last_index:end])
 
-            # Calc -> Total Length, Time
-            if l.length:
-                pr.distance_to_travel += l.length
-                pr.estimated_time += l.estimated_time
+            now = time.perf_counter()
 
-            # Calc -> Total Pause Time
-            if l.pause:
-                pr.estimated_time += l.pause
+            # About 4 batches in the budget
+            self.batch = max(16, int((end - self.last_index) / max(now - t, 1e-6) * budget / 4))
+            self.last_index = end
 
-            # Calc -> Min/Max X,Y,Z
-            for j, v in enumerate(l.xyz):
-                if pr.minimum[j] > v:
-                    pr.minimum[j] = v
-                if pr.maximum[j] < v:
-                    pr.maximum[j] = v
+            pr.event = True
+            pr.event_selected = True
 
-            if self.last_index % loop_count == 0:
+            if now >= deadline:
                 return {'PASS_THROUGH'}
 
-        pr.event = True
+        return self.finished(context)
+
+    def modal_parallel(self, context, deadline):
+        """Lines are sent to the worker processes in chunks. The modal state at the start of each chunk is found
+        by a cheap scan here. When all chunks are parsed, they are merged to the program."""
+        count = len(self.code_lines)
+        program = self.pr_txt.program
+        try:
+            pool = get_reader_pool()
+            worker = nprogram.nWorker(nprogram.parse_chunk)
+            while self.scan_index < count and time.perf_counter() < deadline:
+                # Start of a chunk -> Its state is known. It is sent, then scanned for the state of the next one
+                if self.scan_index == self.last_index:
+                    self.last_index = min(self.last_index + self.chunk_size, count)
+                    lines = self.code_lines[self.scan_index:self.last_index]
+                    self.futures.append(pool.submit(worker, lines, self.chunk_state, program.tolerance))
+
+                    # The last chunk -> No next state
+                    if self.last_index == count:
+                        self.scan_index = count
+                        break
+
+                end = min(self.scan_index + self.scan_batch, self.last_index)
+                self.chunk_state = nprogram.prescan(self.code_lines[self.scan_index:end], self.chunk_state)
+                self.scan_index = end
+
+            if self.merge_steps is None:
+                done = sum(f.done() for f in self.futures)
+                context.scene.ncnc_pr_texts.loading = done / (count / self.chunk_size + 1) * 100
+
+                if self.scan_index < count or done < len(self.futures):
+                    return {'PASS_THROUGH'}
+
+                size = self.chunk_size
+                self.merge_steps = program.extend_parts_steps(
+                    nprogram.nProgram.from_arrays(f.result(), self.code_lines[i * size:(i + 1) * size])
+                    for i, f in enumerate(self.futures))
+
+            context.scene.ncnc_pr_texts.loading = len(program) / (count + 1) * 100
+            while time.perf_counter() < deadline:
+                next(self.merge_steps)
+            return {'PASS_THROUGH'}
+
+        except StopIteration:
+            self.merge_steps = None
+
+        except Exception as e:
+            # Pool couldn't be started or a worker has crashed -> Read here
+            self.report({'WARNING'}, f"Parallel reading failed, reading serially: {e}")
+            remove_reader_pool()
+            self.futures = None
+            self.merge_steps = None
+            self.last_index = 0
+            program.clear()
+            return {'PASS_THROUGH'}
+
+        self.pr_txt.event = True
+        self.pr_txt.event_selected = True
+        return self.finished(context)
+
+    def finished(self, context):
+        self.pr_txt.event = True
 
         if context.area:
             context.area.tag_redraw()
 
         self.report({'INFO'}, "G-Code Loaded")
+
+        try:
+            self.pr_txt.save_cache()
+        except OSError as e:
+            self.report({'WARNING'}, f"G-Code couldn't be cached: {e}")
         self.pr_txt.isrun[self.run_index] = False
         context.scene.ncnc_pr_texts.loading = 0
         return self.timer_remove(context)
@@ -741,6 +821,7 @@ class NCNC_PR_Head(PropertyGroup):
         pr_vis.gcode = pr_vis.gcode
         pr_vis.dash = pr_vis.dash
         pr_vis.mill = pr_vis.mill
+        pr_vis.stock = pr_vis.stock
 
     def update_tool_scene(self, context):
         if self.tool_scene:
@@ -883,6 +964,9 @@ class NCNC_PT_HeadTextDetails(Panel):
 
         row = layout.row()
         row.operator("ncnc.textssave", icon="EXPORT", text="Export")
+        row.prop(pr_txs, "parallel", icon="SETTINGS")
+
+        layout.prop(pr_txs, "arc_tolerance")
 
 
 class NCNC_PR_Scene(PropertyGroup):
@@ -1025,45 +1109,6 @@ class NCNC_PT_Scene(Panel):
         col2.prop(pr_scn, "inc", text="Inches")
 
 
-class nCompute:
-    # References;
-    # Circle Center;
-    # https://blender.stackexchange.com/questions/28239/how-can-i-determine-calculate-a-circumcenter-with-3-points
-
-    @classmethod
-    def replace_col(cls, M, i, C):
-        for r in range(len(M)):
-            M[r][i] = C[r]
-
-    @classmethod
-    def circle_center_(cls, B, C, N):
-        m_d = Matrix([
-            B, C, N
-        ])
-        col = [B.dot(B) * 0.5,
-               C.dot(C) * 0.5,
-               0]
-        m_x = m_d.copy()
-        cls.replace_col(m_x, 0, col)
-        m_y = m_d.copy()
-        cls.replace_col(m_y, 1, col)
-        m_z = m_d.copy()
-        cls.replace_col(m_z, 2, col)
-        m_d_d = m_d.determinant() or 1
-        x = m_x.determinant() / m_d_d
-        y = m_y.determinant() / m_d_d
-        z = m_z.determinant() / m_d_d
-
-        return Vector([x, y, z])
-
-    @classmethod
-    def circle_center(cls, A, B, C):
-        B_ = B - A
-        C_ = C - A
-        N = B_.cross(C_)
-        return A + cls.circle_center_(B_, C_, N)
-
-
 # my_icons_dir = os.path.join(os.path.dirname(__file__), "icons")
 # icons = bpy.utils.previews.new()
 # icons.load("my_icon", os.path.join(my_icons_dir, "auto.png"), 'IMAGE')
@@ -1115,6 +1160,11 @@ class NCNC_PR_Convert(PropertyGroup):
         default=False,
         description="On / Off"
     )
+    parallel: BoolProperty(
+        name="Parallel Converting",
+        default=False,
+        description="Convert many shapes in worker processes, using all cores"
+    )
 
     def template_convert(self, layout, context=None):
 
@@ -1136,6 +1186,7 @@ class NCNC_PR_Convert(PropertyGroup):
                      icon=("ONIONSKIN_ON" if self.auto_convert else "ONIONSKIN_OFF"),
                      # invert_checkbox=self.auto_convert
                      )
+        row.prop(self, "parallel", icon="SETTINGS", icon_only=True)
         return row
 
     @classmethod
@@ -1162,7 +1213,6 @@ class NCNC_OT_Convert(Operator):
 
     kodlar = []
     shape = 0
-    block = 0
 
     delay = .1
     _last_time = 0
@@ -1171,9 +1221,19 @@ class NCNC_OT_Convert(Operator):
 
     pr_txs = None
     first_point = None
-    last_selected_object = None
 
-    # ## !!! Döngüdeki Z step için de modalı kullanılabilir yap ki, convert edilirken donma olmasın
+    # Reading and converting time in one tick (seconds). At least one object is done in each tick
+    budget = .05
+
+    # Parallel converting -> Jobs are converted in the worker processes if the objects have this many splines
+    parallel_min_splines = 64
+
+    # Splines in one job
+    job_splines = 16
+
+    # [job_gcode result] and the futures of the worker processes, in the order of the objects
+    results = None
+    futures = None
 
     def execute(self, context):
         return self.invoke(context, None)
@@ -1194,13 +1254,19 @@ class NCNC_OT_Convert(Operator):
         self.first_point = Vector((0, 0, 0))
         self.pr_obj = bpy.context.scene.ncnc_pr_objects
         self.pr_txs = bpy.context.scene.ncnc_pr_texts
-        self.last_selected_object = context.active_object
 
         ##################
         # Convert to GCodes
         self.kodlar.clear()
         self.add_header(context)
         self.shape = 0
+        self.results = []
+        self.futures = None
+
+        if pr_cvr.parallel:
+            splines = sum(len(i.obj.data.splines) for i in self.pr_obj.items if i.obj and i.obj.type == 'CURVE')
+            if splines >= self.parallel_min_splines:
+                self.futures = []
 
         context.window_manager.modal_handler_add(self)
 
@@ -1223,109 +1289,114 @@ class NCNC_OT_Convert(Operator):
         self._last_time = time.time()
 
         pr_cvr = context.scene.ncnc_pr_convert
-        pr_cvr.loading = (self.last_index / len(self.pr_obj.items)) * 100
+        count = len(self.pr_obj.items)
 
-        if not pr_cvr.isrun[self.run_index] or (len(self.pr_obj.items) <= self.last_index):
+        if not pr_cvr.isrun[self.run_index]:
+            for f in self.futures or ():
+                f.cancel()
+            self.futures = None
             return self.finished(context)
 
         #############################################
         #############################################
-        obj_orj = self.pr_obj.items[self.last_index]
+        # Objects are read here. Their G-code is made here, or in the worker processes if parallel
+        deadline = time.perf_counter() + self.budget
+        try:
+            while self.last_index < count:
+                obj = self.pr_obj.items[self.last_index].obj
+                self.last_index += 1
 
-        # Copy and select to object
-        obj = obj_orj.obj.copy()
-        obj.data = obj_orj.obj.data.copy()
+                for job in self.curve_jobs(obj):
+                    if self.futures is None:
+                        self.results.append(nconvert.job_gcode(job))
+                    else:
+                        self.futures.append(get_reader_pool().submit(nprogram.nWorker(nconvert.job_gcode), job))
 
-        # !!!
-        # Default var olan koleksiyon'u sildiğimizde, şu hatayı veriyor;
-        #       bpy.data.collections[0].objects.link(obj)
-        #       ndexError: bpy_prop_collection[index]: index 0 out of range, size 0
+                if time.perf_counter() > deadline:
+                    break
 
-        if not len(bpy.data.collections):
-            collection = bpy.data.collections.new("nCNC")
-            bpy.context.scene.collection.children.link(collection)
+            done = self.last_index
+            if self.futures:
+                done = self.last_index * sum(f.done() for f in self.futures) / len(self.futures)
+            pr_cvr.loading = done / count * 100 if count else 0
 
-        bpy.data.collections[0].objects.link(obj)
+            if self.last_index < count or not all(f.done() for f in self.futures or ()):
+                return {'PASS_THROUGH'}
 
-        self.last_index += 1
+            if self.futures:
+                self.results = [f.result() for f in self.futures]
+
+        except Exception as e:
+            # Pool couldn't be started or a worker has crashed -> Convert here
+            self.report({'WARNING'}, f"Parallel converting failed, converting serially: {e}")
+            remove_reader_pool()
+            self.futures = None
+            self.results = []
+            self.last_index = 0
+            self.shape = 0
+            return {'PASS_THROUGH'}
 
-        # Do active to object
-        bpy.ops.object.select_all(action='DESELECT')
-        context.view_layer.objects.active = obj
-        obj.select_set(True)
+        return self.finished(context)
 
-        # To avoid the error in 2D
-        obj.data.dimensions = "3D"
+    def curve_jobs(self, obj):
+        """Plain data of the object for nconvert.job_gcode. Its splines are in parts of job_splines.
+        The object isn't copied or transformed in the scene -> Its spline points are moved by matrix_world"""
+        if not obj or obj.type != 'CURVE' or not obj.ncnc_pr_toolpathconfigs.included:
+            return
 
-        # Reference:
-        # https://blender.stackexchange.com/questions/75380/apply-transforms-on-object-copies-not-working
-        bpy.ops.object.transform_apply(location=True, scale=True, rotation=True)
-
-        if self.last_selected_object:
-            # Select previous object
-            bpy.ops.object.select_all(action='DESELECT')
-            context.view_layer.objects.active = self.last_selected_object
-            self.last_selected_object.select_set(True)
-
-        ##################################################
-        ##################################################
-        if not obj or not obj.ncnc_pr_toolpathconfigs.included:
-            # Remove to volatile object
-            bpy.data.collections[0].objects.unlink(obj)
-            bpy.data.objects.remove(obj)
-            return {'PASS_THROUGH'}
+        # The configurations of the object
+        conf = obj.ncnc_pr_toolpathconfigs
+        if conf.step > conf.depth:
+            return
 
-        elif obj.type == 'CURVE':
-            # The configurations of the object
-            conf = obj.ncnc_pr_toolpathconfigs
+        self.shape += 1
+        settings = {i: getattr(conf, i) for i in nconvert.SETTINGS}
 
-            self.dongu = []
+        matrix = np.array(obj.matrix_world, dtype=np.float64)
+        splines = [self.spline_data(i, matrix) for i in obj.data.splines]
 
-            if conf.step > conf.depth:
-                # Remove to volatile object
-                bpy.data.collections[0].objects.unlink(obj)
-                bpy.data.objects.remove(obj)
-                return {'PASS_THROUGH'}
+        for i in range(0, max(len(splines), 1), self.job_splines):
+            yield {"shape": self.shape,
+                   "block": i,
+                   "header": i == 0,
+                   "conf": settings,
+                   "splines": splines[i:i + self.job_splines]}
 
-            # Steps in the Z axis -> 0.5, 1.0, 1.5, 2.0 ...
-            self.dongu.extend([i * conf.step for i in range(1, int(conf.depth / conf.step + 1), )])
-
-            # Calculate last Z step
-            if conf.depth % conf.step > 0.01:
-                if len(self.dongu):
-                    self.dongu.append(round(self.dongu[-1] + conf.depth % conf.step, conf.round_loca))
-                else:
-                    self.dongu.append(round(self.dongu[-1], conf.round_loca))
-
-            self.block = 0
-            self.shape += 1
-
-            # Create initial configs of the shape -> Block x.0
-            self.add_block(expand="1", enable="1")
-            self.kodlar.append(f"{conf.plane} ( Plane Axis )")
-            self.kodlar.append(f"S{conf.spindle} ( Spindle )")
-            self.kodlar.append(f"( Safe Z : {conf.safe_z} )")
-            self.kodlar.append(f"( Step Z : {conf.step} )")
-            self.kodlar.append(f"( Total depth : {round(conf.depth, 3)} )")
-            self.kodlar.append(f"( Feed Rate -mm/min- : {conf.feed} )")
-            self.kodlar.append(f"( Plunge Rate -mm/min- : {conf.plunge} )")
-
-            # Necessary calculations have been made
-            # Gcode can now be creating for object
-            self.convert_gcode(obj)
-
-        # Remove to volatile object
-        bpy.data.collections[0].objects.unlink(obj)
-        bpy.data.objects.remove(obj)
-        #############################################
-        #############################################
+    @classmethod
+    def spline_data(cls, subcurve, matrix):
+        """Plain data of the spline -> nConvert"""
+        data = {"type": subcurve.type, "cyclic": subcurve.use_cyclic_u}
 
-        return {'PASS_THROUGH'}
+        if subcurve.type == 'BEZIER':
+            for i in ("co", "handle_left", "handle_right"):
+                data[i] = cls.spline_array(subcurve.bezier_points, i, matrix)
+
+        elif subcurve.type == 'POLY':
+            # Points of the poly splines are 4D (x, y, z, w)
+            data["co"] = cls.spline_array(subcurve.points, "co", matrix, 4)
+
+        # NURBS -> Yapım aşamasında !!!
+        return data
+
+    @staticmethod
+    def spline_array(points, attr, matrix, size=3):
+        """World coordinates of the spline points -> (n, 3) float64
+        :param size: Component count of the attribute
+        """
+        values = np.empty(len(points) * size)
+        points.foreach_get(attr, values)
+        values = values.reshape(-1, size)[:, :3]
+        return values @ matrix[:3, :3].T + matrix[:3, 3]
 
     def finished(self, context):
         pr_cvr = context.scene.ncnc_pr_convert
         pr_cvr.isrun[self.run_index] = False
         pr_cvr.loading = 0
+
+        # Blocks of the objects in order. Safe Z is found by the first shape
+        first = nconvert.join_gcode(self.kodlar, self.results)
+        if first:
+            self.first_point = Vector(first)
         self.add_footer()
 
         ###########################
@@ -1360,215 +1431,9 @@ class NCNC_OT_Convert(Operator):
         self.kodlar.append("M2")
         self.kodlar.append("(Total Number of Lines : {})".format(len(self.kodlar)))
 
-    def add_block(self, name=None, expand="0", enable="1"):
+    def add_block(self, name, expand="0", enable="1"):
         self.kodlar.append("") if len(self.kodlar) > 0 else None
-        self.kodlar.append("(Block-name: " + ("Shape{}.{})".format(self.shape, self.block) if not name else name + ")"))
-        self.kodlar.append("(Block-expand: %s)" % expand)
-        self.kodlar.append("(Block-enable: %s)" % enable)
-
-    def convert_gcode(self, obj):
-        for i, subcurve in enumerate(obj.data.splines):  # Curve altındaki tüm Spline'ları sırayla al
-            self.block += 1
-            self.add_block(expand="0", enable="1")  # Yeni bir blok başlığı ekle
-
-            curvetype = subcurve.type
-            print("curvetype", curvetype)
-
-            for j, k in enumerate(self.dongu):
-                self.z_adim = Vector((0, 0, k))
-
-                if curvetype == 'NURBS':
-                    # Yapım aşamasında !!!
-
-                    # print("curve is closed:", subcurve.use_cyclic_u)
-                    xl = []
-                    yl = []
-                    # for i in range(11):
-                    #    a = nVector.bul_nurbs_1t1pl(0.1 * i, context)
-                    #    # print(a)
-                    #    xl.append(a.x)
-                    #    yl.append(a.y)
-                    # empty = bpy.data.objects["Empty"].location
-                    # print("a",a)
-                    # empty.x = a.x
-                    # empty.y = a.y
-                    # empty.z = a.z
-
-                    # print("a",a)
-                    # for nurbspoint in subcurve.points:
-                    #    print([nurbspoint.co[0], nurbspoint.co[1], nurbspoint.co[2]], ',')
-
-                # Poly tipindeki Spline'ı convert et
-                elif curvetype == 'POLY':
-                    self.poly(obj, subcurve)
-
-                # Bezier tipindeki Spline'ı convert et
-                elif curvetype == 'BEZIER':
-                    self.bezier(obj, subcurve, reverse=j % 2 is 1)
-
-    def bezier(self, obj, subcurve, reverse=False):
-        """Burqada bir güncelleme yap:
-        pref.as_line değerine göre g2 ve g3 kodlarını kullan veya kullanma"""
-        pref = obj.ncnc_pr_toolpathconfigs
-        rc = pref.round_circ
-        r = pref.round_loca
-        z_safe = pref.safe_z
-        max_z = -10000
-        step_z = obj.ncnc_pr_toolpathconfigs.step
-
-        nokta_sayisi = len(subcurve.bezier_points) - (0 if subcurve.use_cyclic_u else 1)
-        nokta_list = []
-        for j in range(nokta_sayisi):
-            cycle_point = j == nokta_sayisi - 1 and subcurve.use_cyclic_u
-
-            # last point
-            lp = 0 if cycle_point else j + 1
-
-            # Point Head
-            m1 = subcurve.bezier_points[j].co - self.z_adim
-
-            hr = subcurve.bezier_points[j].handle_right - self.z_adim
-            hl = subcurve.bezier_points[lp].handle_left - self.z_adim
-
-            # Point End
-            m2 = subcurve.bezier_points[lp].co - self.z_adim
-
-            # Aşağıda yapılan iş şöyle özetlenebilir;
-            #   Üstteki m1 ve m2 (baş ve son) noktaları arasından alınan 3 değer ile bir inceleme yapılır
-            #   Bu m1, m2 ve diğer 3 değerin;
-            #       Bir çember üzerinde mi
-            #       Bir doğru üzerinde mi .. olduğu kontrol edilir. Eğer öyleyseler daha az Gkodu elde edilir
-
-            sorgula = [0.25, 0.5, 0.75]
-            bak_merkez = []
-            bak_dogru = []
-            for i in sorgula:
-                ps = nVector.bul_bezier_nokta_4p1t(i, m1, hr, hl, m2)
-                # print("m1",m1,"m2",m2,"ps",ps)
-                # bak_merkez.append(nVector.yuvarla_vector(rc, nVector.bul_cember_merkezi_3p(m1, ps, m2, duzlem="XYZ")))
-                bak_merkez.append(nVector.yuvarla_vector(rc, nCompute.circle_center(m1, ps, m2)))
-                bak_dogru.append(nVector.bul_dogru_uzerindemi_3p(m1, m2, ps))
-                # print("Doğruda mı",nVector.bul_dogru_uzerindemi_3p(m1,m2,ps))
-            # print("\n\n")
-            if False not in bak_dogru:  # Eğer düz bir doğruysa
-                if j == 0:
-                    nokta_list.append(m1)
-                nokta_list.append(nVector.bul_dogrunun_ortasi_2p(m1, m2))
-                nokta_list.append(m2)
-            elif not pref.as_line and bak_merkez[0] == bak_merkez[1] and bak_merkez[1] == bak_merkez[2]:
-                if j == 0:
-                    nokta_list.append(m1)
-                nokta_list.append(nVector.bul_bezier_nokta_4p1t(0.5, m1, hr, hl, m2))
-                nokta_list.append(m2)
-
-            # If you want a Line rather than a Curve
-            elif pref.as_line:
-                resolution = subcurve.resolution_u
-                step = 1 / resolution / 2
-                for i in range(resolution * 2 + 1):
-                    o = nVector.bul_bezier_nokta_4p1t(step * i, m1, hr, hl, m2)
-                    if i != 0 or j == 0:
-                        nokta_list.append(o)
-
-            # For Curve
-            else:
-                resolution = subcurve.resolution_u
-
-                # Çözünürlük çift katsayılı yapıldı.
-                if resolution % 2 == 1:
-                    resolution += 1
-
-                step = 1 / resolution
-                for i in range(resolution + 1):
-                    o = nVector.bul_bezier_nokta_4p1t(step * i, m1, hr, hl, m2)
-                    if i == 0 and j != 0:
-                        pass
-                    else:
-                        nokta_list.append(o)
-
-        if reverse:
-            nokta_list.reverse()
-
-        kac_kesit = len(nokta_list) - 2
-        for i in range(0, kac_kesit, 2):
-            p1 = nokta_list[i]
-            p2 = nokta_list[i + 1]
-            p3 = nokta_list[i + 2]
-            m = nVector.bul_cember_merkezi_3p(p1, p2, p3, duzlem=pref.plane)
-            # print(m)
-            b = nVector.bul_yonu_1m3p(m, p1, p2, p3)
-            I = m.x - p1.x if pref.plane != "G19" else 0
-            J = m.y - p1.y if pref.plane != "G18" else 0
-            K = m.z - p1.z if pref.plane != "G17" else 0
-
-            # print("p1", p1, "p2", p2, "p3", p3, "m", m, I, J, K)
-
-            limit = 800
-            if i == 0:
-                # Find Max Z Point
-                for nlp in nokta_list:
-                    if nlp.z > max_z:
-                        max_z = nlp.z + step_z
-
-                if not self.first_point.z:
-                    # First Z Position (Safe Z)
-                    self.first_point.z = max(max_z + z_safe, z_safe)
-                    self.first_point.x = p1.x
-                    self.first_point.y = p1.y
-
-                self.kodlar.append(f"G0 Z{round(self.first_point.z, r)}")
-
-                # First XY Pozition
-                self.kodlar.append(f"G0 X{round(p1.x, r)} Y{round(p1.y, r)}")
-
-                # Rapid Z, Nearest point
-                self.kodlar.append(f"G0 Z{round(max_z + 1, r)}")
-
-                # First Plunge in Z
-                self.kodlar.append(f"G1 Z{round(p1.z, r)} F{pref.plunge}")
-
-            if pref.as_line or abs(I) > limit or abs(J) > limit or abs(K) > limit:
-                # q = "G1 X{1:.{0}f} Y{2:.{0}f} Z{3:.{0}f}".format(r, p2.x, p2.y, p2.z)
-                q = "G1 X{1:.{0}f} Y{2:.{0}f} Z{3:.{0}f}".format(r, p3.x, p3.y, p3.z)
-            else:
-                q = "{1} X{2:.{0}f} Y{3:.{0}f} Z{4:.{0}f} I{5:.{0}f} J{6:.{0}f} K{7:.{0}f}".format(r, b, p3.x, p3.y,
-                                                                                                   p3.z, I, J, K)
-            if i == 0: q += " F{}".format(pref.feed)
-            self.kodlar.append(q)
-
-        # z_pos = max(max_z + z_safe, z_safe)
-        # self.kodlar.append(f"G0 Z{round(max_z + 1, r)}")
-        # self.kodlar.append("G0 Z{1:.{0}f}".format(r, z_safe))
-
-    def poly(self, obj, subcurve):
-        pref = obj.ncnc_pr_toolpathconfigs
-        r = pref.round_loca
-        z_safe = pref.safe_z
-        for i, p in enumerate(subcurve.points):
-            # obj2 = obj.copy()
-            # p.co.rotate(obj2.rotation_euler)
-            # p.co
-            # resize
-            # resize_3d
-            # rotate
-            loc = p.co.to_3d() - self.z_adim
-
-            if i == 0:
-                self.kodlar.append("G0 Z{1:.{0}f}".format(r, z_safe))
-                self.kodlar.append("G0 X{1:.{0}f} Y{2:.{0}f}".format(r, loc.x, loc.y))
-                # self.kodlar.append("G0 Z1")
-                self.kodlar.append("G1 Z{1:.{0}f} F{2}".format(r, loc.z, pref.plunge))
-            else:
-                q = "G1 X{1:.{0}f} Y{2:.{0}f} Z{3:.{0}f}".format(r, loc.x, loc.y, loc.z)
-                if i == 1: q += " F{}".format(pref.feed)
-                self.kodlar.append(q)
-
-        if subcurve.use_cyclic_u:
-            loc = subcurve.points[0].co.to_3d() - self.z_adim
-            self.kodlar.append("G1 X{1:.{0}f} Y{2:.{0}f} Z{3:.{0}f}".format(r, loc.x, loc.y, loc.z))
-            self.kodlar.append("G0 Z{1:.{0}f}".format(r, z_safe))
-        else:
-            self.kodlar.append("G0 Z{1:.{0}f}".format(r, z_safe))
+        self.kodlar.extend(nconvert.block_header(name, expand, enable))
 
 
 # #################################
@@ -1832,6 +1697,9 @@ class NCNC_PR_Communication(PropertyGroup):
     # Mesaj Kuyruğu
     queue_list = []
 
+    # Program rows of the messages in queue_list. 0 -> Not a program line
+    queue_rows = []
+
     ######################################
     # ############################# Hidden
     # Mesaj Kuyruğu Gizli
@@ -1850,7 +1718,7 @@ class NCNC_PR_Communication(PropertyGroup):
         # print("queue_list_hidden", self.queue_list_hidden)
 
     def get_answer(self):
-        if self.isrun and not len(self.queue_list):
+        if self.isrun and not len(self.queue_list) and not self.queue_stream:
             self.run_mode = "stop"
 
         return self.answers.pop(0) if len(self.answers) else ""
@@ -1865,7 +1733,46 @@ class NCNC_PR_Communication(PropertyGroup):
 
     def clear_queue(self):
         self.queue_list.clear()
+        self.queue_rows.clear()
         self.queue_list_hidden.clear()
+        self.queue_stream.clear()
+
+    ######################################
+    # ############################# Stream
+    # Lines of the running program which aren't in the queue yet. Big programs aren't copied into the queue at once
+    queue_stream = []
+
+    # The queue is filled up to this
+    queue_stream_fill = 100
+
+    def send_stream(self, lines):
+        self.queue_stream.clear()
+        self.queue_stream.append(enumerate(lines, start=1))
+        self.fill_queue()
+
+    def fill_queue(self):
+        while self.queue_stream and len(self.queue_list) < self.queue_stream_fill:
+            item = next(self.queue_stream[0], None)
+            if item is None:
+                self.queue_stream.clear()
+                break
+
+            row, line = item
+            x = line.strip()
+            if x:  # or (x.startswith("(") and x.endswith(")")):
+                self.send_in_order(x, row)
+
+    ######################################
+    # ############################## Trail
+    # Last program row acknowledged by the machine, of the running text -> Execution trail in the viewport
+    run_row: IntProperty(default=0)
+    run_text: StringProperty(default="")
+
+    def get_executed(self, text_name) -> int:
+        """Rows of the text before it are executed"""
+        if not self.run_row or self.run_text != text_name:
+            return 0
+        return self.run_row + 1
 
     ############################################################
     # ################################################ MESSAGING
@@ -1880,7 +1787,7 @@ class NCNC_PR_Communication(PropertyGroup):
 
     ############################################################
     # ################################################## METHODS
-    def send_in_order(self, msg=None):
+    def send_in_order(self, msg=None, row=0):
         if not msg:
             return
 
@@ -1888,6 +1795,7 @@ class NCNC_PR_Communication(PropertyGroup):
             self.set_hidden("$$")
 
         self.queue_list.append(msg)
+        self.queue_rows.append(row)
 
     @classmethod
     def register(cls):
@@ -1927,12 +1835,9 @@ class NCNC_OT_CommunicationRun(Operator):
                 self.report({'INFO'}, "No Selected Text")
                 return {"CANCELLED"}
 
-            for i in pr_txt.as_string().splitlines():
-                x = i.strip()
-                if not x:  # or (x.startswith("(") and x.endswith(")")):
-                    continue
-                pr_com.send_in_order(x)
-
+            pr_com.run_row = 0
+            pr_com.run_text = pr_txt.name
+            pr_com.send_stream(pr_txt.ncnc_pr_text.code_lines())
             pr_com.run_mode = "start"
 
         elif self.action == "pause":
@@ -1945,6 +1850,7 @@ class NCNC_OT_CommunicationRun(Operator):
 
         elif self.action == "stop":
             pr_com.run_mode = "stop"
+            pr_com.run_row = 0
             bpy.ops.ncnc.machine(action="reset")
 
         return {'FINISHED'}
@@ -1999,6 +1905,9 @@ class NCNC_OT_Communication(Operator):
     #   2.1: Hidden -> Write
     sent = 0
 
+    # Program row of the last public message. Executed when it is acknowledged
+    sent_row = 0
+
     pr_con = None
     pr_com = None
     pr_dev = None
@@ -2059,8 +1968,16 @@ class NCNC_OT_Communication(Operator):
         # ####################################
         # ####################################
 
+        pr_com = self.pr_com
+        before = len(pr_com.items), len(pr_com.queue_list), len(pr_com.queue_list_hidden)
+
         self.delay = self.contact()
 
+        # Messages or the queue changed -> Communication panel
+        if (len(pr_com.items), len(pr_com.queue_list), len(pr_com.queue_list_hidden)) != before:
+            redraw.tag(nredraw.UI)
+            redraw_flush(context)
+
         return {'PASS_THROUGH'}
 
     def contact(self):
@@ -2095,6 +2012,10 @@ class NCNC_OT_Communication(Operator):
                 pr_com.active_item_index = len(pr_com.items) - 1
                 pr_com.answers.append(c)
 
+            if self.sent_row:
+                pr_com.run_row = self.sent_row
+                self.sent_row = 0
+
             # One visible code has been sent and read. The queue is in one hidden code.
             self.sent = 2.1
 
@@ -2129,9 +2050,11 @@ class NCNC_OT_Communication(Operator):
 
         # SEND PUBLIC
         if self.sent == 1.1:
+            pr_com.fill_queue()
             if len(pr_com.queue_list) and pr_dev.buffer > 10:  # and pr_dev.bufwer > 100
                 # If the buffer's remainder is greater than 10, new code can be sent.
                 code = pr_com.queue_list.pop(0)
+                self.sent_row = pr_com.queue_rows.pop(0) if pr_com.queue_rows else 0
                 gi = self.send(code)
                 item = pr_com.items.add()
                 item.ingoing = False
@@ -2306,7 +2229,8 @@ class NCNC_OT_Decoder(Operator):
 
     q_count = 0
 
-    ct_reg = None  # Context, Regions
+    last_status = ""
+    last_modes = ""
     pr_con = None
     pr_com = None
     pr_dev = None
@@ -2368,7 +2292,6 @@ class NCNC_OT_Decoder(Operator):
             context.scene.ncnc_pr_connection.isconnected = False
             return self.timer_remove(context)
 
-        self.ct_reg = context.area.regions
         self.pr_dev = context.scene.ncnc_pr_machine
         self.pr_con = context.scene.ncnc_pr_connection
         self.pr_com = context.scene.ncnc_pr_communication
@@ -2385,6 +2308,7 @@ class NCNC_OT_Decoder(Operator):
 
         # self.decode("?")
 
+        redraw_flush(context)
         return {'PASS_THROUGH'}
 
     def decode(self, msg="?"):
@@ -2408,17 +2332,26 @@ class NCNC_OT_Decoder(Operator):
                 continue
             elif c.startswith("alarm"):
                 self.pr_dev.status = c.upper()
+                redraw.tag(nredraw.UI)
                 continue
             elif c.startswith("<") and c.endswith(">"):
                 """< > : Enclosed chevrons contains status report data.Examples;
                     <Idle|WPos:120.000,50.000,0.000|FS:0,0>
                     <Jog|WPos:94.853,50.000,0.000|FS:500,0>
                 """
-                self.status_report(c.strip("<>"))
+                # Same report -> Nothing to redraw
+                if c != self.last_status:
+                    self.last_status = c
+                    self.status_report(c.strip("<>"))
+                    redraw.tag(nredraw.UI, nredraw.WINDOW)
                 continue
             elif re.findall("\[gc\:(.*)\]", c):  # c.startswith("[gc") and c.endswith("]"):
                 """[gc:g0 g54 g17 g21 g90 g94 m5 m9 t0 f0 s0]"""
-                self.modes(re.findall("\[gc\:(.*)\]", c)[0])
+                # Same modes -> Nothing to redraw
+                if c != self.last_modes:
+                    self.last_modes = c
+                    self.modes(re.findall("\[gc\:(.*)\]", c)[0])
+                    redraw.tag(nredraw.UI)
 
             # ############################################### RESOLVE
             # ################################################ $x=val
@@ -2449,6 +2382,7 @@ class NCNC_OT_Decoder(Operator):
                             if var[k] != prop[k]:
                                 exec(f"self.pr_dev.s{x}[{k}] = {var[k]}")
                                 # cls.pr_dev[f"s"][k] = var[k]
+                                redraw.tag(nredraw.UI)
                     else:
                         if var != prop:
                             if conv in [str, mask_s10]:
@@ -2456,11 +2390,7 @@ class NCNC_OT_Decoder(Operator):
                             else:
                                 exec(f'self.pr_dev.s{x} = {var}')
                             # cls.pr_dev[f"s{x}"] = var
-
-        if self.ct_reg:
-            for region in self.ct_reg:
-                if region.type == "UI":
-                    region.tag_redraw()
+                            redraw.tag(nredraw.UI)
 
     def status_report(self, code):
         """ >> ?
@@ -2495,6 +2425,9 @@ class NCNC_OT_Decoder(Operator):
             elif "bf" in i:
                 self.pr_dev.buffer = int(a[0])
                 self.pr_dev.bufwer = int(a[1])
+            elif "ov" in i:
+                for j in range(3):
+                    self.pr_dev.overrides[j] = int(a[j])
 
     def modes(self, code):
         """Mode Group"""
@@ -2619,6 +2552,12 @@ class NCNC_PR_Machine(PropertyGroup):
         precision=1,
         description="Spindle (Current)"
     )
+    overrides: IntVectorProperty(
+        name="Overrides",
+        size=3,
+        default=(100, 100, 100),
+        description="Feed, rapid and spindle overrides (%)"
+    )
     saved_feed: FloatProperty(
         name="&Feed",
         default=0,
@@ -4294,6 +4233,62 @@ class NCNC_PT_JogController(Panel):
 ##################################
 ##################################
 
+# Redraws of the viewports -> Layers tag, redraw_flush redraws
+redraw = nredraw.nRedraw()
+
+
+def redraw_flush(context):
+    """Redraws the tagged regions of the 3D Viewports, if they are due. The others are scheduled"""
+    addon = bpy.context.preferences.addons.get(__name__)
+    if addon:
+        redraw.max_fps = addon.preferences.max_fps
+
+    regions = redraw.due()
+    if regions:
+        for window in context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type == "VIEW_3D":
+                    for region in area.regions:
+                        if region.type in regions:
+                            region.tag_redraw()
+
+    redraw_schedule()
+
+
+def redraw_schedule():
+    """Flushes the tagged regions when they fall due -> Without waiting for the next event of a modal.
+    Draw callbacks only schedule. They don't tag redraws while drawing"""
+    wait = redraw.wait()
+    if wait is None or bpy.app.timers.is_registered(redraw_timer):
+        return
+    bpy.app.timers.register(redraw_timer, first_interval=wait)
+
+
+def redraw_timer():
+    redraw_flush(bpy.context)
+    return None
+
+
+def dash_form_pos(pos):
+    return f"X {round(pos[0], 2)}   Y {round(pos[1], 2)}   Z {round(pos[2], 2)}"
+
+
+def dash_form_buffer(pair):
+    return f"{pair[0]},{pair[1]}"
+
+
+def dash_form_line(line):
+    return f"{line[0]} / {line[1]}"
+
+
+def dash_form_ovr(ovr):
+    return f"F {ovr[0]}%   R {ovr[1]}%   S {ovr[2]}%"
+
+
+def dash_form_time(seconds):
+    return str(timedelta(seconds=seconds))
+
+
 def handles() -> dict:
     keycode = "ncnc_pr_vision.handles"
     ns = bpy.app.driver_namespace
@@ -4390,11 +4385,17 @@ class NCNC_PR_Vision(PropertyGroup):
         keycode = "DASH"
         handles = handle_remove(keycode)
         if self.dash:
+            cls = self.__class__
+            cls.dash_board = nDashboard()
+            cls.dash_dirty = True
             handles[keycode] = bpy.types.SpaceView3D.draw_handler_add(self.dash_callback,
                                                                       (self, context),
                                                                       "WINDOW",
                                                                       "POST_PIXEL")
 
+    def update_dash_layout(self, context):
+        self.__class__.dash_dirty = True
+
     dash: BoolProperty(
         name="Machine Dashboard",
         description="Show/Hide in Viewport",
@@ -4404,32 +4405,56 @@ class NCNC_PR_Vision(PropertyGroup):
     feed: BoolProperty(
         name="Feed on Dashboard",
         description="Show/Hide in Viewport",
-        default=True
+        default=True,
+        update=update_dash_layout
     )
     spindle: BoolProperty(
         name="Spindle on Dashboard",
         description="Show/Hide in Viewport",
-        default=True
+        default=True,
+        update=update_dash_layout
     )
     buffer: BoolProperty(
         name="Buffer on Dashboard",
         description="Show/Hide in Viewport",
-        default=True
+        default=True,
+        update=update_dash_layout
     )
     status: BoolProperty(
         name="Status on Dashboard",
         description="Show/Hide in Viewport",
-        default=True
+        default=True,
+        update=update_dash_layout
     )
     pos: BoolProperty(
         name="Position on Dashboard",
         description="Show/Hide in Viewport",
-        default=True
+        default=True,
+        update=update_dash_layout
+    )
+    ovr: BoolProperty(
+        name="Overrides on Dashboard",
+        description="Show/Hide in Viewport",
+        default=False,
+        update=update_dash_layout
+    )
+    line: BoolProperty(
+        name="Line Number on Dashboard",
+        description="Show/Hide in Viewport",
+        default=False,
+        update=update_dash_layout
+    )
+    eta: BoolProperty(
+        name="Remaining Time on Dashboard",
+        description="Show/Hide in Viewport",
+        default=False,
+        update=update_dash_layout
     )
 
     def update_color_dash(self, context):
-        for key in ("feed", "spindle", "buffer", "status", "pos"):
+        for key in ("feed", "spindle", "buffer", "status", "pos", "ovr", "line", "eta"):
             self[f"color_{key}"] = self.color_dash
+        self.update_dash_layout(context)
 
     color_dash: FloatVectorProperty(
         name='Dashboard',
@@ -4445,79 +4470,133 @@ class NCNC_PR_Vision(PropertyGroup):
         size=4,
         min=0.0,
         max=1.0,
-        default=(1, 1, 1, 0.9)
+        default=(1, 1, 1, 0.9),
+        update=update_dash_layout
     )
     color_spindle: FloatVectorProperty(
         subtype='COLOR',
         size=4,
         min=0.0,
         max=1.0,
-        default=(1, 1, 1, 0.9)
+        default=(1, 1, 1, 0.9),
+        update=update_dash_layout
     )
     color_buffer: FloatVectorProperty(
         subtype='COLOR',
         size=4,
         min=0.0,
         max=1.0,
-        default=(1, 1, 1, 0.9)
+        default=(1, 1, 1, 0.9),
+        update=update_dash_layout
     )
     color_status: FloatVectorProperty(
         subtype='COLOR',
         size=4,
         min=0.0,
         max=1.0,
-        default=(1, .8, .2, 0.9)
+        default=(1, .8, .2, 0.9),
+        update=update_dash_layout
     )
     color_pos: FloatVectorProperty(
         subtype='COLOR',
         size=4,
         min=0.0,
         max=1.0,
-        default=(1, .8, .2, 0.9)
+        default=(1, .8, .2, 0.9),
+        update=update_dash_layout
+    )
+    color_ovr: FloatVectorProperty(
+        subtype='COLOR',
+        size=4,
+        min=0.0,
+        max=1.0,
+        default=(1, 1, 1, 0.9),
+        update=update_dash_layout
+    )
+    color_line: FloatVectorProperty(
+        subtype='COLOR',
+        size=4,
+        min=0.0,
+        max=1.0,
+        default=(1, 1, 1, 0.9),
+        update=update_dash_layout
+    )
+    color_eta: FloatVectorProperty(
+        subtype='COLOR',
+        size=4,
+        min=0.0,
+        max=1.0,
+        default=(1, 1, 1, 0.9),
+        update=update_dash_layout
     )
 
     def update_thick_dash(self, context):
-        for key in ("feed", "spindle", "buffer", "status", "pos"):
+        for key in ("feed", "spindle", "buffer", "status", "pos", "ovr", "line", "eta"):
             self[f"thick_{key}"] = self.thick_dash
+        self.update_dash_layout(context)
 
     thick_dash: IntProperty(default=14, min=8, max=20, description="Font Size", update=update_thick_dash)
-    thick_feed: IntProperty(default=14, min=8, max=20, description="Font Size")
-    thick_spindle: IntProperty(default=14, min=8, max=20, description="Font Size")
-    thick_buffer: IntProperty(default=14, min=8, max=20, description="Font Size")
-    thick_status: IntProperty(default=14, min=8, max=20, description="Font Size")
-    thick_pos: IntProperty(default=14, min=8, max=20, description="Font Size")
+    thick_feed: IntProperty(default=14, min=8, max=20, description="Font Size", update=update_dash_layout)
+    thick_spindle: IntProperty(default=14, min=8, max=20, description="Font Size", update=update_dash_layout)
+    thick_buffer: IntProperty(default=14, min=8, max=20, description="Font Size", update=update_dash_layout)
+    thick_status: IntProperty(default=14, min=8, max=20, description="Font Size", update=update_dash_layout)
+    thick_pos: IntProperty(default=14, min=8, max=20, description="Font Size", update=update_dash_layout)
+    thick_ovr: IntProperty(default=14, min=8, max=20, description="Font Size", update=update_dash_layout)
+    thick_line: IntProperty(default=14, min=8, max=20, description="Font Size", update=update_dash_layout)
+    thick_eta: IntProperty(default=14, min=8, max=20, description="Font Size", update=update_dash_layout)
+
+    # Fields of the dashboard, bottom to top -> (key, label)
+    dash_fields = (("pos", "WPos"),
+                   ("buffer", "Buffer"),
+                   ("spindle", "Spindle"),
+                   ("feed", "Feed"),
+                   ("ovr", "Override"),
+                   ("line", "Line"),
+                   ("eta", "ETA"),
+                   ("status", "Status"),
+                   )
+    dash_board = None
+
+    # Shown fields, colors or sizes changed -> Laid out again
+    dash_dirty = True
 
     @classmethod
     def dash_callback(cls, self, context):
         if not cls.register_check(context):
             return
-        # Draw text to indicate that draw mode is active
-        pr_mac = context.scene.ncnc_pr_machine
-        pos = pr_mac.mpos if pr_mac.pos_type == "mpos" else pr_mac.wpos
 
-        blf_pos_y = 10
-
-        pos_type = 'WPos' if pr_mac.pos_type == 'wpos' else 'MPos'
-        for prop, text, val in [
-            ("pos", pos_type, f"X {round(pos[0], 2)}   Y {round(pos[1], 2)}   Z {round(pos[2], 2)}"),
-            ("buffer", "Buffer", f"{pr_mac.buffer},{pr_mac.bufwer}"),
-            ("spindle", "Spindle", pr_mac.spindle),
-            ("feed", "Feed", pr_mac.feed),
-            ("status", "Status", pr_mac.status),
-        ]:
-
-            if not eval(f"self.{prop}"):
-                continue
+        board = cls.dash_board
+        if cls.dash_dirty:
+            board.set_fields([(key, label, getattr(self, f"color_{key}"), getattr(self, f"thick_{key}"))
+                              for key, label in cls.dash_fields if getattr(self, key)])
+            cls.dash_dirty = False
 
-            size = eval(f"self.thick_{prop}")
-            blf.color(0, *eval(f"self.color_{prop}"))
-            blf.size(0, size, 64)
-            blf.position(0, 10, blf_pos_y, 0)
-            blf.draw(0, text)
+        # Values are formatted only when they change
+        pr_mac = context.scene.ncnc_pr_machine
+        if pr_mac.pos_type == "mpos":
+            pos = pr_mac.mpos
+            board.set_label("pos", "MPos")
+        else:
+            pos = pr_mac.wpos
+            board.set_label("pos", "WPos")
+
+        ovr = pr_mac.overrides
+        board.set_value("pos", (pos[0], pos[1], pos[2]), dash_form_pos)
+        board.set_value("buffer", (pr_mac.buffer, pr_mac.bufwer), dash_form_buffer)
+        board.set_value("spindle", pr_mac.spindle)
+        board.set_value("feed", pr_mac.feed)
+        board.set_value("ovr", (ovr[0], ovr[1], ovr[2]), dash_form_ovr)
+        board.set_value("status", pr_mac.status)
+
+        # Line and remaining time of the running text
+        pr_act = context.scene.ncnc_pr_texts.active_text
+        if pr_act and (self.line or self.eta):
+            program = pr_act.ncnc_pr_text.program
+            executed = context.scene.ncnc_pr_communication.get_executed(pr_act.name)
+            board.set_value("line", (max(executed - 1, 0), program.size - 1), dash_form_line)
+            board.set_value("eta", int(program.remaining_time(executed)), dash_form_time)
 
-            blf.position(0, size * 5, blf_pos_y, 0)
-            blf.draw(0, f"{val}")
-            blf_pos_y += size * 1.5
+        board.draw()
 
     @classmethod
     def dash_callback_recovery(cls, self, context):
@@ -4571,26 +4650,11 @@ class NCNC_PR_Vision(PropertyGroup):
             # https://docs.blender.org/api/current/gpu.html#custom-shader-for-dotted-3d-line
 
             cls = self.__class__
-            for i in range(4):
-                cls.gcode_shaders[i] = gpu.shader.from_builtin('3D_UNIFORM_COLOR')
-                cls.gcode_batchs[i] = batch_for_shader(cls.gcode_shaders[i],
-                                                       'LINES',
-                                                       {"pos": pr_txt.get_lines(i)}
-                                                       # {"pos": []}
-                                                       )
-
-            cls.gcode_shaders["p"] = gpu.shader.from_builtin('3D_UNIFORM_COLOR')
-            cls.gcode_batchs["p"] = batch_for_shader(cls.gcode_shaders["p"],
-                                                     'POINTS',
-                                                     {"pos": pr_txt.get_points()}
-                                                     # {"pos": []}
-                                                     )
-
-            cls.gcode_shaders["c"] = gpu.shader.from_builtin('3D_UNIFORM_COLOR')
-            cls.gcode_batchs["c"] = batch_for_shader(cls.gcode_shaders["c"],
-                                                     'LINES',
-                                                     {"pos": []}
-                                                     )
+
+            # G0, G1, G2, G3, points and the selection -> One persistent batch, uploaded in chunks
+            cls.gcode_toolpath = nToolpath()
+            cls.gcode_toolpath.set_heatmap(self.heatmap)
+            cls.gcode_toolpath.update(pr_txt.program)
 
             handles[keycode] = bpy.types.SpaceView3D.draw_handler_add(cls.gcode_callback,
                                                                       (self, context),
@@ -4608,46 +4672,67 @@ class NCNC_PR_Vision(PropertyGroup):
 
         pr_txt = pr_txt.ncnc_pr_text
         if pr_txt.event:
-            cls.gcode_batchs["p"] = batch_for_shader(cls.gcode_shaders["p"],
-                                                     'POINTS',
-                                                     {"pos": pr_txt.get_points()})
-            for i in range(4):
-                cls.gcode_batchs[i] = batch_for_shader(cls.gcode_shaders[i],
-                                                       'LINES',
-                                                       {"pos": pr_txt.get_lines(i)})
-            if context.area:
-                context.area.tag_redraw()
+            pr_txt.event = False
 
-        if pr_txt.event_selected:
-            cls.gcode_batchs["c"] = batch_for_shader(cls.gcode_shaders["c"],
-                                                     'LINES',
-                                                     {"pos": pr_txt.get_selected()})
-
-        for i, color, thick, show in [(0, self.color_g0, self.thick_g0, self.g0),
-                                      (1, self.color_g1, self.thick_g1, self.g1),
-                                      (2, self.color_g2, self.thick_g2, self.g2),
-                                      (3, self.color_g3, self.thick_g3, self.g3),
-                                      ("p", self.color_gp, self.thick_gp, self.gp),
-                                      ("c", self.color_gc, self.thick_gc, self.gc)
-                                      ]:
-            if not show:
-                continue
-            if i == "p":
-                bgl.glPointSize(thick)
-            else:
-                bgl.glLineWidth(thick)
-            cls.gcode_shaders[i].bind()
-            cls.gcode_shaders[i].uniform_float("color", color)
-            cls.gcode_batchs[i].draw(cls.gcode_shaders[i])
+        # Only the changed chunks are uploaded
+        program = pr_txt.program
+        if cls.gcode_toolpath.update(program):
+            redraw.tag(nredraw.WINDOW)
+            redraw_schedule()
+
+        # Level of detail -> By the pixel size at the center of the program
+        pixel = 0
+        if cls.gcode_toolpath.levels and context.region_data:
+            pixel = pixel_size(context.region, context.region_data,
+                               Vector(((program.minimum + program.maximum) / 2).tolist()))
 
-    gcode_shaders = {}
-    gcode_batchs = {}
+        if pr_txt.event_selected:
+            pr_txt.event_selected = False
+
+        toolpath = cls.gcode_toolpath
+        for style, color, thick, show in [(STYLE_G0, self.color_g0, self.thick_g0, self.g0),
+                                          (STYLE_G1, self.color_g1, self.thick_g1, self.g1),
+                                          (STYLE_G2, self.color_g2, self.thick_g2, self.g2),
+                                          (STYLE_G3, self.color_g3, self.thick_g3, self.g3),
+                                          (STYLE_POINT, self.color_gp, self.thick_gp, self.gp),
+                                          (STYLE_SELECTED, self.color_gc, self.thick_gc, self.gc),
+                                          (STYLE_DONE, self.color_gt, self.thick_gt, self.gt)
+                                          ]:
+            toolpath.set_style(style, color, thick, show)
+
+        # Execution trail -> Only a uniform, nothing is uploaded
+        cls.gcode_executed = context.scene.ncnc_pr_communication.get_executed(pr_txt.id_data.name)
+
+        toolpath.draw((context.region.width, context.region.height), pr_txt.get_selection(), pixel,
+                      cls.gcode_executed)
+
+    gcode_toolpath = None
+    gcode_executed = 0
     gcode_last = ""
     gcode_prev_current_line = None
 
     gcode: BoolProperty(default=True, update=update_gcode)
+
+    def update_heatmap(self, context):
+        if self.gcode_toolpath:
+            # Uploaded again at the next draw
+            self.gcode_toolpath.set_heatmap(self.heatmap)
+            redraw.tag(nredraw.WINDOW)
+
+    heatmap: EnumProperty(
+        name="Heatmap",
+        default="NONE",
+        update=update_heatmap,
+        description="Colors the feed moves by their feed rate or time",
+        items=[("NONE", "None", "Colors of the theme"),
+               ("FEED", "Feed", "Commanded feed rate of the line (mm/min)"),
+               ("TIME", "Time", "Estimated seconds of the line"),
+               ("SHARE", "Share", "Share of the line in the total time (Log scale)"),
+               ]
+    )
     gp: BoolProperty(default=True)
     gc: BoolProperty(default=True)
+    gt: BoolProperty(default=True)
     g0: BoolProperty(default=True)
     g1: BoolProperty(default=True)
     g2: BoolProperty(default=True)
@@ -4661,6 +4746,7 @@ class NCNC_PR_Vision(PropertyGroup):
                                update=update_thick_gcode)
     thick_gp: FloatProperty(name="Point", default=3.0, min=0, max=10, description="Point Thickness")
     thick_gc: FloatProperty(name="Current", default=3.0, min=0, max=10, description="Line Thickness")
+    thick_gt: FloatProperty(name="Executed", default=3.0, min=0, max=10, description="Line Thickness")
     thick_g0: FloatProperty(name="Rapid", default=1.0, min=0, max=10, description="Line Thickness")
     thick_g1: FloatProperty(name="Linear", default=2.0, min=0, max=10, description="Line Thickness")
     thick_g2: FloatProperty(name="Arc CW", default=2.0, min=0, max=10, description="Line Thickness")
@@ -4695,6 +4781,14 @@ class NCNC_PR_Vision(PropertyGroup):
         max=1.0,
         default=(1, 0, 1, .5)
     )
+    color_gt: FloatVectorProperty(
+        name='Executed Code Color',
+        subtype='COLOR',
+        size=4,
+        min=0.0,
+        max=1.0,
+        default=(1, .8, .2, .7)
+    )
     color_g0: FloatVectorProperty(
         name='Rapid Color',
         subtype='COLOR',
@@ -4739,10 +4833,8 @@ class NCNC_PR_Vision(PropertyGroup):
             pr_mac = context.scene.ncnc_pr_machine
             pos = pr_mac.mpos if pr_mac.pos_type == "mpos" else pr_mac.wpos
 
-            cls.mill_shader = gpu.shader.from_builtin('3D_UNIFORM_COLOR')
-            cls.mill_batch = batch_for_shader(cls.mill_shader,
-                                              'LINES',
-                                              {"pos": cls.mill_lines(*pos)})
+            # Built once at the origin. Moved by the model matrix
+            cls.mill_cursor = nCursor(cls.mill_lines(0, 0, 0), pos)
 
             handles[keycode] = bpy.types.SpaceView3D.draw_handler_add(cls.mill_callback,
                                                                       (self, context),
@@ -4765,30 +4857,23 @@ class NCNC_PR_Vision(PropertyGroup):
     )
 
     thick_mill: FloatProperty(name="Arc CCW", default=3.0, min=0, max=10, description="Line Thickness")
-    mill_delay = .5
-    mill_last_time = 0
-    mill_shader = None
-    mill_batch = None
+    mill_cursor = None
 
     @classmethod
     def mill_callback(cls, self, context):
         if not cls.register_check(context):
             return
 
-        if time.time() - cls.mill_last_time > cls.mill_delay:
-            pr_mac = context.scene.ncnc_pr_machine
-            pos = pr_mac.mpos if pr_mac.pos_type == "mpos" else pr_mac.wpos
+        pr_mac = context.scene.ncnc_pr_machine
+        pos = pr_mac.mpos if pr_mac.pos_type == "mpos" else pr_mac.wpos
 
-            cls.mill_last_time = time.time()
-            cls.mill_delay = .1 if pr_mac.status in ("JOG", "RUN") else .5
-            cls.mill_batch = batch_for_shader(cls.mill_shader,
-                                              'LINES',
-                                              {"pos": cls.mill_lines(*pos)})
+        # Between two reports -> Redrawn until the cursor reaches the reported position
+        if cls.mill_cursor.move(pos):
+            redraw.tag(nredraw.WINDOW)
+            redraw_schedule()
 
         bgl.glLineWidth(self.thick_mill)
-        cls.mill_shader.bind()
-        cls.mill_shader.uniform_float("color", self.color_mill)
-        cls.mill_batch.draw(cls.mill_shader)
+        cls.mill_cursor.draw(self.color_mill)
 
     @classmethod
     def mill_lines(cls, x, y, z):
@@ -4806,6 +4891,95 @@ class NCNC_PR_Vision(PropertyGroup):
             (x, y, z + s2), (x, y, z + s2 * 2)
         ]
 
+    # ##########################
+    # ################### STOCK
+    def update_stock(self, context):
+        keycode = "STOCK"
+        handles = handle_remove(keycode)
+
+        cls = self.__class__
+        cls.stock_sim = None
+        cls.stock_surface = None
+        if self.stock:
+            cls.stock_surface = nSurface()
+            handles[keycode] = bpy.types.SpaceView3D.draw_handler_add(cls.stock_callback,
+                                                                      (self, context),
+                                                                      "WINDOW",
+                                                                      "POST_VIEW")
+
+    def update_stock_settings(self, context):
+        # Simulated again from the start
+        self.__class__.stock_sim = None
+
+    stock: BoolProperty(
+        name="Stock Simulation",
+        description="Show the stock after the material removal of the toolpath",
+        default=False,
+        update=update_stock
+    )
+    stock_tool: EnumProperty(
+        name="Tool",
+        default=TOOL_FLAT,
+        update=update_stock_settings,
+        items=[(TOOL_FLAT, "Flat", "Flat end mill"),
+               (TOOL_BALL, "Ball", "Ball end mill"),
+               (TOOL_V, "V-Bit", "V-bit, engraving tool"),
+               ]
+    )
+    stock_diameter: FloatProperty(name="Diameter", default=3.0, min=.01, max=100, update=update_stock_settings,
+                                  description="Tool diameter (mm)")
+    stock_angle: FloatProperty(name="Angle", default=math.radians(90), min=math.radians(1), max=math.radians(179),
+                               subtype="ANGLE", update=update_stock_settings, description="Tip angle of the V-bit")
+    stock_resolution: FloatProperty(name="Resolution", default=.2, min=.01, max=10, update=update_stock_settings,
+                                    description="Cell size of the heightmap (mm). Coarser for big stocks")
+    stock_top: FloatProperty(name="Top", default=0, update=update_stock_settings,
+                             description="Z of the stock top (mm)")
+    stock_follow: BoolProperty(name="Follow Execution", default=False, update=update_stock_settings,
+                               description="Only the executed part of the running job is cut")
+    color_stock: FloatVectorProperty(
+        name='Stock Color',
+        subtype='COLOR',
+        size=4,
+        min=0.0,
+        max=1.0,
+        default=(.8, .6, .4, 1)
+    )
+
+    stock_sim = None
+    stock_surface = None
+
+    @classmethod
+    def stock_step(cls, context) -> bool:
+        """Simulates a little. Returns True if the stock should be drawn again"""
+        pr_vis = context.scene.ncnc_pr_vision
+        pr_act = context.scene.ncnc_pr_texts.active_text
+        if not (pr_vis.stock and cls.stock_surface and pr_act):
+            return False
+
+        if not cls.stock_sim:
+            cls.stock_sim = nStock(pr_vis.stock_tool, pr_vis.stock_diameter, pr_vis.stock_resolution,
+                                   pr_vis.stock_top, pr_vis.stock_angle)
+            cls.stock_surface.dirty = True
+
+        # Vertices of the executed rows
+        program = pr_act.ncnc_pr_text.program
+        end = None
+        if pr_vis.stock_follow:
+            executed = context.scene.ncnc_pr_communication.get_executed(pr_act.name)
+            end = int(program.seg_offset[min(executed, program.size)])
+
+        if cls.stock_sim.update(program, end):
+            cls.stock_surface.dirty = True
+        return cls.stock_surface.dirty
+
+    @classmethod
+    def stock_callback(cls, self, context):
+        if not cls.register_check(context) or not cls.stock_sim:
+            return
+
+        cls.stock_surface.update(cls.stock_sim)
+        cls.stock_surface.draw(self.color_stock)
+
     @classmethod
     def register_check(cls, context) -> bool:
         return hasattr(context.scene, "ncnc_pr_machine") and hasattr(context.scene, "ncnc_pr_vision")
@@ -4822,7 +4996,7 @@ class NCNC_PR_Vision(PropertyGroup):
     @classmethod
     def unregister(cls):
         del Scene.ncnc_pr_vision
-        for keycode in ("DASH", "MILL", "GCODE"):
+        for keycode in ("DASH", "MILL", "GCODE", "STOCK"):
             handle_remove(keycode)
 
 
@@ -4870,6 +5044,9 @@ class NCNC_OT_Vision(Operator):
                 context.area.tag_redraw()
             return self.timer_remove(context)
 
+        # Due redraws are flushed at every event, not only at the ticks
+        redraw_flush(context)
+
         if time.time() - self._last_time < self.delay:
             return {'PASS_THROUGH'}
 
@@ -4884,11 +5061,22 @@ class NCNC_OT_Vision(Operator):
         pr_txt = pr_act.ncnc_pr_text
 
         pr_txt.event_control()
-        if pr_txt.event or pr_txt.event_selected:
-            for area in context.screen.areas:
-                if area.type == "VIEW_3D":
-                    area.tag_redraw()
 
+        # Simplified levels of big programs are built while the view is idle
+        toolpath = NCNC_PR_Vision.gcode_toolpath
+        if toolpath and toolpath.build_lod(pr_txt.program):
+            pr_txt.event = True
+
+        # Trail moved -> Redraw at the rate of the acknowledgements
+        executed = context.scene.ncnc_pr_communication.get_executed(pr_act.name)
+
+        # Stock simulation runs a little at each tick
+        stock = NCNC_PR_Vision.stock_step(context)
+
+        if pr_txt.event or pr_txt.event_selected or stock or executed != NCNC_PR_Vision.gcode_executed:
+            redraw.tag(nredraw.WINDOW)
+
+        redraw_flush(context)
         return {'PASS_THROUGH'}
 
 
@@ -4911,6 +5099,49 @@ class NCNC_PT_Vision(Panel):
         pr_vis = context.scene.ncnc_pr_vision
         layout = self.layout
 
+        row = layout.row(align=True)
+        row.enabled = pr_vis.gcode
+        row.prop(pr_vis, "heatmap", expand=True)
+
+        toolpath = NCNC_PR_Vision.gcode_toolpath
+        if pr_vis.gcode and toolpath and toolpath.heatmap:
+            layout.label(text=toolpath.heat_legend(), icon="COLOR")
+
+
+class NCNC_PT_VisionStock(Panel):
+    bl_label = "Stock"
+    bl_region_type = "UI"
+    bl_space_type = "VIEW_3D"
+    bl_category = "nCNC"
+    bl_parent_id = "NCNC_PT_vision"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        pr_vis = context.scene.ncnc_pr_vision
+        layout = self.layout
+        layout.enabled = pr_vis.stock
+
+        row = layout.row(align=True)
+        row.prop(pr_vis, "stock_tool", expand=True)
+
+        col = layout.column(align=True)
+        col.prop(pr_vis, "stock_diameter")
+        if pr_vis.stock_tool == TOOL_V:
+            col.prop(pr_vis, "stock_angle")
+        col.prop(pr_vis, "stock_resolution")
+        col.prop(pr_vis, "stock_top")
+
+        layout.prop(pr_vis, "stock_follow")
+        layout.prop(pr_vis, "color_stock", text="")
+
+        sim = NCNC_PR_Vision.stock_sim
+        if sim and sim.heights is not None:
+            ny, nx = sim.heights.shape
+            layout.label(text=f"Grid {nx} x {ny}, cell {round(sim.cell, 3)} mm")
+
+    def draw_header(self, context):
+        context.scene.ncnc_pr_vision.prop_bool(self.layout, "stock")
+
 
 class NCNC_PT_VisionThemes(Panel):
     bl_idname = "NCNC_PT_visionthemes"
@@ -4949,6 +5180,7 @@ class NCNC_PT_VisionThemesGcode(Panel):
                          ("g2", "G2 - Arc (CW)"),
                          ("g3", "G3 - Arc (CCW)"),
                          ("gc", "Current Line"),
+                         ("gt", "Executed"),
                          ]:
             pr_vis.prop_theme(layout, pr, text)
 
@@ -4974,6 +5206,9 @@ class NCNC_PT_VisionThemesDash(Panel):
                          ("spindle", "Spindle"),
                          ("buffer", "Buffer"),
                          ("pos", "Position"),
+                         ("ovr", "Overrides"),
+                         ("line", "Line"),
+                         ("eta", "Remaining Time"),
                          ]:
             pr_vis.prop_theme(layout, pr, text)
 
@@ -5106,14 +5341,16 @@ class NCNC_PR_ToolpathConfigs(PropertyGroup):
         description="Floating point resolution of location analysis? (default=3)\n"
                     "[0-6] = Rough analysis - Detailed analysis"
     )
-    round_circ: IntProperty(
-        name="Round (Circle)",
-        default=1,
-        min=0,
-        max=6,
+
+    tolerance: FloatProperty(
+        name="Tolerance (mm)",
+        default=.01,
+        min=.0001,
+        max=1,
+        precision=4,
         update=reload_gcode,
-        description="Floating point resolution of circular analysis? (default=1)\n"
-                    "[0-6] = Rough analysis - Detailed analysis"
+        description="Greatest distance between the curve and its lines. Smaller -> More lines\n"
+                    "Flat parts get a few lines, tight curves get many (default=0.01)"
     )
 
     as_line: BoolProperty(
@@ -5286,15 +5523,11 @@ class NCNC_PT_ToolpathConfigsDetails(Panel):
         layout = self.layout
         col = layout.column(align=True)
         col.enabled = props.included  # Tip uygun değilse buraları pasif yapar
-        col.prop(props, "round_circ", slider=True)
         col.prop(props, "round_loca", slider=True)
 
         col = layout.column(align=True)
         col.enabled = props.included  # Tip uygun değilse buraları pasif yapar
-        if obj.type == "CURVE":
-            col.prop(obj.data, "resolution_u", slider=True, text="Resolution Obj General")
-            if obj.data.splines.active:
-                col.prop(obj.data.splines.active, "resolution_u", slider=True, text="Resolution Spline in Obj")
+        col.prop(props, "tolerance")
 
 
 ##################################
@@ -5560,8 +5793,6 @@ classes = [
     NCNC_OT_TextsOpen,
     NCNC_OT_TextsSave,
 
-    NCNC_PR_Lines,
-    NCNC_PR_TextLine,
     NCNC_PR_Text,
     NCNC_OT_Text,
 
@@ -5603,6 +5834,7 @@ classes = [
     NCNC_PR_Vision,
     NCNC_OT_Vision,
     NCNC_PT_Vision,
+    NCNC_PT_VisionStock,
     NCNC_PT_VisionThemes,
     NCNC_PT_VisionThemesGcode,
     NCNC_PT_VisionThemesDash,
@@ -5625,6 +5857,9 @@ def register():
 
 
 def unregister():
+    if bpy.app.timers.is_registered(redraw_timer):
+        bpy.app.timers.unregister(redraw_timer)
+
     for i in classes[::-1]:
         bpy.utils.unregister_class(i)
 
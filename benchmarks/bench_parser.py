@@ -0,0 +1,133 @@
+# -*- coding:utf-8 -*-
+"""G-code reader benchmark. Tokenizer (current) vs regex cascade (before).
+
+Runs without Blender:
+    python benchmarks/bench_parser.py
+    python benchmarks/bench_parser.py --lines 500000
+    python benchmarks/bench_parser.py --file my_program.nc
+"""
+import argparse
+import math
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nProgram import nProgram, FLAG_MOVE, FLAG_ERROR, INCH  # noqa: E402
+
+
+class LegacyProgram(nProgram):
+    """nProgram with the per-line regex cascade of the old NCNC_PR_TextLine.load"""
+
+    def parse(self, i, p, value):
+        ismove_xyz = False
+        ismove_ijk = False
+        ismove_r = False
+
+        value = re.sub(r'\([^()]*\)', "", value).upper()
+
+        for rex, arr in ((r'G *(9[01])(?:\D|$)', self.mode_distance),
+                         (r'G *(1[7-9])(?:\D|$)', self.mode_plane),
+                         (r'G *(2[01])(?:\D|$)', self.mode_units),
+                         (r'G *(0?[0-3])(?:\D|$)', self.mode_move),
+                         ):
+            fn = re.findall(rex, value)
+            arr[i] = int(fn[0]) if len(fn) == 1 else arr[p]
+
+        unit = 1 if self.mode_units[i] == 21 else INCH
+        self.xyz[i] = self.xyz[p]
+        self.ijk[i] = 0
+        self.r[i] = 0
+        self.pause[i] = 0
+        self.length[i] = 0
+        self.flags[i] = 0
+
+        for j, v in enumerate("XYZ"):
+            ps = re.findall(f'{v} *([+-]?\\d*\\.?\\d*)', value)
+            if len(ps) == 1 and re.sub("[+-.]", "", ps[0]).isdigit():
+                ismove_xyz = True
+                self.xyz[i, j] = float(ps[0]) * unit + (self.xyz[i, j] if self.mode_distance[i] == 91 else 0)
+
+        for j, v in enumerate("IJK"):
+            ps = re.findall(f'{v} *([+-]?\\d*\\.?\\d*)', value)
+            if len(ps) == 1 and re.sub("[+-.]", "", ps[0]).isdigit():
+                ismove_ijk = True
+                self.ijk[i, j] = float(ps[0]) * unit
+
+        ps = re.findall(r'F *([+]?\d*\.?\d*)', value)
+        if len(ps) == 1 and re.sub("[+.]", "", ps[0]).isdigit():
+            self.f[i] = float(ps[0])
+        else:
+            self.f[i] = self.f[p]
+
+        ps = re.findall(r'R *([+-]?\d*\.?\d*)', value)
+        if len(ps) == 1 and re.sub("[+-.]", "", ps[0]).isdigit():
+            ismove_r = True
+            self.r[i] = float(ps[0]) * unit
+            if ismove_ijk:
+                self.flags[i] |= FLAG_ERROR
+
+        ps = re.findall(r'G4 *P([+]?\d*\.?\d*)', value)
+        if len(ps) == 1 and re.sub("[+.]", "", ps[0]).isdigit():
+            self.pause[i] = float(ps[0])
+
+        if ismove_xyz and (self.mode_move[i] in (0, 1) or ismove_ijk or ismove_r):
+            self.flags[i] |= FLAG_MOVE
+
+
+def reference_program(count):
+    """Deterministic pocketing-like program. Lines, arcs, comments and plunges"""
+    lines = ["(Reference program)", "G21 G90 G17", "M3 S1200", "G0 Z5"]
+    n = 0
+    while len(lines) < count:
+        r = 5 + n % 40
+        lines.append(f"(Pass {n})")
+        lines.append(f"G0 X{r:.3f} Y0.000")
+        lines.append(f"G1 Z{-0.5 - n % 3 * 0.5:.3f} F100")
+        lines.append(f"G2 X0.000 Y{-r:.3f} I{-r:.3f} J0.000 F600")
+        lines.append(f"G2 X{-r:.3f} Y0.000 I0.000 J{r:.3f}")
+        lines.append(f"G3 X0.000 Y{r:.3f} R{r:.3f}")
+        for k in range(12):
+            a = k / 12 * math.tau
+            lines.append(f"G1 X{r * math.cos(a):.3f} Y{r * math.sin(a):.3f}")
+        lines.append("G0 Z5")
+        n += 1
+    return lines[:count]
+
+
+def bench(cls, lines, parse_only=False):
+    program = cls(capacity=len(lines) + 1)
+    t = time.perf_counter()
+    if parse_only:
+        parse = program.parse
+        for i, code in enumerate(lines, start=1):
+            parse(i, i - 1, code)
+    else:
+        program.extend(lines)
+    return len(lines) / (time.perf_counter() - t)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=200000, help="Line count of the reference program")
+    parser.add_argument("--file", help="Use a G-code file instead of the reference program")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file) as f:
+            lines = f.read().splitlines()
+    else:
+        lines = reference_program(args.lines)
+
+    print(f"{len(lines)} lines")
+    print(f"{'':20}{'before':>14}{'after':>14}{'speedup':>10}")
+    for title, parse_only in (("parse", True), ("parse + geometry", False)):
+        before = bench(LegacyProgram, lines, parse_only)
+        after = bench(nProgram, lines, parse_only)
+        print(f"{title:20}{before:>10.0f} l/s{after:>10.0f} l/s{after / before:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
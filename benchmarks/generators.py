@@ -0,0 +1,126 @@
+# -*- coding:utf-8 -*-
+"""Synthetic G-code programs for the benchmarks. Deterministic -> Same count, same program.
+
+Every generator takes the line count and returns a list of lines.
+"""
+import math
+import os
+import random
+import sys
+
+# The benchmarks are in this folder -> Importable from any working directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_parser import reference_program  # noqa: E402
+
+
+def header(title):
+    return [f"({title})", "G21 G90 G17", "M3 S12000", "G0 Z5"]
+
+
+def linear(count):
+    """Only rapid and linear moves. Zigzag facing"""
+    lines = header("Linear")
+    rnd = random.Random(1)
+    y = 0
+    while len(lines) < count:
+        lines.append(f"G0 X0.000 Y{y:.3f}")
+        lines.append(f"G1 Z{-rnd.uniform(0.1, 2):.3f} F300")
+        for k in range(1, 20):
+            lines.append(f"G1 X{k * 5:.3f} Y{y + rnd.uniform(-0.05, 0.05):.3f} F1200")
+        lines.append("G0 Z5")
+        y += 0.5
+    return lines[:count]
+
+
+def arcs_ijk(count):
+    """Dense G2/G3 arcs with IJK centers. Small radii, like engraving"""
+    lines = header("IJK Arcs")
+    rnd = random.Random(2)
+    x = y = 0.0
+    lines.append("G1 Z-0.2 F200")
+    while len(lines) < count:
+        r = rnd.uniform(0.2, 20)
+        a = rnd.uniform(0, math.tau)
+        sweep = rnd.uniform(0.2, math.tau - 0.2)
+        cw = rnd.random() < 0.5
+        cx, cy = x - r * math.cos(a), y - r * math.sin(a)
+        b = a - sweep if cw else a + sweep
+        x, y = cx + r * math.cos(b), cy + r * math.sin(b)
+        # I, J -> From the start point to the center
+        lines.append(f"G{2 if cw else 3} X{x:.4f} Y{y:.4f} I{-r * math.cos(a):.4f} J{-r * math.sin(a):.4f} F800")
+    return lines[:count]
+
+
+def arcs_r(count):
+    """G2/G3 arcs with R. Both short (+R) and long (-R) ways"""
+    lines = header("R Arcs")
+    rnd = random.Random(3)
+    x = y = 0.0
+    lines.append("G1 Z-0.5 F200")
+    while len(lines) < count:
+        r = rnd.uniform(1, 30)
+        chord = rnd.uniform(0.1, 2 * r * 0.99)
+        a = rnd.uniform(0, math.tau)
+        x, y = x + chord * math.cos(a), y + chord * math.sin(a)
+        sign = "-" if rnd.random() < 0.3 else ""
+        lines.append(f"G{rnd.choice((2, 3))} X{x:.4f} Y{y:.4f} R{sign}{r:.4f} F900")
+    return lines[:count]
+
+
+def incremental(count):
+    """G91 relative moves, with some G90 blocks between them"""
+    lines = header("Incremental")
+    rnd = random.Random(4)
+    while len(lines) < count:
+        lines.append("G91")
+        for k in range(30):
+            lines.append(f"G1 X{rnd.uniform(-2, 2):.3f} Y{rnd.uniform(-2, 2):.3f} Z{rnd.uniform(-0.1, 0.1):.3f} F1000")
+        lines.append("G2 X2.000 Y0.000 I1.000 J0.000")
+        lines.append("G90")
+        lines.append("G0 X0 Y0 Z5")
+    return lines[:count]
+
+
+def inch(count):
+    """G20 program. Inch units for moves, arcs and feeds"""
+    lines = ["(Inch)", "G20 G90 G17", "M3 S12000", "G0 Z0.2"]
+    n = 0
+    while len(lines) < count:
+        r = 0.2 + n % 20 * 0.05
+        lines.append(f"G0 X{r:.4f} Y0.0000")
+        lines.append("G1 Z-0.02 F4")
+        lines.append(f"G3 X{-r:.4f} Y0.0000 I{-r:.4f} J0.0000 F30")
+        lines.append(f"G3 X{r:.4f} Y0.0000 R{r:.4f}")
+        for k in range(8):
+            lines.append(f"G1 X{r * math.cos(k / 8 * math.tau):.4f} Y{r * math.sin(k / 8 * math.tau):.4f}")
+        lines.append("G0 Z0.2")
+        n += 1
+    return lines[:count]
+
+
+def comments(count):
+    """Mostly comments and non-motion lines, like CAM output with heavy annotation"""
+    lines = header("Comments")
+    n = 0
+    while len(lines) < count:
+        lines.append(f"(Operation {n} - Contour, tool T{n % 6 + 1}, stepdown 0.5mm)")
+        lines.append(f"; Estimated {n * 3} seconds")
+        lines.append(f"T{n % 6 + 1} M6 (Tool change)")
+        lines.append(f"G1 X{n % 50:.3f} Y{n % 37:.3f} F600 (Move {n})")
+        lines.append("")
+        lines.append(f"G4 P0.{n % 9 + 1} (Dwell)")
+        n += 1
+    return lines[:count]
+
+
+# Name -> Generator
+MIXES = {
+    "mixed": reference_program,
+    "linear": linear,
+    "ijk": arcs_ijk,
+    "r": arcs_r,
+    "incremental": incremental,
+    "inch": inch,
+    "comments": comments,
+}
@@ -0,0 +1,170 @@
+# -*- coding:utf-8 -*-
+"""G-code reader and estimator benchmark suite. Synthetic programs of each mix are read headlessly.
+
+Reports per mix:
+    parse       Lines/s of the reading only (no geometry)
+    read        Lines/s of nProgram.extend (reading + geometry + totals)
+    peak        Peak memory of the reading (MB, tracemalloc)
+    arcs        Arc count, their vertex count and tessellation time (nGeometry)
+    estimate    Time of the estimator (nProgram.times) and its results
+
+Runs without Blender:
+    python benchmarks/suite.py
+    python benchmarks/suite.py --lines 500000 --mix ijk r --output results.json
+    python benchmarks/suite.py --compare results.json
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np  # noqa: E402
+
+from nProgram import nProgram, FLAG_MOVE, FLAG_ERROR, VERSION  # noqa: E402
+from nGeometry import arc_steps, arc_lines  # noqa: E402
+from generators import MIXES  # noqa: E402
+
+
+def best(fn, repeat):
+    """Shortest time of the runs (seconds) and the result of the last run"""
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t)
+    return min(times), result
+
+
+def parse_only(lines):
+    program = nProgram(capacity=len(lines) + 1)
+    parse = program.parse
+    for i, code in enumerate(lines, start=1):
+        parse(i, i - 1, code)
+    return program
+
+
+def read(lines, tolerance):
+    program = nProgram(capacity=len(lines) + 1)
+    program.tolerance = tolerance
+    program.extend(lines)
+    return program
+
+
+def peak_memory(lines, tolerance):
+    """Peak memory of the reading (Bytes)"""
+    tracemalloc.start()
+    try:
+        read(lines, tolerance)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def arc_cost(program, repeat):
+    """Tessellation of all arcs of the program at once -> (arc count, vertex count, seconds)"""
+    # calc_arc writes the lengths and the flags of the rows -> On a copy, the results of the program stay
+    program = copy.deepcopy(program)
+    rows = np.flatnonzero((program.flags[:program.size] == FLAG_MOVE) & (program.mode_move[:program.size] >= 2))
+    arcs = [program.calc_arc(i, i - 1) for i in rows]
+    arcs = np.array([i for i in arcs if i]) if len(rows) else np.zeros((0, 6))
+    if not len(arcs):
+        return 0, 0, 0.0
+
+    rows = arcs[:, 0].astype(np.int64)
+    prev = program.xyz[rows - 1]
+
+    def run():
+        steps = arc_steps(arcs[:, 3], arcs[:, 5], program.tolerance)
+        return arc_lines(arcs[:, 1:3], arcs[:, 3], arcs[:, 4], arcs[:, 5],
+                         prev[:, 2], program.xyz[rows, 2] - prev[:, 2], steps, program.xyz[rows])
+
+    seconds, lines = best(run, repeat)
+    return len(arcs), len(lines), seconds
+
+
+def bench(mix, count, tolerance, repeat):
+    lines = MIXES[mix](count)
+    count = len(lines)
+
+    parse_time, _ = best(lambda: parse_only(lines), repeat)
+    read_time, program = best(lambda: read(lines, tolerance), repeat)
+    estimate_time, times = best(lambda: program.times(), repeat)
+    arcs, arc_verts, arc_time = arc_cost(program, repeat)
+
+    return {
+        "mix": mix,
+        "lines": count,
+        "parse_lines_per_second": count / parse_time,
+        "read_lines_per_second": count / read_time,
+        "read_seconds": read_time,
+        "peak_memory_mb": peak_memory(lines, tolerance) / 1024 / 1024,
+        "verts": int(program.size_verts),
+        "arcs": arcs,
+        "arc_verts": arc_verts,
+        "arc_seconds": arc_time,
+        "estimate_seconds": estimate_time,
+        "distance": float(program.distance),
+        "estimated_time": float(times.sum()),
+        "errors": int(((program.flags[:program.size] & FLAG_ERROR) > 0).sum()),
+    }
+
+
+def environment():
+    return {
+        "parser_version": VERSION,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def report(results, previous=None):
+    previous = {i["mix"]: i for i in previous["results"]} if previous else {}
+
+    print(f"{'mix':12}{'lines':>9}{'parse l/s':>12}{'read l/s':>12}{'peak MB':>9}"
+          f"{'arcs':>8}{'arc ms':>9}{'est ms':>8}{'change':>9}")
+    for r in results:
+        change = ""
+        old = previous.get(r["mix"])
+        if old:
+            change = f"{r['read_lines_per_second'] / old['read_lines_per_second'] - 1:+.1%}"
+        print(f"{r['mix']:12}{r['lines']:>9}{r['parse_lines_per_second']:>12.0f}{r['read_lines_per_second']:>12.0f}"
+              f"{r['peak_memory_mb']:>9.1f}{r['arcs']:>8}{r['arc_seconds'] * 1000:>9.1f}"
+              f"{r['estimate_seconds'] * 1000:>8.2f}{change:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=100000, help="Line count of each program")
+    parser.add_argument("--mix", nargs="+", choices=list(MIXES), default=list(MIXES), help="Program mixes to run")
+    parser.add_argument("--tolerance", type=float, default=nProgram.tolerance, help="Arc chord tolerance (mm)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each measurement. The best is reported")
+    parser.add_argument("--output", help="Save the results as JSON")
+    parser.add_argument("--compare", help="JSON results of a previous run. Read speed changes are shown")
+    args = parser.parse_args()
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+
+    results = [bench(mix, args.lines, args.tolerance, args.repeat) for mix in args.mix]
+    report(results, previous)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(), "settings": vars(args), "results": results}, f, indent=2)
+        print(f"Saved -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# -*- coding:utf-8 -*-
+import hashlib
+import os
+
+import numpy as np
+
+# On-disk cache of the parsed programs.
+#   Files are named by the hash of the code (and the reading settings) -> Same code, same file.
+#   Every file is one nProgram in .npz format. Code lines aren't stored, they are in the code itself.
+#   Least recently used files are removed when the folder is bigger than the limit.
+
+
+def key(code, *settings) -> str:
+    """Hash of the code and the settings which change the parsing result (parser version, tolerance...)
+    :param code: str, bytes or a buffer (mmap)
+    """
+    h = hashlib.sha1(":".join(str(i) for i in settings).encode())
+    h.update(b"\n")
+    h.update(code.encode() if isinstance(code, str) else code)
+    return h.hexdigest()
+
+
+class nCache:
+    extension = ".npz"
+
+    def __init__(self, folder, limit=512 * 1024 * 1024):
+        """
+        :param folder: Cache folder. Created if it doesn't exist
+        :param limit: Greatest size of the folder (Bytes)
+        """
+        self.folder = folder
+        self.limit = limit
+
+    def path(self, key) -> str:
+        return os.path.join(self.folder, key + self.extension)
+
+    def get(self, key) -> dict:
+        """Arrays of the key -> {name: array}. None if not cached"""
+        path = self.path(key)
+        try:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Truncated or corrupt file (BadZipFile, zlib.error ...) -> Removed. The code is parsed again
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        # Used now -> The last to be removed
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return arrays
+
+    def put(self, key, arrays):
+        """Saves the arrays to the key. Then the oldest files are removed if the folder is too big"""
+        os.makedirs(self.folder, exist_ok=True)
+
+        # Written to a temporary file first. A half written file is never read
+        temp = os.path.join(self.folder, f"{key}.{os.getpid()}.tmp{self.extension}")
+        np.savez(temp, **arrays)
+        os.replace(temp, self.path(key))
+
+        self.evict()
+
+    def evict(self):
+        """Removes the least recently used files until the folder fits the limit"""
+        try:
+            names = [i for i in os.listdir(self.folder) if i.endswith(self.extension) and ".tmp" not in i]
+        except OSError:
+            return
+
+        files = []
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(self.folder, name))
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(i[1] for i in files)
+        for mtime, size, name in sorted(files):
+            if total <= self.limit:
+                break
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        limit = self.limit
+        self.limit = 0
+        self.evict()
+        self.limit = limit
@@ -0,0 +1,182 @@
+# -*- coding:utf-8 -*-
+import numpy as np
+
+try:
+    from .nGeometry import bezier_flatten, bezier_biarcs, merge_arcs, PLANE_AXES
+except ImportError:
+    # Worker processes import this file as a top-level module -> nProgram.nWorker
+    from nGeometry import bezier_flatten, bezier_biarcs, merge_arcs, PLANE_AXES
+
+# Headless curve converter. Doesn't need bpy / mathutils. Only numpy.
+#   Objects are read to plain jobs on the main thread (NCNC_OT_Convert.curve_jobs). A job is some splines
+#   of one object with the configs of the object:
+#       {"shape": n, "block": first block - 1, "header": bool, "conf": {SETTINGS}, "splines": [spline, ...]}
+#       spline -> {"type", "cyclic", "co", "handle_left", "handle_right"} World coordinates, (n, 3) arrays
+#
+#   G-code of the jobs is made here or in the worker processes -> job_gcode. Jobs don't depend on each other,
+#   except the safe Z of the program. It is found by the first shape -> SAFE_Z lines are filled when the jobs
+#   are joined in order -> join_gcode
+
+# Configs of the object which are used in converting (NCNC_PR_ToolpathConfigs)
+SETTINGS = ("plane", "spindle", "safe_z", "step", "depth", "feed", "plunge", "round_loca", "tolerance", "as_line")
+
+# Line of the program's safe Z -> (SAFE_Z, digits)
+SAFE_Z = "SAFE_Z"
+
+
+def block_header(name, expand="0", enable="1") -> list:
+    return [f"(Block-name: {name})", f"(Block-expand: {expand})", f"(Block-enable: {enable})"]
+
+
+def z_steps(step, depth, round_loca) -> list:
+    """Steps in the Z axis -> 0.5, 1.0, 1.5, 2.0 ..."""
+    steps = [i * step for i in range(1, int(depth / step + 1))]
+
+    # Calculate last Z step
+    if depth % step > 0.01:
+        steps.append(round((steps[-1] if steps else 0) + depth % step, round_loca))
+    return steps
+
+
+def job_gcode(job):
+    """G-code of the job -> (lines, first point of the job or None). Runs in the worker processes too"""
+    conf = job["conf"]
+    shape = job["shape"]
+    lines = []
+    first = None
+
+    if job["header"]:
+        # Create initial configs of the shape -> Block x.0
+        lines.append("")
+        lines.extend(block_header(f"Shape{shape}.0", expand="1"))
+        lines.append(f"{conf['plane']} ( Plane Axis )")
+        lines.append(f"S{conf['spindle']} ( Spindle )")
+        lines.append(f"( Safe Z : {conf['safe_z']} )")
+        lines.append(f"( Step Z : {conf['step']} )")
+        lines.append(f"( Total depth : {round(conf['depth'], 3)} )")
+        lines.append(f"( Feed Rate -mm/min- : {conf['feed']} )")
+        lines.append(f"( Plunge Rate -mm/min- : {conf['plunge']} )")
+
+    steps = z_steps(conf["step"], conf["depth"], conf["round_loca"])
+    for block, spline in enumerate(job["splines"], start=job["block"] + 1):
+        lines.append("")
+        lines.extend(block_header(f"Shape{shape}.{block}"))
+
+        for j, k in enumerate(steps):
+            z = np.array((0, 0, k))
+
+            # Poly tipindeki Spline'ı convert et
+            if spline["type"] == 'POLY':
+                poly_gcode(lines, spline, conf, z)
+
+            # Bezier tipindeki Spline'ı convert et
+            elif spline["type"] == 'BEZIER':
+                point = bezier_gcode(lines, spline, conf, z, reverse=j % 2 == 1)
+                first = first or point
+
+    return lines, first
+
+
+def join_gcode(kodlar, results):
+    """Adds the G-code of the jobs to the lines in order. Safe Z lines are filled by the first point.
+    :param results: [job_gcode result, ...] In the order of the objects
+    :return: First point of the program (x, y, z) or None
+    """
+    first = next((point for _, point in results if point), None)
+    z = first[2] if first else 0
+    for lines, _ in results:
+        kodlar.extend(f"G0 Z{round(z, i[1])}" if isinstance(i, tuple) else i for i in lines)
+    return first
+
+
+def bezier_gcode(lines, spline, conf, z, reverse=False):
+    """Arcs or lines of the Bezier spline at the Z step -> Adds to the lines.
+    pref.as_line değerine göre g2 ve g3 kodlarını kullan veya kullanma
+    :return: Safe point of the spline (x, y, z) or None if it has no segment
+    """
+    r = conf["round_loca"]
+    z_safe = conf["safe_z"]
+    plane = conf["plane"]
+    tolerance = conf["tolerance"]
+
+    # Whole spline at once -> Segment j goes from point j to the next point
+    co, handle_left, handle_right = (spline[i] - z for i in ("co", "handle_left", "handle_right"))
+
+    nokta_sayisi = len(co) - (0 if spline["cyclic"] else 1)
+    if nokta_sayisi < 1:
+        return None
+    lp = np.arange(1, nokta_sayisi + 1) % len(co)
+    m1, hr, hl, m2 = co[:nokta_sayisi], handle_right[:nokta_sayisi], handle_left[lp], co[lp]
+
+    # Reversed -> The segments backwards, from the last one
+    if reverse:
+        m1, hr, hl, m2 = m2[::-1], hl[::-1], hr[::-1], m1[::-1]
+
+    # Lines within the chord tolerance, or the fewest arcs (Biarcs) within the same tolerance
+    if conf["as_line"]:
+        nokta_list, _ = bezier_flatten(m1, hr, hl, m2, tolerance)
+        merkez = np.full(nokta_list.shape, np.nan)
+        yon = np.zeros(len(nokta_list), dtype=bool)
+    else:
+        nokta_list, merkez, yon, _ = bezier_biarcs(m1, hr, hl, m2, tolerance, plane)
+        keep, merkez = merge_arcs(m1[0], nokta_list, merkez, yon, tolerance, plane)
+        nokta_list, merkez, yon = nokta_list[keep], merkez[keep], yon[keep]
+
+    # I, J, K -> From the start of the arc, only of the plane axes
+    ijk = merkez - np.vstack((m1[:1], nokta_list[:-1]))
+    ijk[:, PLANE_AXES[plane][2]] = 0
+
+    # Lines or huge arcs -> G1
+    limit = 800
+    duz = ~np.isfinite(ijk).all(axis=1) | (np.abs(ijk) > limit).any(axis=1)
+    yon = np.where(yon, "G2", "G3")
+
+    # Find Max Z Point
+    max_z = max(nokta_list[:, 2].max(), m1[0, 2]) + conf["step"]
+
+    x1, y1, z1 = m1[0].tolist()
+
+    # First Z Position (Safe Z) -> Found by the first spline of the program
+    lines.append((SAFE_Z, r))
+
+    # First XY Pozition
+    lines.append(f"G0 X{round(x1, r)} Y{round(y1, r)}")
+
+    # Rapid Z, Nearest point
+    lines.append(f"G0 Z{round(max_z + 1, r)}")
+
+    # First Plunge in Z
+    lines.append(f"G1 Z{round(z1, r)} F{conf['plunge']}")
+
+    for i, (p, (I, J, K), b, line) in enumerate(zip(nokta_list.tolist(), ijk.tolist(), yon.tolist(), duz.tolist())):
+        if line:
+            q = "G1 X{1:.{0}f} Y{2:.{0}f} Z{3:.{0}f}".format(r, *p)
+        else:
+            q = "{1} X{2:.{0}f} Y{3:.{0}f} Z{4:.{0}f} I{5:.{0}f} J{6:.{0}f} K{7:.{0}f}".format(r, b, *p, I, J, K)
+        if i == 0: q += " F{}".format(conf["feed"])
+        lines.append(q)
+
+    return x1, y1, float(max(max_z + z_safe, z_safe))
+
+
+def poly_gcode(lines, spline, conf, z):
+    """Lines of the poly spline at the Z step -> Adds to the lines"""
+    r = conf["round_loca"]
+    z_safe = conf["safe_z"]
+
+    points = spline["co"] - z
+    for i, loc in enumerate(points.tolist()):
+        if i == 0:
+            lines.append("G0 Z{1:.{0}f}".format(r, z_safe))
+            lines.append("G0 X{1:.{0}f} Y{2:.{0}f}".format(r, *loc[:2]))
+            # lines.append("G0 Z1")
+            lines.append("G1 Z{1:.{0}f} F{2}".format(r, loc[2], conf["plunge"]))
+        else:
+            q = "G1 X{1:.{0}f} Y{2:.{0}f} Z{3:.{0}f}".format(r, *loc)
+            if i == 1: q += " F{}".format(conf["feed"])
+            lines.append(q)
+
+    if spline["cyclic"] and len(points):
+        lines.append("G1 X{1:.{0}f} Y{2:.{0}f} Z{3:.{0}f}".format(r, *points[0].tolist()))
+    lines.append("G0 Z{1:.{0}f}".format(r, z_safe))
+
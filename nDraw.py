@@ -0,0 +1,549 @@
+# -*- coding:utf-8 -*-
+import time
+
+import bgl
+import blf
+import gpu
+import numpy as np
+from bpy_extras.view3d_utils import location_3d_to_region_2d
+from gpu_extras.batch import batch_for_shader
+from mathutils import Vector
+
+# Toolpath drawing in the viewport.
+#   Vertices of the program are uploaded to the GPU once, in chunks. Draw callbacks only bind and draw.
+#   When the program changes, only the chunks from the first changed vertex are uploaded again
+#   -> Editing a line re-uploads from that line, loading only uploads the new lines.
+#
+#   While loading, every redraw appends a small chunk. Small chunks at the end are merged with the new one when
+#   they aren't bigger than it (like the carries of a binary counter). So there are only a few chunks, and each
+#   vertex is uploaded a few (log n) times, not once per redraw.
+#
+#   Level of detail -> Big programs are simplified at a few tolerances (Douglas-Peucker + overlapping passes
+#   merged) when they stop changing. The coarsest level whose tolerance is less than a pixel is drawn. Full detail
+#   is drawn only when zoomed in.
+#
+#   One batch, one shader, one draw call per chunk. Every vertex has its kind (move mode, row end) and its row.
+#   Colors, widths and visibility of the kinds are uniforms -> Changing the theme never uploads the toolpath.
+#   Lines are drawn as quads by the geometry shader (glLineWidth can't change in a draw call).
+#   Points of the row ends are quads at the end of their lines.
+#
+#   Execution trail -> Rows before the executed row (acknowledged by the machine) are drawn in the done style.
+#   It is only a uniform, so the trail follows the machine at no upload cost.
+#
+#   Spindle cursor -> Uploaded once, moved by the model matrix. Nothing is built while the machine moves.
+#
+#   Stock surface -> Heightmap of the stock simulation (nStock) as a shaded grid. Uploaded at a limited rate.
+#
+#   Heatmap -> Every vertex also has the heat value of its row (feed or time). Lines of the feed moves are colored
+#   by it. The range and the scale (linear / log) are uniforms -> Only changing the source uploads again.
+#
+#   Dashboard -> Texts are formatted when their values change, the layout is built when the theme changes.
+
+# Styles -> Lookup index of the uniforms
+STYLE_G0, STYLE_G1, STYLE_G2, STYLE_G3, STYLE_POINT, STYLE_SELECTED, STYLE_DONE = range(7)
+STYLES = 7
+
+# Heat scales -> heat_mode uniform
+HEAT_NONE, HEAT_LINEAR, HEAT_LOG = range(3)
+
+# Heatmap -> (Row values of nProgram.heat_values, scale)
+HEATMAPS = {"FEED": ("FEED", HEAT_LINEAR),
+            "TIME": ("TIME", HEAT_LINEAR),
+            "SHARE": ("TIME", HEAT_LOG),
+            }
+
+VERTEX_SHADER = '''
+uniform mat4 ModelViewProjectionMatrix;
+
+in vec3 pos;
+in float kind;
+in float row;
+in float heat;
+
+out float v_kind;
+out float v_row;
+out float v_heat;
+
+void main()
+{
+    gl_Position = ModelViewProjectionMatrix * vec4(pos, 1.0);
+    v_kind = kind;
+    v_row = row;
+    v_heat = heat;
+}
+'''
+
+GEOMETRY_SHADER = '''
+layout(lines) in;
+layout(triangle_strip, max_vertices = 8) out;
+
+uniform vec2 viewport;
+uniform vec4 colors[7];
+uniform float widths[7];
+uniform vec2 selection;
+uniform float executed;
+uniform int heat_mode;
+uniform vec2 heat_range;
+
+in float v_kind[];
+in float v_row[];
+in float v_heat[];
+
+out vec4 f_color;
+
+// Blue -> Cyan -> Green -> Yellow -> Red
+vec3 ramp(float t)
+{
+    t = clamp(t, 0.0, 1.0);
+    return clamp(vec3(4.0 * t - 2.0, 2.0 - abs(4.0 * t - 2.0), 2.0 - 4.0 * t), 0.0, 1.0);
+}
+
+void emit(vec4 position, vec2 offset, vec4 color)
+{
+    gl_Position = position + vec4(offset * position.w, 0.0, 0.0);
+    f_color = color;
+    EmitVertex();
+}
+
+void main()
+{
+    vec4 a = gl_in[0].gl_Position;
+    vec4 b = gl_in[1].gl_Position;
+    if (a.w <= 0.0 || b.w <= 0.0) {
+        return;
+    }
+
+    int style = int(mod(v_kind[1], 4.0));
+    if (v_row[1] < executed && widths[6] > 0.0) {
+        style = 6;
+    }
+    if (v_row[1] >= selection.x && v_row[1] < selection.y && widths[5] > 0.0) {
+        style = 5;
+    }
+
+    // Heatmap -> Only the feed moves, not the selected or executed ones
+    vec4 color = colors[style];
+    if (heat_mode > 0 && style < 4 && v_heat[1] >= 0.0) {
+        float value = heat_mode == 2 ? log(max(v_heat[1], 1e-9)) / log(10.0) : v_heat[1];
+        color.rgb = ramp((value - heat_range.x) / max(heat_range.y - heat_range.x, 1e-9));
+    }
+
+    // Line -> Quad, width in pixels
+    vec2 direction = (b.xy / b.w - a.xy / a.w) * viewport;
+    float width = widths[style];
+    if (width > 0.0 && length(direction) > 0.0) {
+        vec2 normal = normalize(vec2(-direction.y, direction.x)) * width / viewport;
+        emit(a, normal, color);
+        emit(a, -normal, color);
+        emit(b, normal, color);
+        emit(b, -normal, color);
+        EndPrimitive();
+    }
+
+    // End point of the row -> Square
+    float size = widths[4];
+    if (v_kind[1] >= 4.0 && size > 0.0) {
+        vec2 half_size = vec2(size) / viewport;
+        emit(b, vec2(-half_size.x, -half_size.y), colors[4]);
+        emit(b, vec2(half_size.x, -half_size.y), colors[4]);
+        emit(b, vec2(-half_size.x, half_size.y), colors[4]);
+        emit(b, vec2(half_size.x, half_size.y), colors[4]);
+        EndPrimitive();
+    }
+}
+'''
+
+FRAGMENT_SHADER = '''
+in vec4 f_color;
+out vec4 FragColor;
+
+void main()
+{
+    FragColor = f_color;
+}
+'''
+
+
+def pixel_size(region, region_3d, location) -> float:
+    """Size of one pixel of the view at the location (Blender units). 0 if the location isn't in front of the view"""
+    right = Vector(region_3d.view_matrix[0][:3])
+    p0 = location_3d_to_region_2d(region, region_3d, location)
+    p1 = location_3d_to_region_2d(region, region_3d, location + right)
+    if p0 is None or p1 is None or p0 == p1:
+        return 0
+    return 1 / (p1 - p0).length
+
+
+class nToolpath:
+    # Greatest vertex count of a chunk. Must be even (Line pairs)
+    chunk_size = 1 << 18
+
+    def __init__(self):
+        self.shader = gpu.types.GPUShader(VERTEX_SHADER, FRAGMENT_SHADER, geocode=GEOMETRY_SHADER)
+        self.program = None
+
+        # Uniforms of the styles -> set_style
+        self.colors = np.ones((STYLES, 4), dtype=np.float32)
+        self.widths = np.ones(STYLES, dtype=np.float32)
+
+        # [(start, end, batch)] -> Vertices [start, end) of the program
+        self.chunks = []
+
+        # Heatmap -> HEATMAPS key. Row values of the program and the range of the colors
+        self.heatmap = None
+        self.heat = None
+        self.heat_range = (0, 1)
+
+        # [(tolerance, batch)] -> Simplified levels, from fine to coarse
+        self.levels = []
+        self.lod_steps = None
+        self.lod_revision = None
+        self.lod_time = 0
+        self.lod_built = False
+
+    def update(self, program) -> bool:
+        """Uploads the changed vertices of the program. Returns True if anything is uploaded"""
+        changed = program.take_changes()
+        if program is not self.program:
+            # Other text or a new program object -> All
+            self.program = program
+            changed = 0
+
+        if changed is None:
+            return False
+
+        if self.heatmap:
+            self.update_heat(program)
+
+        # Levels are built again when the program stops changing
+        self.levels = []
+
+        # Chunks before the changed vertex stay
+        while self.chunks and self.chunks[-1][1] > changed:
+            self.chunks.pop()
+
+        start = self.chunks[-1][1] if self.chunks else 0
+        while start < program.size_verts:
+            end = min(start + self.chunk_size, program.size_verts)
+
+            while self.chunks and self.chunks[-1][1] - self.chunks[-1][0] <= end - start and \
+                    end - self.chunks[-1][0] <= self.chunk_size:
+                start = self.chunks.pop()[0]
+
+            self.chunks.append((start, end, self.upload(program, start, end)))
+            start = end
+        return True
+
+    def upload(self, program, start, end):
+        return self.batch(*program.get_chunk(start, end))
+
+    def batch(self, verts, kinds, rows):
+        if self.heat is None:
+            heat = np.full(len(rows), -1, dtype=np.float32)
+        else:
+            heat = self.heat[rows.astype(np.int64)]
+        return batch_for_shader(self.shader, 'LINES', {"pos": verts, "kind": kinds, "row": rows, "heat": heat})
+
+    # ##########################
+    # ################## Heatmap
+    def set_heatmap(self, heatmap):
+        """Colors the feed moves by the heatmap (HEATMAPS key). None -> Theme colors"""
+        heatmap = heatmap if heatmap in HEATMAPS else None
+        if heatmap == self.heatmap:
+            return
+
+        # Only the values are uploaded again if the same source. But it is rare -> Everything again
+        self.heatmap = heatmap
+        self.heat = None
+        self.program = None
+        self.lod_revision = None
+
+    def update_heat(self, program):
+        """Row values of the heatmap and the range of its colors"""
+        source, scale = HEATMAPS[self.heatmap]
+        self.heat = program.heat_values(source)
+        values = self.heat[self.heat >= 0]
+        if not len(values):
+            self.heat_range = (0, 1)
+        elif scale == HEAT_LOG:
+            values = np.log10(values[values > 0]) if (values > 0).any() else np.zeros(1)
+            self.heat_range = (float(values.min()), float(values.max()))
+        elif source == "TIME":
+            # A few long rows would make all others blue
+            self.heat_range = (0, float(np.percentile(values, 95)))
+        else:
+            self.heat_range = (float(values.min()), float(values.max()))
+
+    def heat_legend(self) -> str:
+        """Values of the blue and red ends"""
+        if not self.heatmap or self.heat is None:
+            return ""
+        lo, hi = self.heat_range
+        if self.heatmap == "FEED":
+            return f"{lo:.0f} - {hi:.0f} mm/min"
+        if self.heatmap == "TIME":
+            return f"{lo:.2f} - {hi:.2f} s"
+        total = max(float(self.heat[self.heat > 0].sum()), 1e-9)
+        return f"{10 ** lo / total:.4%} - {10 ** hi / total:.2%}"
+
+    # ##########################
+    # ########### Level of detail
+    # Programs with fewer vertices are always drawn in full
+    lod_min_verts = 1 << 19
+
+    # Levels are built when the program hasn't changed for this long (seconds)
+    lod_delay = 1.0
+
+    # Building time in one call (seconds)
+    lod_budget = 0.03
+
+    def lod_tolerances(self, program) -> list:
+        """Tolerances of the levels, fine to coarse. About 1/250 .. 1/16000 of the program size.
+        Levels finer than a few arc tolerances wouldn't be simpler than the program itself"""
+        size = float(((program.maximum - program.minimum) ** 2).sum() ** .5)
+        tolerances = (size / (250 * 4 ** k) for k in (3, 2, 1, 0))
+        return [i for i in tolerances if i > program.tolerance * 4]
+
+    def build_lod(self, program) -> bool:
+        """Builds the levels a little at each call, when the program is stable. Returns True when they are ready"""
+        if program is not self.program:
+            return False
+
+        if program.revision != self.lod_revision:
+            self.lod_revision = program.revision
+            self.lod_time = time.time()
+            self.lod_steps = None
+            self.lod_built = False
+            return False
+
+        if self.lod_built or program.size_verts < self.lod_min_verts or time.time() - self.lod_time < self.lod_delay:
+            return False
+
+        if self.lod_steps is None:
+            self.lod_steps = program.lod_steps(self.lod_tolerances(program))
+
+        deadline = time.perf_counter() + self.lod_budget
+        try:
+            while time.perf_counter() < deadline:
+                next(self.lod_steps)
+        except StopIteration as e:
+            self.levels = [(tolerance, self.batch(verts, kinds, rows)) for tolerance, verts, kinds, rows in e.value]
+            self.lod_steps = None
+            self.lod_built = True
+            return True
+        return False
+
+    def set_style(self, style, color, width, show=True):
+        """Color and width (pixels) of the style. Hidden if not show"""
+        self.colors[style] = color
+        self.widths[style] = width if show else 0
+
+    def draw(self, viewport, selection=(0, 0), pixel=0, executed=0):
+        """
+        :param viewport: Size of the region (pixels)
+        :param selection: Rows [start, end) drawn in the selected style
+        :param pixel: Pixel size of the view -> pixel_size. The coarsest level smaller than it is drawn
+        :param executed: Rows before it are drawn in the done style (Execution trail)
+        """
+        shader = self.shader
+        shader.bind()
+        shader.uniform_float("viewport", viewport)
+        shader.uniform_float("selection", selection)
+        shader.uniform_float("executed", executed)
+        shader.uniform_int("heat_mode", HEATMAPS[self.heatmap][1] if self.heatmap else HEAT_NONE)
+        shader.uniform_float("heat_range", self.heat_range)
+        shader.uniform_vector_float(shader.uniform_from_name("colors"), self.colors, 4, STYLES)
+        shader.uniform_vector_float(shader.uniform_from_name("widths"), self.widths, 1, STYLES)
+
+        level = None
+        for tolerance, batch in self.levels:
+            if tolerance <= pixel:
+                level = batch
+
+        if level:
+            level.draw(shader)
+            return
+
+        for start, end, batch in self.chunks:
+            batch.draw(shader)
+
+
+class nCursor:
+    """Spindle cursor. Its lines are uploaded once, it is moved by the model matrix.
+    The position is interpolated between the reported positions -> Smooth at the display refresh rate"""
+
+    # Interpolation time limits (seconds). It is about the interval of the reports
+    min_interval = .02
+    max_interval = .5
+
+    def __init__(self, lines, location=(0, 0, 0)):
+        """
+        :param lines: Line pairs of the cursor around the origin (Tool tip)
+        :param location: First position
+        """
+        self.shader = gpu.shader.from_builtin('3D_UNIFORM_COLOR')
+        self.batch = batch_for_shader(self.shader, 'LINES', {"pos": lines})
+
+        # Interpolated from start to target in interval
+        self.start = Vector(location)
+        self.target = Vector(location)
+        self.position = Vector(location)
+        self.time = 0
+        self.interval = self.min_interval
+
+    def move(self, location, now=None) -> bool:
+        """Reported position. Returns True if the cursor is moving"""
+        now = time.perf_counter() if now is None else now
+        if self.target[0] != location[0] or self.target[1] != location[1] or self.target[2] != location[2]:
+            self.interval = min(max(now - self.time, self.min_interval), self.max_interval)
+            self.time = now
+            self.start[:] = self.position
+            self.target[:] = location
+
+        t = min((now - self.time) / self.interval, 1.0)
+        for i in range(3):
+            self.position[i] = self.start[i] + (self.target[i] - self.start[i]) * t
+        return t < 1.0
+
+    def draw(self, color):
+        shader = self.shader
+        shader.bind()
+        shader.uniform_float("color", color)
+        with gpu.matrix.push_pop():
+            gpu.matrix.translate(self.position)
+            self.batch.draw(shader)
+
+
+SURFACE_VERTEX_SHADER = '''
+uniform mat4 ModelViewProjectionMatrix;
+uniform vec4 color;
+
+in vec3 pos;
+in float shade;
+
+out vec4 f_color;
+
+void main()
+{
+    gl_Position = ModelViewProjectionMatrix * vec4(pos, 1.0);
+    f_color = vec4(color.rgb * shade, color.a);
+}
+'''
+
+
+class nSurface:
+    """Heightmap drawn as a shaded grid mesh. Uploaded again when the heights change, at most once per interval"""
+
+    # Seconds between two uploads
+    interval = .5
+
+    # Direction of the light for the shades
+    light = np.array((.3, .4, 1)) / np.linalg.norm((.3, .4, 1))
+
+    def __init__(self):
+        self.shader = gpu.types.GPUShader(SURFACE_VERTEX_SHADER, FRAGMENT_SHADER)
+        self.batch = None
+        self.dirty = False
+        self.time = 0
+
+        # Triangles of the last grid shape
+        self.shape = None
+        self.indices = None
+
+    def triangles(self, shape):
+        """Two triangles per cell of the grid"""
+        if shape != self.shape:
+            ny, nx = shape
+            index = np.arange(ny * nx, dtype=np.int32).reshape(ny, nx)
+            a, b, c, d = index[:-1, :-1], index[:-1, 1:], index[1:, :-1], index[1:, 1:]
+            self.indices = np.stack((a, b, d, a, d, c), axis=-1).reshape(-1, 3)
+            self.shape = shape
+        return self.indices
+
+    def upload(self, heights, x, y):
+        """Batch of the heightmap. heights (ny, nx), x (nx), y (ny) -> Positions of the cells"""
+        ny, nx = heights.shape
+        pos = np.empty((ny, nx, 3), dtype=np.float32)
+        pos[..., 0] = x[None, :]
+        pos[..., 1] = y[:, None]
+        pos[..., 2] = heights
+
+        # Normals by the slopes -> Lambert shade, never darker than the ambient
+        gy, gx = np.gradient(heights, y[1] - y[0] if ny > 1 else 1, x[1] - x[0] if nx > 1 else 1)
+        shade = (self.light[2] - gx * self.light[0] - gy * self.light[1]) / np.sqrt(gx * gx + gy * gy + 1)
+        shade = (.35 + .65 * np.clip(shade, 0, 1)).astype(np.float32)
+
+        self.batch = batch_for_shader(self.shader, 'TRIS',
+                                      {"pos": pos.reshape(-1, 3), "shade": shade.ravel()},
+                                      indices=self.triangles((ny, nx)))
+
+    def update(self, stock, force=False) -> bool:
+        """Uploads the heightmap of the stock (nStock) if it changed and the interval passed.
+        Returns True if uploaded"""
+        if not (self.dirty or force):
+            return False
+        if not force and time.time() - self.time < self.interval:
+            return False
+
+        if stock.heights is None:
+            self.batch = None
+        else:
+            self.upload(*stock.grid())
+        self.dirty = False
+        self.time = time.time()
+        return True
+
+    def draw(self, color):
+        if not self.batch:
+            return
+        shader = self.shader
+        shader.bind()
+        shader.uniform_float("color", color)
+
+        bgl.glEnable(bgl.GL_DEPTH_TEST)
+        self.batch.draw(shader)
+        bgl.glDisable(bgl.GL_DEPTH_TEST)
+
+
+class nDashboard:
+    """Text fields on the viewport, bottom to top.
+    A text is formatted only when its value changes. Positions, colors and sizes are laid out only when the
+    fields change (theme). Drawing only replays them"""
+
+    def __init__(self):
+        # [(key, color, size, y, x of the value)]
+        self.layout = []
+
+        # key -> Last value, its text
+        self.values = {}
+        self.texts = {}
+        self.labels = {}
+
+    def set_fields(self, fields):
+        """Lays out the shown fields -> [(key, label, color, size)], bottom to top"""
+        self.layout = []
+        y = 10
+        for key, label, color, size in fields:
+            self.labels.setdefault(key, label)
+            self.layout.append((key, tuple(color), size, y, size * 5))
+            y += size * 1.5
+
+    def set_label(self, key, label):
+        self.labels[key] = label
+
+    def set_value(self, key, value, form=str):
+        """Value of the field. Formatted by form only if it changed"""
+        if key in self.values and self.values[key] == value:
+            return
+        self.values[key] = value
+        self.texts[key] = form(value)
+
+    def draw(self):
+        labels, texts = self.labels, self.texts
+        for key, color, size, y, x in self.layout:
+            blf.color(0, *color)
+            blf.size(0, size, 64)
+            blf.position(0, 10, y, 0)
+            blf.draw(0, labels[key])
+            blf.position(0, x, y, 0)
+            blf.draw(0, texts.get(key, ""))
@@ -0,0 +1,547 @@
+# -*- coding:utf-8 -*-
+import math
+
+import numpy as np
+
+# Headless geometry kernels. Doesn't need bpy / mathutils. Only numpy.
+#   Functions work on arrays of many items at once (arcs, curves...) instead of one item per call.
+
+# Chord tolerance -> The greatest distance between the arc and its line segments (Sagitta)
+#   s = r * (1 - cos(a / 2))  ->  a = 2 * acos(1 - s / r)
+#
+# Reference:
+#   https://en.wikipedia.org/wiki/Sagitta_(geometry)
+
+
+def arc_steps(radius, angle, tolerance, max_angle=math.pi / 4):
+    """Segment counts of the arcs for the chord tolerance.
+    :param radius: Radii of the arcs
+    :param angle: Swept angles of the arcs (Radian, signed)
+    :param tolerance: Chord tolerance (mm)
+    :param max_angle: Greatest angle of a segment. Small arcs aren't drawn with too few segments
+    :return: int64 array
+    """
+    radius = np.asarray(radius, dtype=np.float64)
+    ratio = np.clip(1 - max(tolerance, 1e-9) / np.maximum(radius, 1e-9), -1, 1)
+    step_angle = np.minimum(2 * np.arccos(ratio), max_angle)
+    return np.maximum(np.ceil(np.abs(angle) / np.maximum(step_angle, 1e-9)), 1).astype(np.int64)
+
+
+def arc_points(center, radius, start_angle, angle, z, dz, steps, end=None):
+    """Points of the arcs (helix if dz). Arc k has steps[k] + 1 points, arcs follow each other.
+    :param center: (n, 2) XY of the centers
+    :param start_angle: Angles of the start points
+    :param angle: Swept angles (Radian). + CCW, - CW
+    :param z: Z of the start points
+    :param dz: Z changes along the arcs
+    :param steps: Segment counts -> arc_steps
+    :param end: (n, 3) If given, the last points are these exactly (No rounding errors)
+    :return: (sum(steps + 1), 3) float64
+    """
+    steps = np.asarray(steps, dtype=np.int64)
+    counts = steps + 1
+
+    arc = np.repeat(np.arange(len(steps)), counts)
+    first = np.cumsum(counts) - counts
+    t = (np.arange(len(arc)) - first[arc]) / steps[arc]
+
+    a = start_angle[arc] + angle[arc] * t
+    r = radius[arc]
+
+    points = np.empty((len(arc), 3))
+    points[:, 0] = center[arc, 0] + r * np.cos(a)
+    points[:, 1] = center[arc, 1] + r * np.sin(a)
+    points[:, 2] = z[arc] + dz[arc] * t
+
+    if end is not None:
+        points[first + steps] = end
+    return points
+
+
+def arc_lines(center, radius, start_angle, angle, z, dz, steps, end=None):
+    """Vertices of the arcs as line pairs (for 'LINES' batches). Arc k has 2 * steps[k] vertices.
+    Parameters -> arc_points
+    :return: (2 * sum(steps), 3) float64
+    """
+    points = arc_points(center, radius, start_angle, angle, z, dz, steps, end)
+
+    # Every point except the last points of the arcs starts a segment
+    last = np.cumsum(np.asarray(steps) + 1) - 1
+    starts = np.delete(np.arange(len(points)), last)
+
+    lines = np.empty((len(starts) * 2, 3))
+    lines[0::2] = points[starts]
+    lines[1::2] = points[starts + 1]
+    return lines
+
+
+# Douglas-Peucker simplification.
+#   All polylines are simplified together. Each pass finds the farthest point of every open interval at once
+#   and splits the intervals whose farthest point is out of the tolerance. So the passes are a few (about
+#   log n for usual toolpaths), and each pass is vectorized.
+#
+# Reference:
+#   https://en.wikipedia.org/wiki/Ramer%E2%80%93Douglas%E2%80%93Peucker_algorithm
+
+
+def segment_distance(p, a, b):
+    """Distances of the points p to the segments a-b. (n, 3) arrays"""
+    ab = b - a
+    length = (ab * ab).sum(axis=1)
+    t = np.divide(((p - a) * ab).sum(axis=1), length, out=np.zeros(len(p)), where=length > 0)
+    closest = a + ab * np.clip(t, 0, 1)[:, None]
+    return np.sqrt(((p - closest) ** 2).sum(axis=1))
+
+
+def douglas_peucker_steps(points, starts, tolerance, block=1 << 20):
+    """Simplifies the polylines. Generator -> Yields after each block of a pass, returns the mask of the kept points.
+    :param points: (n, 3) Points of all polylines, one after another
+    :param starts: Index of the first point of each polyline (Sorted, starts with 0)
+    :param tolerance: Greatest distance of the removed points to the simplified polylines
+    :param block: About this many points are checked between two yields
+    """
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    if not n:
+        return keep
+
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.append(starts[1:], n) - 1
+    keep[starts] = keep[ends] = True
+
+    # Open intervals -> Points between a and b aren't decided yet
+    a, b = starts, ends
+    while True:
+        inner = b - a - 1
+        a, b, inner = a[inner > 0], b[inner > 0], inner[inner > 0]
+        if not len(a):
+            return keep
+
+        # Intervals of the pass in blocks
+        bounds = np.searchsorted(np.cumsum(inner), np.arange(block, inner.sum(), block), "right")
+        bounds = np.unique(np.concatenate(([0], bounds, [len(a)])))
+
+        next_a, next_b = [], []
+        for i, j in zip(bounds[:-1], bounds[1:]):
+            split, split_interval = farthest_points(points, a[i:j], b[i:j], inner[i:j], tolerance)
+            keep[split] = True
+            next_a.extend((a[i:j][split_interval], split))
+            next_b.extend((split, b[i:j][split_interval]))
+            yield
+
+        a = np.concatenate(next_a)
+        b = np.concatenate(next_b)
+
+
+def farthest_points(points, a, b, inner, tolerance):
+    """Farthest points of the intervals to their chords a-b, if they are out of the tolerance.
+    :return: (point indices, interval indices)
+    """
+    interval = np.repeat(np.arange(len(a)), inner)
+    first = np.cumsum(inner) - inner
+    index = a[interval] + 1 + np.arange(len(interval)) - first[interval]
+
+    distance = segment_distance(points[index], points[a[interval]], points[b[interval]])
+    farthest = np.maximum.reduceat(distance, first)
+
+    # First farthest point of each interval
+    candidates = np.flatnonzero(distance == farthest[interval])
+    split = candidates[np.unique(interval[candidates], return_index=True)[1]]
+    split = split[farthest > tolerance]
+    return index[split], interval[split]
+
+
+def polyline_pairs(starts, keep):
+    """Line pairs between the kept points of the polylines.
+    :return: Point indices -> Pair k is (index[2k], index[2k + 1])
+    """
+    kept = np.flatnonzero(keep)
+    polyline = np.searchsorted(starts, kept, "right") - 1
+    same = polyline[1:] == polyline[:-1]
+
+    index = np.empty(same.sum() * 2, dtype=np.int64)
+    index[0::2] = kept[:-1][same]
+    index[1::2] = kept[1:][same]
+    return index
+
+
+def unique_on_grid(verts, size, groups=None, pairs=True):
+    """Finds the items which are the same when snapped to a grid. Overlapping passes of a toolpath become one.
+    :param verts: (n, 3) Points, or line pairs if pairs
+    :param size: Grid size
+    :param groups: Group of each item. Items of the different groups are never the same
+    :return: Indices of the kept vertices, in the original order
+    """
+    if not len(verts):
+        return np.zeros(0, dtype=np.int64)
+    keys = np.round(verts / size).astype(np.int64)
+
+    if pairs:
+        # Same line in both directions -> Same key. The smaller end point is the first
+        a, b = keys[0::2], keys[1::2]
+        d = a - b
+        swap = (d[np.arange(len(d)), (d != 0).argmax(axis=1)] > 0)[:, None]
+        keys = np.concatenate((np.where(swap, b, a), np.where(swap, a, b)), axis=1)
+
+    if groups is not None:
+        keys = np.concatenate((keys, np.asarray(groups, dtype=np.int64)[:, None]), axis=1)
+
+    keys = np.ascontiguousarray(keys)
+    rows = keys.view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1]))).ravel()
+    index = np.sort(np.unique(rows, return_index=True)[1])
+
+    if pairs:
+        return np.stack((index * 2, index * 2 + 1), axis=1).ravel()
+    return index
+
+
+# Curve kernels of the converter. Whole splines at once instead of one point per call.
+#   Bezier    -> Bernstein form. Segment k goes from p0[k] to p3[k], p1[k] and p2[k] are its handles
+#   Collinear -> Distance of the points to the lines a-b
+#
+# Reference:
+#   https://en.wikipedia.org/wiki/B%C3%A9zier_curve#Cubic_B%C3%A9zier_curves
+
+# Plane -> (First axis, second axis, normal axis). Arcs are CCW from the first axis to the second
+PLANE_AXES = {"G17": (0, 1, 2), "G18": (2, 0, 1), "G19": (1, 2, 0)}
+
+
+def bezier_points(p0, p1, p2, p3, t):
+    """Points of the cubic Bezier segments.
+    :param p0, p1, p2, p3: (n, 3) Start points, right handles, left handles, end points
+    :param t: (m,) Parameters of the points, same for all segments
+    :return: (n, m, 3) float64
+    """
+    t = np.asarray(t, dtype=np.float64)[None, :, None]
+    s = 1 - t
+    return (s ** 3 * np.asarray(p0, dtype=np.float64)[:, None] +
+            3 * s ** 2 * t * np.asarray(p1, dtype=np.float64)[:, None] +
+            3 * s * t ** 2 * np.asarray(p2, dtype=np.float64)[:, None] +
+            t ** 3 * np.asarray(p3, dtype=np.float64)[:, None])
+
+
+def collinear(a, b, p, tolerance):
+    """Are the points p on the lines a-b? (n, 3) arrays -> (n,) bool"""
+    a, b, p = (np.asarray(i, dtype=np.float64) for i in (a, b, p))
+    ab = b - a
+    length = np.sqrt((ab * ab).sum(axis=1))
+    # Distance to the line -> |ab × ap| / |ab|. Same points -> Distance to a
+    area = np.sqrt((np.cross(ab, p - a) ** 2).sum(axis=1))
+    distance = np.where(length > 0, area / np.maximum(length, 1e-300), np.sqrt(((p - a) ** 2).sum(axis=1)))
+    return distance <= tolerance
+
+
+# Adaptive flattening. Segments are halved until their control polygons are flat enough.
+#   Flatness -> The curve is within the tolerance of its chord if
+#       max(|3 p1 - 2 p0 - p3|², |3 p2 - p0 - 2 p3|²) <= 16 tolerance²
+#   Halves -> de Casteljau at t = 0.5. All pieces of all segments are halved together in each pass.
+#
+# Reference:
+#   https://hcklbrrfnn.files.wordpress.com/2012/08/bez.pdf (Roger Willcocks, flatness of a cubic Bezier)
+
+
+def bezier_flatness(p0, p1, p2, p3):
+    """Squared flatness bounds of the segments -> 16 x (greatest distance to the chord)²"""
+    u = (3 * p1 - 2 * p0 - p3) ** 2
+    v = (3 * p2 - p0 - 2 * p3) ** 2
+    return np.maximum(u, v).sum(axis=1)
+
+
+def bezier_halves(p0, p1, p2, p3):
+    """Control points of the first and the second halves -> ((q0, q1, q2, q3), (r0, r1, r2, r3))"""
+    a, b, c = (p0 + p1) / 2, (p1 + p2) / 2, (p2 + p3) / 2
+    d, e = (a + b) / 2, (b + c) / 2
+    f = (d + e) / 2
+    return (p0, a, d, f), (f, e, c, p3)
+
+
+def bezier_flatten(p0, p1, p2, p3, tolerance, max_depth=16):
+    """Points of the segments as lines within the chord tolerance. Flat segments get a few lines, tight ones many.
+    :param p0, p1, p2, p3: (n, 3) Start points, right handles, left handles, end points
+    :param tolerance: Greatest distance between the curve and its lines (mm)
+    :param max_depth: Greatest halving count
+    :return: (End points of the lines, (m, 3) float64 in order; segment of each point, (m,) int64)
+    """
+    pieces = tuple(np.asarray(i, dtype=np.float64) for i in (p0, p1, p2, p3))
+    segment = np.arange(len(pieces[0]))
+    start = np.zeros(len(segment))
+    limit = 16 * max(tolerance, 1e-9) ** 2
+
+    # Pieces are halved until flat -> (segment, start parameter, end point) of the flat ones
+    done = []
+    for depth in range(max_depth + 1):
+        flat = bezier_flatness(*pieces) <= limit
+        if depth == max_depth:
+            flat[:] = True
+        done.append((segment[flat], start[flat], pieces[3][flat]))
+
+        split = ~flat
+        if not split.any():
+            break
+        first, second = bezier_halves(*(i[split] for i in pieces))
+        pieces = tuple(np.concatenate(i) for i in zip(first, second))
+        segment = np.tile(segment[split], 2)
+        start = np.concatenate((start[split], start[split] + .5 ** (depth + 1)))
+
+    segment, start, end = (np.concatenate([i[k] for i in done]) for k in range(3))
+
+    order = np.lexsort((start, segment))
+    return end[order], segment[order]
+
+
+# Biarc fitting. Each piece of a Bezier segment becomes two arcs which meet tangentially (Biarc):
+#   Start and end tangents of the arcs are of the piece. Both arcs use the same tangent length d (Equal d):
+#       d = (-v.t + sqrt((v.t)² + 2 (1 - T0.T1) |v|²)) / 2 (1 - T0.T1)     v = P1 - P0, t = T0 + T1
+#       Joint -> (P0 + d T0 + P1 - d T1) / 2
+#   Pieces whose biarc is out of the tolerance are halved, like bezier_flatten. Arcs are in the plane,
+#   Z changes linearly along them (Helix).
+#
+# Reference:
+#   https://www.ryanjuckett.com/biarc-interpolation/
+
+# Samples of a piece in the error check
+BIARC_SAMPLES = np.arange(1, 8) / 8
+
+
+def bezier_tangents(p0, p1, p2, p3):
+    """Start and end tangents of the segments. Handles on the points -> The next control point is used"""
+    start = np.where((np.abs(p1 - p0).sum(axis=1) > 1e-12)[:, None], p1 - p0,
+                     np.where((np.abs(p2 - p0).sum(axis=1) > 1e-12)[:, None], p2 - p0, p3 - p0))
+    end = np.where((np.abs(p3 - p2).sum(axis=1) > 1e-12)[:, None], p3 - p2,
+                   np.where((np.abs(p3 - p1).sum(axis=1) > 1e-12)[:, None], p3 - p1, p3 - p0))
+    return start, end
+
+
+def unit(v):
+    """Unit vectors of the rows. Zero rows stay zero"""
+    length = np.sqrt((v * v).sum(axis=1))[:, None]
+    return np.divide(v, length, out=np.zeros_like(v), where=length > 0)
+
+
+def arc_center(a, b, tangent):
+    """Centers of the 2D arcs from a to b, which start along the tangents (unit).
+    :return: (centers, radii) -> Radius is + for CCW, - for CW, inf for straight lines
+    """
+    normal = np.stack((-tangent[:, 1], tangent[:, 0]), axis=1)
+    chord = b - a
+    side = (normal * chord).sum(axis=1)
+    length = (chord * chord).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        radius = np.where(np.abs(side) > 1e-9 * np.sqrt(length), length / (2 * side), np.inf)
+    return a + normal * np.where(np.isfinite(radius), radius, 0)[:, None], radius
+
+
+def arc_distance(p, a, b, center, radius):
+    """Distances of the 2D points to the arcs a -> b (arc_center). Straight ones are segments"""
+    r = np.abs(radius)
+    ccw = radius > 0
+    pa = np.arctan2(a[:, 1] - center[:, 1], a[:, 0] - center[:, 0])
+    pb = np.arctan2(b[:, 1] - center[:, 1], b[:, 0] - center[:, 0])
+    pp = np.arctan2(p[:, 1] - center[:, 1], p[:, 0] - center[:, 0])
+    sweep = np.where(ccw, pb - pa, pa - pb) % (2 * np.pi)
+    position = np.where(ccw, pp - pa, pa - pp) % (2 * np.pi)
+
+    to_circle = np.abs(np.sqrt(((p - center) ** 2).sum(axis=1)) - r)
+    to_ends = np.sqrt(np.minimum(((p - a) ** 2).sum(axis=1), ((p - b) ** 2).sum(axis=1)))
+    curve = np.where(position <= sweep, to_circle, to_ends)
+
+    pad = np.zeros((len(p), 1))
+    line = segment_distance(*(np.hstack((i, pad)) for i in (p, a, b)))
+    return np.where(np.isfinite(radius), curve, line)
+
+
+def biarcs(p0, p1, p2, p3, axes):
+    """Biarcs of the pieces in the plane (axes -> first two of PLANE_AXES).
+    :return: (joints (n, 3), (centers, radii) of the first arcs, (centers, radii) of the second arcs) -> 2D centers
+    """
+    u, v = axes
+    start, end = (unit(i[:, (u, v)]) for i in bezier_tangents(p0, p1, p2, p3))
+    a, b = p0[:, (u, v)], p3[:, (u, v)]
+    chord = b - a
+
+    t = start + end
+    vt = (chord * t).sum(axis=1)
+    vv = (chord * chord).sum(axis=1)
+    denominator = 2 * (1 - (start * end).sum(axis=1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        parallel = np.where(np.abs((chord * end).sum(axis=1)) > 1e-12, vv / (4 * (chord * end).sum(axis=1)), 0)
+        d = np.where(denominator > 1e-12,
+                     (-vt + np.sqrt(np.maximum(vt * vt + denominator * vv, 0))) / np.maximum(denominator, 1e-12),
+                     parallel)
+    d = np.where(np.isfinite(d), d, 0)[:, None]
+
+    # Joint and its Z -> By the chord lengths of the arcs
+    middle = (a + d * start + b - d * end) / 2
+    la = np.sqrt(((middle - a) ** 2).sum(axis=1))
+    lb = np.sqrt(((b - middle) ** 2).sum(axis=1))
+    share = np.divide(la, la + lb, out=np.full(len(la), .5), where=la + lb > 0)
+
+    joint = np.empty_like(p0)
+    joint[:, u], joint[:, v] = middle[:, 0], middle[:, 1]
+    joint[:, 3 - u - v] = p0[:, 3 - u - v] + (p3 - p0)[:, 3 - u - v] * share
+
+    first = arc_center(a, middle, start)
+    # Second arc is found backwards from b -> Its direction is reversed
+    center, radius = arc_center(b, middle, -end)
+    return joint, first, (center, -radius)
+
+
+def bezier_biarcs(p0, p1, p2, p3, tolerance, plane="G17", max_depth=12):
+    """Arcs and lines of the segments within the tolerance (In the plane). Fewest tangent continuous arcs.
+    :param p0, p1, p2, p3: (n, 3) Start points, right handles, left handles, end points
+    :param tolerance: Greatest distance between the curve and its arcs (mm)
+    :param plane: "G17", "G18" or "G19" -> PLANE_AXES
+    :return: (ends, centers, clockwise, segment) of the moves in order.
+        ends -> (m, 3) End points. centers -> (m, 3) NaN for lines, the normal axis is 0.
+        clockwise -> (m,) bool. segment -> (m,) int64
+    """
+    u, v, w = PLANE_AXES[plane]
+    pieces = tuple(np.asarray(i, dtype=np.float64) for i in (p0, p1, p2, p3))
+    segment = np.arange(len(pieces[0]))
+    start = np.zeros(len(segment))
+
+    # Pieces are halved until their biarcs fit -> (segment, start parameter, piece, biarc) of the fitted ones
+    done = []
+    for depth in range(max_depth + 1):
+        # Straight pieces -> One line
+        straight = collinear(pieces[0], pieces[3], pieces[1], tolerance / 2) & \
+                   collinear(pieces[0], pieces[3], pieces[2], tolerance / 2)
+        joint, first, second = biarcs(*pieces, (u, v))
+
+        # Error -> Greatest distance of the samples to the biarc
+        samples = bezier_points(*pieces, BIARC_SAMPLES)[:, :, (u, v)]
+        k = len(BIARC_SAMPLES)
+        a, m, b = (np.repeat(i[:, (u, v)], k, axis=0) for i in (pieces[0], joint, pieces[3]))
+        p = samples.reshape(-1, 2)
+        error = np.minimum(arc_distance(p, a, m, *(np.repeat(i, k, axis=0) for i in first)),
+                           arc_distance(p, m, b, *(np.repeat(i, k, axis=0) for i in second)))
+        fit = straight | (error.reshape(-1, k).max(axis=1) <= tolerance)
+        if depth == max_depth:
+            fit[:] = True
+
+        done.append((segment[fit], start[fit], tuple(i[fit] for i in pieces), straight[fit],
+                     joint[fit], tuple(i[fit] for i in first), tuple(i[fit] for i in second)))
+
+        split = ~fit
+        if not split.any():
+            break
+        half_a, half_b = bezier_halves(*(i[split] for i in pieces))
+        pieces = tuple(np.concatenate(i) for i in zip(half_a, half_b))
+        segment = np.tile(segment[split], 2)
+        start = np.concatenate((start[split], start[split] + .5 ** (depth + 1)))
+
+    segment, start, straight, joint = (np.concatenate([i[k] for i in done]) for k in (0, 1, 3, 4))
+    end = np.concatenate([i[2][3] for i in done])
+    first, second = ((np.concatenate([i[k][0] for i in done]), np.concatenate([i[k][1] for i in done]))
+                     for k in (5, 6))
+
+    order = np.lexsort((start, segment))
+    segment, straight, joint, end = segment[order], straight[order], joint[order], end[order]
+    first, second = ((i[0][order], i[1][order]) for i in (first, second))
+
+    # Moves -> Straight pieces are one line, others two arcs
+    count = np.where(straight, 1, 2)
+    index = np.cumsum(count) - count
+    n = count.sum()
+
+    ends = np.empty((n, 3))
+    centers = np.full((n, 3), np.nan)
+    radii = np.full(n, np.inf)
+    ends[index] = np.where(straight[:, None], end, joint)
+    two = index[~straight] + 1
+    ends[two] = end[~straight]
+
+    arc = ~straight
+    radii[index[arc]], radii[two] = first[1][arc], second[1][arc]
+    centers[index[arc], u], centers[index[arc], v] = first[0][arc, 0], first[0][arc, 1]
+    centers[two, u], centers[two, v] = second[0][arc, 0], second[0][arc, 1]
+
+    # Straight arcs -> Lines
+    line = ~np.isfinite(radii)
+    centers[line] = np.nan
+    centers[~line, w] = 0
+    return ends, centers, radii < 0, np.repeat(segment, count)
+
+
+def merge_arcs(start, ends, centers, clockwise, tolerance, plane="G17"):
+    """Joins the runs of arcs which are on the same circle (Flat arcs only). The center of a joined run is fitted
+    again through its start, its end and a joint in the middle -> The start and the end radii are the same
+    (GRBL rejects arcs whose radii differ, error 33). The joints and the middles of the arcs of the run must be
+    within half of the tolerance of the new circle, and the run must be shorter than a full turn.
+    :param start: (3,) Start point of the first move
+    :param ends, centers, clockwise: Moves -> bezier_biarcs
+    :return: ((m,) bool mask of the kept moves, (m, 3) centers. Kept moves of the runs have the fitted centers)
+    """
+    u, v, w = PLANE_AXES[plane]
+    starts = np.vstack((np.asarray(start, dtype=np.float64)[None], ends[:-1]))
+    centers = centers.copy()
+    arc = np.isfinite(centers[:, u])
+
+    # Sweep of each arc and the point in its middle
+    radius = np.hypot(starts[:, u] - centers[:, u], starts[:, v] - centers[:, v])
+    a = np.arctan2(starts[:, v] - centers[:, v], starts[:, u] - centers[:, u])
+    b = np.arctan2(ends[:, v] - centers[:, v], ends[:, u] - centers[:, u])
+    sweep = np.where(clockwise, a - b, b - a) % (2 * np.pi)
+    middle_angle = a + np.where(clockwise, -sweep, sweep) / 2
+    middles = np.stack((centers[:, u] + radius * np.cos(middle_angle),
+                        centers[:, v] + radius * np.sin(middle_angle)), axis=1)
+
+    # Neighbours which may be on the same circle
+    flat = np.abs(ends[:, w] - starts[:, w]) <= 1e-9
+    same = np.zeros(len(ends), dtype=bool)
+    same[:-1] = arc[:-1] & arc[1:] & flat[:-1] & flat[1:] & (clockwise[:-1] == clockwise[1:]) & \
+                (np.abs(centers[:-1] - centers[1:])[:, (u, v)].max(axis=1) <= tolerance) & \
+                (np.abs(radius[:-1] - radius[1:]) <= tolerance)
+
+    points = np.stack((ends[:, u], ends[:, v]), axis=1)
+    first = np.stack((starts[:, u], starts[:, v]), axis=1)
+
+    keep = np.ones(len(ends), dtype=bool)
+    i = 0
+    while i < len(ends):
+        # Run i..j is extended while its fitted circle holds all its points
+        fitted = None
+        j = i
+        while j < len(ends) - 1 and same[j]:
+            center = merged_center(first[i], points[(i + j) // 2], points[j + 1],
+                                   points[i:j + 1], middles[i:j + 2], first[i:j + 2], points[i:j + 2],
+                                   clockwise[i], tolerance / 2)
+            if center is None:
+                break
+            fitted = center
+            j += 1
+
+        if fitted is not None:
+            keep[i:j] = False
+            centers[j, u], centers[j, v] = fitted
+        i = j + 1
+    return keep, centers
+
+
+def merged_center(a, m, b, joints, middles, starts, ends, clockwise, tolerance):
+    """Center of the circle through a, m, b if the arcs (starts -> ends) are on it, in the direction, in less than
+    a turn. None if they aren't"""
+    center = circle_center_2d(a, m, b)
+    if center is None:
+        return None
+    r = math.hypot(a[0] - center[0], a[1] - center[1])
+    for p in np.concatenate((joints, middles)).tolist():
+        if abs(math.hypot(p[0] - center[0], p[1] - center[1]) - r) > tolerance:
+            return None
+
+    # Sweeps of the arcs around the new center -> In the direction, less than a turn in total
+    pa = np.arctan2(starts[:, 1] - center[1], starts[:, 0] - center[0])
+    pb = np.arctan2(ends[:, 1] - center[1], ends[:, 0] - center[0])
+    total = (np.where(clockwise, pa - pb, pb - pa) % (2 * np.pi)).sum()
+    return center if total < 2 * np.pi - 1e-6 else None
+
+
+def circle_center_2d(a, b, c):
+    """Center of the circle through the 2D points a, b, c. None if they are on a line"""
+    bx, by = b[0] - a[0], b[1] - a[1]
+    cx, cy = c[0] - a[0], c[1] - a[1]
+    d = 2 * (bx * cy - by * cx)
+    if abs(d) < 1e-12:
+        return None
+    kb, kc = bx * bx + by * by, cx * cx + cy * cy
+    return a[0] + (cy * kb - by * kc) / d, a[1] + (bx * kc - cx * kb) / d
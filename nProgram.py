@@ -0,0 +1,731 @@
+# -*- coding:utf-8 -*-
+import importlib
+import math
+import multiprocessing
+import os
+import re
+import site
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from .nGeometry import arc_steps, arc_lines, douglas_peucker_steps, polyline_pairs, unique_on_grid
+except ImportError:
+    # Worker processes import this file as a top-level module -> nWorker
+    from nGeometry import arc_steps, arc_lines, douglas_peucker_steps, polyline_pairs, unique_on_grid
+
+# Headless G-code program model.
+#   Doesn't need bpy / mathutils. Only numpy.
+#   Every code line is one row of the arrays below (struct-of-arrays).
+#   Row 0 is the initial state of the machine, row n is the n'th line of the code.
+#
+#   Toolpath vertices are stored in one flat float32 buffer as line pairs (for 'LINES' batches).
+#   The vertices of the row n are -> verts[seg_offset[n]:seg_offset[n + 1]]
+
+# Flags of the row
+FLAG_MOVE = 1
+FLAG_ERROR = 2
+
+INCH = 25.4
+
+# Changes when the parsing result changes. Cached programs of the other versions aren't used -> nCache
+VERSION = 1
+
+# Comments are matched too, but their letter group is empty -> "(...)" and "; ..."
+TOKEN = re.compile(r'\([^()]*\)|;.*|([A-Z]) *([+-]?(?:\d+\.?\d*|\.\d+))')
+
+# G code -> (Modal group, Code)
+MODALS = {
+    0: ("mode_move", 0),
+    1: ("mode_move", 1),
+    2: ("mode_move", 2),
+    3: ("mode_move", 3),
+    17: ("mode_plane", 17),
+    18: ("mode_plane", 18),
+    19: ("mode_plane", 19),
+    20: ("mode_units", 20),
+    21: ("mode_units", 21),
+    90: ("mode_distance", 90),
+    91: ("mode_distance", 91),
+}
+MODAL_GROUPS = ("mode_move", "mode_plane", "mode_units", "mode_distance")
+
+
+def tokenize(line: str) -> list:
+    """Single pass over the line.
+    "G1 X10 (comment) Y-2.5" -> [("G", 1.0), ("X", 10.0), ("Y", -2.5)]
+    """
+    return [(letter, float(number)) for letter, number in TOKEN.findall(line.upper()) if letter]
+
+
+def read(line: str) -> tuple:
+    """Words of the line -> (modes, words, dwell)
+    "G91 G1 X10 F200" -> ({"mode_distance": 91, "mode_move": 1}, {"X": 10.0, "F": 200.0}, False)
+    """
+    modes = {}
+    words = {}
+    dwell = False
+
+    for letter, number in tokenize(line):
+        if letter == "G":
+            modal = MODALS.get(number)
+            if modal:
+                group, code = modal
+                # Two codes of the same group in one line -> The previous state continues
+                modes[group] = None if group in modes else code
+            elif number == 4:
+                dwell = True
+
+        # The word used twice in one line is ignored
+        elif letter in words:
+            words[letter] = None
+        else:
+            words[letter] = number
+
+    return modes, words, dwell
+
+
+def prescan(lines, state) -> tuple:
+    """Cheap scan of the modal state after the lines. Only the words are read, no geometry.
+    Faulty lines (arcs etc.) aren't detected here. nProgram.extend_parts checks the states.
+    :param state: Modal state before the lines -> nProgram.state(i)
+    :return: Modal state after the lines
+    """
+    xyz = list(state[0])
+    f = state[1]
+    state_modes = dict(zip(MODAL_GROUPS, state[2:]))
+
+    for line in lines:
+        modes, words, dwell = read(line)
+        for group, code in modes.items():
+            if code is not None:
+                state_modes[group] = code
+
+        unit = 1 if state_modes["mode_units"] == 21 else INCH
+        incremental = state_modes["mode_distance"] == 91
+        for j, letter in enumerate("XYZ"):
+            v = words.get(letter)
+            if v is not None:
+                xyz[j] = v * unit + (xyz[j] if incremental else 0)
+
+        v = words.get("F")
+        if v is not None and v >= 0:
+            f = v
+
+    return (tuple(xyz), f) + tuple(state_modes[group] for group in MODAL_GROUPS)
+
+
+def parse_chunk(lines, state, tolerance=None):
+    """Runs in the worker processes. Parses the lines from the state -> nProgram.to_arrays
+    Arrays are sent back, not the nProgram. It would be unpickled as the top-level module of the worker"""
+    part = nProgram(capacity=len(lines) + 1, state=state)
+    if tolerance is not None:
+        part.tolerance = tolerance
+    part.extend(lines)
+    return part.to_arrays()
+
+
+class nWorker:
+    """Function of a headless module (nProgram, nConvert...), to send to the worker processes.
+    Workers can't import the add-on package (it needs bpy). So the function is pickled by the name of its file, and
+    the workers import the file as a top-level module -> executor. Nothing is imported here.
+        pool.submit(nWorker(parse_chunk), lines, state)
+    """
+
+    def __init__(self, function):
+        # Function, or the name of its module
+        self.function = function
+
+    def __call__(self, *args, **kwargs):
+        return self.function(*args, **kwargs)
+
+    def __reduce__(self):
+        if isinstance(self.function, str):
+            return importlib.import_module, (self.function,)
+        module = self.function.__module__.rpartition(".")[2]
+        return getattr, (nWorker(module), self.function.__name__)
+
+
+def executor(workers=None, python=None) -> ProcessPoolExecutor:
+    """Process pool for nWorker functions. The folder of the add-on is added to the path of the workers.
+    :param python: Python executable for the workers. (Blender's own binary can't be used)
+    """
+    context = multiprocessing.get_context("spawn")
+    if python:
+        context.set_executable(python)
+    folder = os.path.dirname(os.path.abspath(__file__))
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                               initializer=site.addsitedir, initargs=(folder,))
+
+
+class nProgram:
+    initial = "G0 G90 G17 G21 X0 Y0 Z0 F500"
+
+    # (name, dtype, columns)
+    fields = (
+        ("xyz", np.float64, 3),
+        ("ijk", np.float64, 3),
+        ("r", np.float64, 0),
+        ("f", np.float64, 0),
+        ("mode_move", np.int8, 0),
+        ("mode_distance", np.int8, 0),
+        ("mode_plane", np.int8, 0),
+        ("mode_units", np.int8, 0),
+        ("flags", np.uint8, 0),
+        ("length", np.float64, 0),
+        ("pause", np.float64, 0),
+    )
+
+    # Chord tolerance of the arcs (mm) -> nGeometry.arc_steps
+    tolerance = 0.01
+
+    # Modal state of a row -> Position, feed and modes. Next rows are parsed from it
+    state_fields = ("xyz", "f") + MODAL_GROUPS
+
+    def __init__(self, capacity=1024, state=None, store_codes=True):
+        # False -> Code lines aren't kept (They are read from the file). diff/update can't be used
+        self.store_codes = store_codes
+
+        # Increases on every change of the rows -> Cached arrays are calculated again
+        self.revision = 0
+
+        # Lowest vertex index changed since the last take_changes. None -> No change
+        self.changed = None
+        self._elapsed = None
+        self.capacity = 0
+        self.capacity_verts = 0
+        self.clear(capacity, state)
+
+    def __len__(self):
+        return self.size
+
+    def clear(self, capacity=1024, state=None):
+        """Removes all rows and adds the initial row.
+        :param state: If given, the initial row is this state instead of the initial code -> self.state(i)
+        """
+        self.size = 0
+        self.size_verts = 0
+        self.revision += 1
+        self.changed = 0
+
+        # Code lines of the rows. Used to find the changed lines
+        self.codes = [] if self.store_codes else None
+
+        self.capacity = capacity
+        for name, dtype, cols in self.fields:
+            setattr(self, name, np.zeros((capacity, cols) if cols else capacity, dtype=dtype))
+        self.seg_offset = np.zeros(capacity + 1, dtype=np.int64)
+
+        self.capacity_verts = capacity * 2
+        self.verts = np.zeros((self.capacity_verts, 3), dtype=np.float32)
+
+        # Totals
+        self.distance = 0.0
+        self.time = 0.0
+        self.minimum = np.zeros(3)
+        self.maximum = np.zeros(3)
+
+        if state is None:
+            self.append(self.initial)
+            return
+
+        for name, value in zip(self.state_fields, state):
+            getattr(self, name)[0] = value
+        if self.store_codes:
+            self.codes.append("")
+        self.size = 1
+        self.minimum[:] = self.maximum[:] = self.xyz[0]
+
+    def state(self, i) -> tuple:
+        """Modal state after the row i"""
+        return (tuple(self.xyz[i].tolist()),) + tuple(getattr(self, name).item(i) for name in self.state_fields[1:])
+
+    def trim(self):
+        """Frees the unused capacity"""
+        for name, dtype, cols in self.fields:
+            setattr(self, name, getattr(self, name)[:self.size].copy())
+        self.seg_offset = self.seg_offset[:self.size + 1].copy()
+        self.verts = self.verts[:self.size_verts].copy()
+        self.capacity = self.size
+        self.capacity_verts = self.size_verts
+
+    def to_arrays(self) -> dict:
+        """Rows, vertices and totals as arrays. Code lines aren't included"""
+        arrays = {name: getattr(self, name)[:self.size] for name, dtype, cols in self.fields}
+        arrays["seg_offset"] = self.seg_offset[:self.size + 1]
+        arrays["verts"] = self.verts[:self.size_verts]
+        arrays["totals"] = np.array([self.distance, self.time])
+        arrays["bounds"] = np.array([self.minimum, self.maximum])
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, codes=None):
+        """Program of the arrays -> to_arrays
+        :param codes: Code lines (Without initial row). If not given, code lines aren't kept
+        """
+        program = cls(capacity=0, state=None, store_codes=codes is not None)
+        for name, dtype, cols in cls.fields:
+            setattr(program, name, np.asarray(arrays[name], dtype=dtype))
+        program.seg_offset = np.asarray(arrays["seg_offset"], dtype=np.int64)
+        program.verts = np.asarray(arrays["verts"], dtype=np.float32)
+        program.size = program.capacity = len(program.xyz)
+        program.size_verts = program.capacity_verts = len(program.verts)
+        program.revision += 1
+        program.distance, program.time = arrays["totals"].tolist()
+        program.minimum, program.maximum = np.array(arrays["bounds"], dtype=np.float64)
+        if codes is not None:
+            program.codes = [cls.initial] + list(codes)
+        return program
+
+    @property
+    def count(self):
+        """Line count of the code (Without initial row)"""
+        return max(self.size - 1, 0)
+
+    # ##########################
+    # ################## Storage
+    def _grow(self, size):
+        if size <= self.capacity:
+            return
+        capacity = max(size, self.capacity * 2, 16)
+        for name, dtype, cols in self.fields:
+            old = getattr(self, name)
+            new = np.zeros((capacity, cols) if cols else capacity, dtype=dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+        offset = np.zeros(capacity + 1, dtype=np.int64)
+        offset[:self.size + 1] = self.seg_offset[:self.size + 1]
+        self.seg_offset = offset
+        self.capacity = capacity
+
+    def _grow_verts(self, size):
+        if size <= self.capacity_verts:
+            return
+        capacity = max(size, self.capacity_verts * 2, 16)
+        verts = np.zeros((capacity, 3), dtype=np.float32)
+        verts[:self.size_verts] = self.verts[:self.size_verts]
+        self.verts = verts
+        self.capacity_verts = capacity
+
+    # ##########################
+    # ################## Parsing
+    def extend(self, codes):
+        """Parses the code lines and adds them as new rows. Then the geometry of the new rows is calculated at once"""
+        start = self.size
+        self._grow(start + len(codes))
+        arcs = []
+
+        for code in codes:
+            i = self.size
+            p = i - 1 if i else 0
+            self.size += 1
+            if self.store_codes:
+                self.codes.append(code)
+
+            self.parse(i, p, code)
+
+            arc = None
+            if self.flags[i] == FLAG_MOVE and self.mode_move[i] in (2, 3):
+                arc = self.calc_arc(i, p)
+
+            if self.flags[i] & FLAG_ERROR:
+                self.revert(i, p)
+            elif arc:
+                arcs.append(arc)
+
+        self.add_geometry(start, arcs)
+
+    def append(self, code: str) -> int:
+        """Parses the code line and adds it as a new row. Returns the row index"""
+        self.extend((code,))
+        return self.size - 1
+
+    def parse(self, i, p, value):
+        """Reads the code line to the row i. p is the previous row"""
+        modes, words, dwell = read(value)
+
+        for group in MODAL_GROUPS:
+            arr = getattr(self, group)
+            code = modes.get(group)
+            modes[group] = arr.item(p) if code is None else code
+            arr[i] = modes[group]
+
+        unit = 1 if modes["mode_units"] == 21 else INCH
+        flags = 0
+
+        # X0.0 Y0.0 Z0.0
+        xyz = self.xyz[p]
+        ismove_xyz = False
+        incremental = modes["mode_distance"] == 91
+        for j, letter in enumerate("XYZ"):
+            v = words.get(letter)
+            if v is not None:
+                if not ismove_xyz:
+                    ismove_xyz = True
+                    xyz = xyz.tolist()
+                xyz[j] = v * unit + (xyz[j] if incremental else 0)
+        self.xyz[i] = xyz
+
+        # I0.0 J0.0 K0.0
+        ismove_ijk = False
+        for j, letter in enumerate("IJK"):
+            v = words.get(letter)
+            if v is not None:
+                if not ismove_ijk:
+                    ismove_ijk = True
+                    ijk = [0, 0, 0]
+                ijk[j] = v * unit
+        self.ijk[i] = ijk if ismove_ijk else 0
+
+        # F
+        v = words.get("F")
+        self.f[i] = v if v is not None and v >= 0 else self.f.item(p)
+
+        # R
+        v = words.get("R")
+        ismove_r = v is not None
+        self.r[i] = v * unit if ismove_r else 0
+        if ismove_r and ismove_ijk:
+            flags |= FLAG_ERROR
+
+        # Pause -> G4 P0.0
+        v = words.get("P")
+        self.pause[i] = v if dwell and v is not None and v >= 0 else 0
+
+        if ismove_xyz and (modes["mode_move"] in (0, 1) or ismove_ijk or ismove_r):
+            flags |= FLAG_MOVE
+
+        self.length[i] = 0
+        self.flags[i] = flags
+
+    def revert(self, i, p):
+        """If the row is faulty, the previous state continues"""
+        self.mode_distance[i] = self.mode_distance[p]
+        self.mode_plane[i] = self.mode_plane[p]
+        self.mode_units[i] = self.mode_units[p]
+        self.mode_move[i] = self.mode_move[p]
+        self.xyz[i] = self.xyz[p]
+        self.f[i] = self.f[p]
+        self.length[i] = 0
+        self.flags[i] = FLAG_ERROR
+
+    def calc_arc(self, i, p):
+        """Checks the arc of row i and sets its length. The points are calculated later, with the other arcs.
+        :return: (row, center_x, center_y, radius, start_angle, angle) or None if faulty. angle -> + CCW, - CW
+        """
+        mv = self.mode_move[i]
+        prev_xyz = self.xyz[p]
+        xyz = self.xyz[i]
+        r = self.r[i]
+
+        # If the R code is used, we must convert the R code to IJK
+        # +R: Short angle way
+        # -R: Long angle way
+        if r:
+            dx, dy = xyz[0] - prev_xyz[0], xyz[1] - prev_xyz[1]
+            chord = math.hypot(dx, dy)
+            distance = round(chord / 2, 3)
+
+            # Distance greater than radius or zero
+            if distance > round(abs(r), 3) or not chord:
+                self.flags[i] |= FLAG_ERROR
+                return None
+
+            # Center on the perpendicular bisector of the chord.
+            # G2 +R / G3 -R -> Right side of the direction
+            h = math.sqrt(max(r * r - chord * chord / 4, 0))
+            side = h / chord * (1 if (mv == 3) == (r > 0) else -1)
+            cx = (xyz[0] + prev_xyz[0]) / 2 - dy * side
+            cy = (xyz[1] + prev_xyz[1]) / 2 + dx * side
+        else:
+            cx = prev_xyz[0] + self.ijk[i, 0]
+            cy = prev_xyz[1] + self.ijk[i, 1]
+
+        # Uyarı Buradan sonrası G17 düzlemi için hesaplanmıştır.
+        # From the CENTER to the CURRENT POINT / to the POINT of DESTINATION
+        v1x, v1y = prev_xyz[0] - cx, prev_xyz[1] - cy
+        v2x, v2y = xyz[0] - cx, xyz[1] - cy
+        radius = math.hypot(v1x, v1y)
+
+        if not radius or abs(radius - math.hypot(v2x, v2y)) > 0.01:
+            self.flags[i] |= FLAG_ERROR
+            return None
+
+        a1 = math.atan2(v1y, v1x)
+        a2 = math.atan2(v2y, v2x)
+
+        # Swept angle. CW -> G2, CCW -> G3. Same points -> Full circle
+        angle = ((a1 - a2) if mv == 2 else (a2 - a1)) % math.tau
+        if angle < 1e-9:
+            angle = math.tau
+
+        self.length[i] = math.hypot(angle * radius, xyz[2] - prev_xyz[2])
+        return i, cx, cy, radius, a1, -angle if mv == 2 else angle
+
+    def add_geometry(self, start, arcs=()):
+        """Vertices, lengths and totals of the rows [start, size).
+        :param arcs: Arcs of the rows -> calc_arc
+        """
+        end = self.size
+        if start >= end:
+            return
+        rows = np.arange(start, end)
+        prev = np.maximum(rows - 1, 0)
+        xyz = self.xyz[start:end]
+        prev_xyz = self.xyz[prev]
+
+        # G0, G1 -> One line
+        linear = ((self.flags[start:end] & (FLAG_MOVE | FLAG_ERROR)) == FLAG_MOVE) & (self.mode_move[start:end] <= 1)
+        self.length[start:end][linear] = np.sqrt(((xyz[linear] - prev_xyz[linear]) ** 2).sum(axis=1))
+        counts = np.where(linear, 2, 0)
+
+        if arcs:
+            arcs = np.array(arcs)
+            arc_rows = arcs[:, 0].astype(np.int64)
+            steps = arc_steps(arcs[:, 3], arcs[:, 5], self.tolerance)
+            counts[arc_rows - start] = steps * 2
+
+        # Vertex offsets of the rows
+        base = self.size_verts
+        self.seg_offset[start + 1:end + 1] = base + np.cumsum(counts)
+        total = int(counts.sum())
+        self._grow_verts(base + total)
+        self.size_verts += total
+
+        offsets = self.seg_offset[start:end] - base
+        verts = self.verts[base:base + total]
+        verts[offsets[linear]] = prev_xyz[linear]
+        verts[offsets[linear] + 1] = xyz[linear]
+
+        if len(arcs):
+            arc_prev = self.xyz[np.maximum(arc_rows - 1, 0)]
+            lines = arc_lines(arcs[:, 1:3], arcs[:, 3], arcs[:, 4], arcs[:, 5],
+                              arc_prev[:, 2], self.xyz[arc_rows, 2] - arc_prev[:, 2], steps, self.xyz[arc_rows])
+            # Arc k -> 2 * steps[k] vertices, from the offset of its row
+            n = steps * 2
+            first = np.cumsum(n) - n
+            verts[np.repeat(offsets[arc_rows - start] - first, n) + np.arange(len(lines))] = lines
+
+        # Totals -> Length, Time, Pause, Min/Max X,Y,Z
+        self.distance += self.length[start:end].sum()
+        self.time += self.times(start, end).sum()
+        np.minimum(self.minimum, xyz.min(axis=0), out=self.minimum)
+        np.maximum(self.maximum, xyz.max(axis=0), out=self.maximum)
+        self.revision += 1
+        self.changed = base if self.changed is None else min(self.changed, base)
+
+    def times(self, start=0, end=None):
+        """Seconds of the rows in range -> [start, end). Includes the pauses"""
+        end = self.size if end is None else end
+        f = np.where(self.mode_move[start:end] == 0, 500, self.f[start:end])
+        f = f * np.where(self.mode_units[start:end] == 21, 1, INCH)
+        t = np.divide(self.length[start:end] * 60, f, out=np.zeros(end - start), where=f != 0)
+        return t + self.pause[start:end]
+
+    def heat_values(self, source="FEED"):
+        """Value of each row for the heatmap. -1 for the rows which aren't colored (Rapid moves, no move)
+        :param source: "FEED" -> Commanded feed (mm/min), "TIME" -> Seconds of the row
+        """
+        n = self.size
+        if source == "TIME":
+            values = self.times()
+        else:
+            values = self.f[:n] * np.where(self.mode_units[:n] == 21, 1, INCH)
+
+        cut = (self.mode_move[:n] != 0) & (self.length[:n] > 0)
+        return np.where(cut, values, -1).astype(np.float32)
+
+    def remaining_time(self, row=0) -> float:
+        """Seconds of the rows from the row to the end. Sums are calculated once, until the rows change"""
+        if self._elapsed is None or self._elapsed[0] != self.revision:
+            self._elapsed = self.revision, np.concatenate(([0], np.cumsum(self.times())))
+        elapsed = self._elapsed[1]
+        return float(elapsed[-1] - elapsed[min(max(row, 0), self.size)])
+
+    # ##########################
+    # ############## Incremental
+    def diff(self, codes) -> tuple:
+        """Compares to the new code lines.
+        :return: (start, old_end, new_end) -> Rows [start, old_end) are replaced by the new rows [start, new_end)
+        """
+        old = self.codes
+        n_old = len(old) - 1
+        n_new = len(codes)
+        limit = min(n_old, n_new)
+
+        # Unchanged lines at the head
+        a = 0
+        while a < limit and old[a + 1] == codes[a]:
+            a += 1
+
+        # Unchanged lines at the tail
+        b = 0
+        while b < limit - a and old[n_old - b] == codes[n_new - 1 - b]:
+            b += 1
+
+        return a + 1, n_old - b + 1, n_new - b + 1
+
+    def update(self, codes) -> tuple:
+        """Re-parses only the changed lines and the next lines whose state is affected by them.
+        :return: (start, end) -> Re-parsed rows
+        """
+        start, old_end, new_end = self.diff(codes)
+
+        # The previous row is the checkpoint of the parsing
+        part = nProgram(capacity=new_end - start + 16, state=self.state(start - 1))
+        part.tolerance = self.tolerance
+        part.extend(codes[start - 1:new_end - 1])
+
+        # The next lines are parsed until the state is the same as before
+        while old_end < self.size and part.state(part.size - 1) != self.state(old_end - 1):
+            part.append(codes[new_end - 1])
+            old_end += 1
+            new_end += 1
+
+        self.splice(start, old_end, part)
+        return start, new_end
+
+    def splice(self, start, end, part):
+        """Replaces the rows [start, end) with the rows of the part (except its initial row)"""
+        self.revision += 1
+        size = part.size - 1
+        vs, ve = self.seg_offset[start], self.seg_offset[end]
+        self.changed = int(vs) if self.changed is None else min(self.changed, int(vs))
+        verts = part.verts[part.seg_offset[1]:part.size_verts]
+
+        # Totals as deltas
+        self.distance += part.length[1:part.size].sum() - self.length[start:end].sum()
+        self.time += part.times(1).sum() - self.times(start, end).sum()
+
+        removed = self.xyz[start:end]
+        added = part.xyz[1:part.size]
+        if len(removed) and ((removed.min(axis=0) <= self.minimum).any() or
+                             (removed.max(axis=0) >= self.maximum).any()):
+            # Removed rows were on the bounding box. Find it again
+            rest = np.concatenate((self.xyz[:start], self.xyz[end:self.size], added))
+            self.minimum = rest.min(axis=0)
+            self.maximum = rest.max(axis=0)
+        elif len(added):
+            np.minimum(self.minimum, added.min(axis=0), out=self.minimum)
+            np.maximum(self.maximum, added.max(axis=0), out=self.maximum)
+
+        # Add to the end
+        if start == end == self.size:
+            self._grow(self.size + size)
+            self._grow_verts(self.size_verts + len(verts))
+            for name, dtype, cols in self.fields:
+                getattr(self, name)[start:start + size] = getattr(part, name)[1:part.size]
+            self.seg_offset[start + 1:start + size + 1] = part.seg_offset[2:part.size + 1] - part.seg_offset[1] + vs
+            self.verts[vs:vs + len(verts)] = verts
+            if self.store_codes:
+                self.codes.extend(part.codes[1:])
+            self.size += size
+            self.size_verts += len(verts)
+            return
+
+        for name, dtype, cols in self.fields:
+            arr = getattr(self, name)
+            setattr(self, name, np.concatenate((arr[:start], getattr(part, name)[1:part.size], arr[end:self.size])))
+
+        self.seg_offset = np.concatenate((self.seg_offset[:start + 1],
+                                          part.seg_offset[2:part.size + 1] - part.seg_offset[1] + vs,
+                                          self.seg_offset[end + 1:self.size + 1] - ve + vs + len(verts)))
+        self.verts = np.concatenate((self.verts[:vs], verts, self.verts[ve:self.size_verts]))
+        if self.store_codes:
+            self.codes[start:end] = part.codes[1:]
+
+        self.size += size - (end - start)
+        self.size_verts = len(self.verts)
+        self.capacity = self.size
+        self.capacity_verts = self.size_verts
+
+    def extend_parts(self, parts):
+        """Adds the rows of the parts which are parsed separately (parse_chunk -> from_arrays with the lines).
+        If the initial state of a part doesn't match the last state, the part is parsed again here.
+        """
+        for _ in self.extend_parts_steps(parts):
+            pass
+
+    def extend_parts_steps(self, parts, batch=1024):
+        """extend_parts as a generator -> Yields after each part, and after each batch of lines parsed again here"""
+        for part in parts:
+            if part.state(0) == self.state(self.size - 1):
+                self.splice(self.size, self.size, part)
+            else:
+                codes = part.codes[1:]
+                for i in range(0, len(codes), batch):
+                    self.extend(codes[i:i + batch])
+                    yield
+            yield
+
+    # ##########################
+    # ################## Queries
+    def take_changes(self):
+        """Lowest vertex index changed since the last call. None if nothing changed"""
+        changed, self.changed = self.changed, None
+        return changed
+
+    def get_chunk(self, start, end):
+        """Vertices in range [start, end) with their kinds and rows, for drawing.
+        :return: (verts, kinds, rows) -> float32 arrays
+            kinds -> Move mode of the vertex. +4 if it is the end point of its row
+            rows  -> Row index of the vertex
+        """
+        end = min(end, self.size_verts)
+        seg = self.seg_offset[:self.size + 1]
+
+        # Rows which have vertices in the range -> [r0, r1)
+        r0 = int(np.searchsorted(seg, start, "right")) - 1
+        r1 = int(np.searchsorted(seg, end, "left"))
+
+        bounds = np.clip(seg[r0:r1 + 1], start, end)
+        rows = np.repeat(np.arange(r0, r1), np.diff(bounds))
+        kinds = self.mode_move[rows] + 4 * (np.arange(start + 1, end + 1) == seg[rows + 1])
+        return self.verts[start:end], kinds.astype(np.float32), rows.astype(np.float32)
+
+    def get_polylines(self):
+        """Toolpath as polylines. A polyline breaks where the move mode changes or the path jumps.
+        :return: (points, starts, kinds, rows)
+            points -> (n, 3) float32
+            starts -> Index of the first point of each polyline
+            kinds, rows -> Of each point -> get_chunk
+        """
+        verts, kinds, rows = self.get_chunk(0, self.size_verts)
+        a, b = verts[0::2], verts[1::2]
+        modes = kinds[1::2] % 4
+
+        new = np.ones(len(a), dtype=bool)
+        new[1:] = (a[1:] != b[:-1]).any(axis=1) | (modes[1:] != modes[:-1])
+
+        # Segment k -> Its end point is after k points and the start points of the polylines until k
+        pos_b = np.arange(len(a)) + np.cumsum(new)
+        starts = pos_b[new] - 1
+
+        # Vertex of each point
+        source = np.empty(len(a) + len(starts), dtype=np.int64)
+        source[pos_b] = np.arange(len(a)) * 2 + 1
+        source[starts] = np.flatnonzero(new) * 2
+        return verts[source], starts, kinds[source], rows[source]
+
+    def lod_steps(self, tolerances):
+        """Simplified toolpaths (Level of detail). Generator -> Yields between the passes of the simplification.
+        Each level is simplified from the previous (finer) one, so the coarse levels are cheap.
+        :param tolerances: Tolerances of the levels, from fine to coarse
+        :return: [(tolerance, verts, kinds, rows)] -> Line pairs, like get_chunk
+        """
+        points, starts, kinds, rows = self.get_polylines()
+        levels = []
+        for tolerance in tolerances:
+            keep = yield from douglas_peucker_steps(points, starts, tolerance)
+            index = polyline_pairs(starts, keep)
+            index = index[unique_on_grid(points[index], tolerance, kinds[index[1::2]] % 4)]
+            levels.append((tolerance, points[index], kinds[index], rows[index]))
+            yield
+
+            # Next level from this one
+            kept = np.flatnonzero(keep)
+            starts = np.searchsorted(kept, starts)
+            points, kinds, rows = points[keep], kinds[keep], rows[keep]
+        return levels
@@ -0,0 +1,50 @@
+# -*- coding:utf-8 -*-
+import time
+
+# Redraw scheduler. Headless -> Doesn't need bpy.
+#   Layers (decoder, parser, vision) don't redraw by themselves. They only mark the region types which changed.
+#   Marks are collected, and each region type is redrawn once when it is due -> Many changes between two frames
+#   cost one redraw, and nothing is redrawn when nothing changed. Redraws are at most max_fps per second.
+
+# Region types
+UI = "UI"
+WINDOW = "WINDOW"
+
+
+class nRedraw:
+    def __init__(self, max_fps=30):
+        self.max_fps = max_fps
+
+        # Region types which changed since their last redraw
+        self.dirty = set()
+
+        # Region type -> Time of its last redraw
+        self.last = {}
+
+    def tag(self, *regions):
+        """Marks the region types to be redrawn"""
+        self.dirty.update(regions)
+
+    def due(self, now=None) -> set:
+        """Marked region types which can be redrawn now. They are unmarked"""
+        if not self.dirty:
+            return set()
+
+        now = time.perf_counter() if now is None else now
+        interval = 1 / max(self.max_fps, 1)
+
+        regions = {i for i in self.dirty if now - self.last.get(i, 0) >= interval}
+        for i in regions:
+            self.last[i] = now
+        self.dirty -= regions
+        return regions
+
+    def wait(self, now=None):
+        """Seconds until the first marked region type is due. None if nothing is marked"""
+        if not self.dirty:
+            return None
+
+        now = time.perf_counter() if now is None else now
+        interval = 1 / max(self.max_fps, 1)
+
+        return max(0., min(self.last.get(i, 0) for i in self.dirty) + interval - now)
@@ -0,0 +1,87 @@
+# -*- coding:utf-8 -*-
+import mmap
+import os
+
+import numpy as np
+
+# G-code lines of a file, without reading it into a Text datablock.
+#   The file is memory-mapped. Only the line offset index is kept in memory,
+#   lines are decoded when they are asked.
+#   Lines are split at "\n". "\r" is removed.
+
+
+class nSource:
+    # Lines decoded at once while iterating
+    chunk_size = 10000
+
+    # Bytes searched for "\n" at once while indexing. The file isn't copied as a whole
+    block_size = 1 << 24
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.file = open(filepath, "rb")
+        self.size = os.fstat(self.file.fileno()).st_size
+
+        # Iterations in progress (A running job sends the lines). The file is closed after them -> close
+        self.readers = 0
+        self.closed = False
+
+        if self.size:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            ends = np.concatenate([
+                np.flatnonzero(np.frombuffer(self.data, dtype=np.uint8, count=min(self.block_size, self.size - i),
+                                             offset=i) == 10) + i
+                for i in range(0, self.size, self.block_size)])
+        else:
+            self.data = b""
+            ends = np.zeros(0, dtype=np.int64)
+
+        # Line i -> data[offsets[i]:offsets[i + 1] - 1]
+        if not len(ends) or ends[-1] != self.size - 1:
+            # Last line without "\n"
+            ends = np.append(ends, self.size)
+        self.offsets = np.concatenate(([0], ends + 1))
+
+    def close(self):
+        """Closes the file. If its lines are being iterated, it is closed when the iterations end"""
+        self.closed = True
+        if not self.readers:
+            self._close()
+
+    def _close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def __len__(self):
+        return len(self.offsets) - 1 if self.size else 0
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, end, step = key.indices(len(self))
+            lines = self.lines(start, end)
+            return lines if step == 1 else lines[::step]
+
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("line index out of range")
+        return self.lines(key, key + 1)[0]
+
+    def __iter__(self):
+        self.readers += 1
+        try:
+            for start in range(0, len(self), self.chunk_size):
+                yield from self.lines(start, start + self.chunk_size)
+        finally:
+            self.readers -= 1
+            if self.closed and not self.readers:
+                self._close()
+
+    def lines(self, start, end) -> list:
+        """Lines in range -> [start, end)"""
+        end = min(end, len(self))
+        if start >= end:
+            return []
+        raw = self.data[self.offsets[start]:self.offsets[end] - 1]
+        return raw.decode("utf-8", errors="replace").replace("\r", "").split("\n")
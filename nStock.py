@@ -0,0 +1,210 @@
+# -*- coding:utf-8 -*-
+import math
+import time
+
+import numpy as np
+
+# Stock removal simulation. Headless -> Doesn't need bpy. Only numpy.
+#   The stock is a 2.5D heightmap -> One top height per cell of an XY grid.
+#   The tool is a height profile around its tip (Flat, ball or V-bit) -> tool_height
+#
+#   Segments are sampled about once per cell. Samples are merged per cell, the lowest stays -> Overlapping passes
+#   (pockets, finishing passes) are stamped once. Then the cells under the tool are written one offset at a time:
+#   heights = min(heights, tip z + tool height). Cells of one offset are unique, so every write is vectorized.
+#
+#   Cutting never adds material, so the order of the segments doesn't matter. Parts of the program can be
+#   simulated one after another -> Incremental, it follows the execution trail.
+
+TOOL_FLAT, TOOL_BALL, TOOL_V = "FLAT", "BALL", "V"
+
+
+def tool_height(shape, radius, distance, angle=math.pi / 2):
+    """Heights of the tool surface above its tip, at the distances from the tool axis.
+    :param shape: TOOL_FLAT, TOOL_BALL or TOOL_V
+    :param angle: Tip angle of the V-bit (Radian)
+    """
+    if shape == TOOL_BALL:
+        return radius - np.sqrt(np.maximum(radius ** 2 - distance ** 2, 0))
+    if shape == TOOL_V:
+        return distance / math.tan(max(angle, 1e-3) / 2)
+    return np.zeros(len(distance))
+
+
+class nStock:
+    # Greatest cell count. Resolution is coarsened for bigger stocks
+    max_cells = 1 << 19
+
+    # Samples of the toolpath merged at once. Overlapping passes in them are stamped once
+    samples = 1 << 19
+
+    # About this many cells are stamped between two yields
+    block = 1 << 21
+
+    # Simulated when the program hasn't changed for this long (seconds)
+    delay = 1.0
+
+    # Simulation time in one call (seconds)
+    budget = .03
+
+    def __init__(self, shape=TOOL_FLAT, diameter=3.0, resolution=.2, top=0.0, angle=math.pi / 2):
+        """
+        :param shape: Tool shape -> tool_height
+        :param diameter: Tool diameter
+        :param resolution: Cell size. Coarsened if the stock has too many cells
+        :param top: Height of the stock top
+        :param angle: Tip angle of the V-bit (Radian)
+        """
+        self.shape = shape
+        self.radius = diameter / 2
+        self.resolution = resolution
+        self.top = top
+        self.angle = angle
+
+        self.program = None
+        self.revision = None
+        self.time = 0
+
+        # (ny, nx) -> Cell (i, j) is at origin + (j, i) * cell
+        self.heights = None
+        self.origin = np.zeros(2)
+        self.cell = resolution
+        self.pad = 0
+
+        # Vertices [0, done) of the program are simulated
+        self.done = 0
+        self.steps = None
+        self.target = 0
+
+    def reset(self, program):
+        """New stock over the program. Its area is wider by the tool radius"""
+        # Bounds of the vertices. Arcs may be out of the program bounds (which are of the end points)
+        verts = program.verts[:program.size_verts, :2]
+        minimum = verts.min(axis=0).astype(np.float64) - self.radius
+        size = verts.max(axis=0).astype(np.float64) + self.radius - minimum
+
+        self.cell = max(self.resolution, math.sqrt(size[0] * size[1] / self.max_cells), 1e-3)
+        # The tool never stamps out of the grid -> Padded by the tool radius
+        self.pad = pad = int(math.ceil(self.radius / self.cell)) + 1
+        nx, ny = np.ceil(size / self.cell).astype(np.int64) + 1 + 2 * pad
+        self.origin = minimum - pad * self.cell
+        self.heights = np.full((ny, nx), self.top, dtype=np.float32)
+
+        self.done = 0
+        self.steps = None
+
+    def update(self, program, end=None) -> bool:
+        """Simulates the program up to the vertex end, a little at each call.
+        :param end: Vertices before it are cut. All if None
+        :return: True if the heights changed
+        """
+        if program is not self.program or program.revision != self.revision:
+            # Program changed -> Simulated again when it is stable
+            self.program = program
+            self.revision = program.revision
+            self.time = time.time()
+            changed = self.heights is not None
+            self.heights = None
+            return changed
+
+        if self.heights is None:
+            if not program.size_verts or time.time() - self.time < self.delay:
+                return False
+            self.reset(program)
+
+        end = program.size_verts if end is None else min(end, program.size_verts)
+        end -= end % 2
+
+        # Trail started again -> New stock
+        if end < self.done or (self.steps and end < self.target):
+            self.reset(program)
+
+        if self.steps is None:
+            if end == self.done:
+                return False
+            self.steps = self.cut_steps(program.verts[self.done:end])
+            self.target = end
+
+        deadline = time.perf_counter() + self.budget
+        try:
+            while time.perf_counter() < deadline:
+                next(self.steps)
+        except StopIteration:
+            self.done = self.target
+            self.steps = None
+        return True
+
+    def cut_steps(self, verts):
+        """Cuts the line pairs from the stock. Generator -> Yields after about block cells"""
+        a, b = verts[0::2].astype(np.float64), verts[1::2].astype(np.float64)
+
+        # Segments above the stock cut nothing
+        below = np.minimum(a[:, 2], b[:, 2]) < self.top
+        a, b = a[below], b[below]
+        if not len(a):
+            return
+
+        # Sample counts -> At most one cell between two samples
+        ca = (a[:, :2] - self.origin) / self.cell
+        cb = (b[:, :2] - self.origin) / self.cell
+        counts = np.ceil(np.sqrt(((cb - ca) ** 2).sum(axis=1))).astype(np.int64) + 1
+
+        offsets, heights = self.kernel()
+        bounds = np.searchsorted(np.cumsum(counts), np.arange(self.samples, counts.sum(), self.samples), "right")
+        bounds = np.unique(np.concatenate(([0], bounds, [len(a)])))
+        for i, j in zip(bounds[:-1], bounds[1:]):
+            index, z = self.sample(ca[i:j], cb[i:j], a[i:j, 2], b[i:j, 2], counts[i:j])
+
+            # Offsets of the tool in parts -> About block cells in each
+            step = max(self.block // len(index), 1)
+            for k in range(0, len(offsets), step):
+                self.stamp(index, z, offsets[k:k + step], heights[k:k + step])
+                yield
+
+    def kernel(self):
+        """Cells under the tool -> (flat index offsets, heights of the tool surface above its tip)"""
+        n = int(math.ceil(self.radius / self.cell))
+        dy, dx = np.mgrid[-n:n + 1, -n:n + 1]
+        distance = np.hypot(dx, dy).ravel() * self.cell
+
+        # At least the cell of the tip
+        inside = distance <= max(self.radius, self.cell / 2)
+        offsets = (dy * self.heights.shape[1] + dx).ravel()[inside]
+        heights = tool_height(self.shape, self.radius, distance[inside], self.angle).astype(np.float32)
+        return offsets.tolist(), heights.tolist()
+
+    def sample(self, ca, cb, za, zb, counts):
+        """Sample cells of the segments, merged per cell -> (flat cell indices, lowest tip z).
+        A lower tip at the same cell cuts everything a higher one cuts"""
+        segment = np.repeat(np.arange(len(counts)), counts)
+        first = np.cumsum(counts) - counts
+        t = (np.arange(len(segment)) - first[segment]) / np.maximum(counts[segment] - 1, 1)
+
+        # One sample (Plunge, retract in one cell) -> At the lower end
+        t = np.where(counts[segment] > 1, t, (zb < za)[segment])
+
+        ny, nx = self.heights.shape
+        pad = self.pad
+        ix = np.rint(ca[segment, 0] + (cb - ca)[segment, 0] * t).astype(np.int64)
+        iy = np.rint(ca[segment, 1] + (cb - ca)[segment, 1] * t).astype(np.int64)
+        index = np.clip(iy, pad, ny - 1 - pad) * nx + np.clip(ix, pad, nx - 1 - pad)
+        z = (za[segment] + (zb - za)[segment] * t).astype(np.float32)
+
+        order = np.lexsort((z, index))
+        index, z = index[order], z[order]
+        lowest = np.ones(len(index), dtype=bool)
+        lowest[1:] = index[1:] != index[:-1]
+        return index[lowest], z[lowest]
+
+    def stamp(self, index, z, offsets, heights):
+        """Tool cells at the unique sample cells. Cells of one offset are unique -> One vectorized write each"""
+        grid = self.heights.ravel()
+        for offset, height in zip(offsets, heights):
+            cells = index + offset
+            grid[cells] = np.minimum(grid[cells], z + height)
+
+    def grid(self):
+        """Heightmap and the positions of its cells -> (heights, x, y)"""
+        ny, nx = self.heights.shape
+        x = self.origin[0] + np.arange(nx) * self.cell
+        y = self.origin[1] + np.arange(ny) * self.cell
+        return self.heights, x, y
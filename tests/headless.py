@@ -0,0 +1,13 @@
+# -*- coding:utf-8 -*-
+"""pytest plugin -> pytest.ini. The add-on package needs Blender (bpy), its modules don't.
+The folder of the package is collected as a plain folder, so its __init__.py isn't imported."""
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def pytest_collect_directory(path, parent):
+    if str(path) == ROOT:
+        return pytest.Dir.from_parent(parent, path=path)
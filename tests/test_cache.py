@@ -0,0 +1,58 @@
+# -*- coding:utf-8 -*-
+"""Headless checks of nCache. Run without Blender:
+    python -m pytest
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from nCache import nCache, key  # noqa: E402
+from nProgram import nProgram  # noqa: E402
+
+CODES = ["G21 G90", "G0 X0 Y0 Z5", "G1 Z-1 F200", "G1 X20", "G2 X20 Y20 I0 J10", "G3 X0 Y0 R25", "G0 Z5"]
+
+
+def test_program_round_trip(tmp_path):
+    program = nProgram()
+    program.extend(CODES)
+    cache = nCache(str(tmp_path))
+    k = key("\n".join(CODES), 1, program.tolerance)
+    cache.put(k, program.to_arrays())
+
+    loaded = nProgram.from_arrays(cache.get(k), CODES)
+    assert loaded.size == program.size
+    assert np.array_equal(loaded.verts[:loaded.size_verts], program.verts[:program.size_verts])
+    assert np.array_equal(loaded.xyz[:loaded.size], program.xyz[:program.size])
+    assert (loaded.distance, loaded.time) == (program.distance, program.time)
+    assert loaded.codes[1:] == CODES
+
+
+def test_missing_key(tmp_path):
+    assert nCache(str(tmp_path)).get("missing") is None
+
+
+@pytest.mark.parametrize("size", [0, 10, 100, -10])
+def test_corrupt_file_is_removed(tmp_path, size):
+    cache = nCache(str(tmp_path))
+    cache.put("a", {"x": np.arange(1000)})
+    path = cache.path("a")
+
+    # Truncated file
+    with open(path, "r+b") as f:
+        f.truncate(size if size >= 0 else os.path.getsize(path) + size)
+
+    assert cache.get("a") is None
+    assert not os.path.exists(path)
+
+    cache.put("a", {"x": np.arange(3)})
+    assert cache.get("a")["x"].tolist() == [0, 1, 2]
+
+
+def test_evict_oldest(tmp_path):
+    cache = nCache(str(tmp_path), limit=0)
+    cache.put("a", {"x": np.arange(10)})
+    assert cache.get("a") is None
@@ -0,0 +1,56 @@
+# -*- coding:utf-8 -*-
+"""Headless checks of nGeometry. Run without Blender:
+    python -m pytest
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from nGeometry import bezier_biarcs, merge_arcs  # noqa: E402
+
+# GRBL error 33 -> Start and end radii of an arc differ more than 0.005 mm and 0.1% of the radius
+GRBL_RADIUS_ERROR = .005
+
+
+def circle_spline(radius=10.0, count=4, noise=0.0, rng=None):
+    """Closed Bezier circle. Its points are moved randomly by the noise -> Arcs on almost the same circle"""
+    t = np.linspace(0, 2 * np.pi, count + 1)
+    k = 4 / 3 * np.tan(np.pi / (2 * count)) * radius
+    p = np.stack((radius * np.cos(t), radius * np.sin(t), np.zeros(count + 1)), axis=1)
+    h = np.stack((-np.sin(t), np.cos(t), np.zeros(count + 1)), axis=1) * k
+    if noise:
+        p[:, :2] += rng.normal(scale=noise, size=(count + 1, 2))
+        p[-1] = p[0]
+    return p[:-1], p[:-1] + h[:-1], p[1:] - h[1:], p[1:]
+
+
+def merged_arcs(segments, tolerance):
+    ends, centers, clockwise, _ = bezier_biarcs(*segments, tolerance)
+    keep, centers = merge_arcs(segments[0][0], ends, centers, clockwise, tolerance)
+    ends = ends[keep]
+    return np.vstack((segments[0][:1], ends[:-1])), ends, centers[keep]
+
+
+def test_merged_arc_radii_match():
+    rng = np.random.default_rng(33)
+    merged = 0
+    for tolerance in (.01, .05, .1):
+        for _ in range(100):
+            spline = circle_spline(rng.uniform(1, 60), rng.integers(3, 12), tolerance * rng.uniform(), rng)
+            starts, ends, centers = merged_arcs(spline, tolerance)
+            arc = np.isfinite(centers[:, 0])
+            r_start = np.hypot(*(starts - centers)[arc, :2].T)
+            r_end = np.hypot(*(ends - centers)[arc, :2].T)
+            assert (np.abs(r_start - r_end) <= GRBL_RADIUS_ERROR).all()
+            merged += len(ends) < len(bezier_biarcs(*spline, tolerance)[0])
+    assert merged
+
+
+def test_circle_is_merged():
+    starts, ends, centers = merged_arcs(circle_spline(), .01)
+    assert len(ends) <= 2
+    assert np.allclose(centers[:, :2], 0, atol=.01)
+    assert np.allclose(np.hypot(*(starts - centers)[:, :2].T), np.hypot(*(ends - centers)[:, :2].T))
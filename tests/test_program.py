@@ -0,0 +1,227 @@
+# -*- coding:utf-8 -*-
+"""Headless checks of nProgram. Run without Blender:
+    python -m pytest
+"""
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from nProgram import nProgram, nWorker, tokenize, read, prescan, parse_chunk, executor, \
+    FLAG_MOVE, FLAG_ERROR  # noqa: E402
+
+
+def random_line(rng):
+    """One line of a program. Modes change often, so the next lines depend on it"""
+    kind = rng.integers(0, 12)
+    x, y, z = rng.uniform(-40, 40, 3).round(3)
+    if kind == 0:
+        return f"G{rng.choice([90, 91])}"
+    if kind == 1:
+        return f"G{rng.choice([20, 21])}"
+    if kind == 2:
+        return f"G{rng.choice([17, 18, 19])}"
+    if kind == 3:
+        return f"G{rng.choice([2, 3])} X{x} Y{y} R{rng.uniform(30, 90):.3f}"
+    if kind == 4:
+        return f"G{rng.choice([2, 3])} X{x} Y{y} I{rng.uniform(-20, 20):.3f} J{rng.uniform(-20, 20):.3f}"
+    if kind == 5:
+        return f"F{rng.integers(50, 2000)} (feed)"
+    if kind == 6:
+        return "; comment" if rng.random() < .5 else ""
+    if kind == 7:
+        return f"G4 P{rng.uniform(0, 2):.1f}"
+    return f"G{rng.choice([0, 1])} X{x} Y{y} Z{z}"
+
+
+def random_program(rng, count):
+    return [random_line(rng) for _ in range(count)]
+
+
+def full_parse(codes):
+    program = nProgram()
+    program.extend(codes)
+    return program
+
+
+def assert_same(program, expected):
+    assert program.size == expected.size
+    assert program.size_verts == expected.size_verts
+    for name, dtype, cols in nProgram.fields:
+        a, b = getattr(program, name)[:program.size], getattr(expected, name)[:expected.size]
+        assert np.allclose(a, b, equal_nan=True), name
+    assert np.array_equal(program.seg_offset[:program.size + 1], expected.seg_offset[:expected.size + 1])
+    assert np.allclose(program.verts[:program.size_verts], expected.verts[:expected.size_verts])
+    assert program.codes == expected.codes
+    assert math.isclose(program.distance, expected.distance, rel_tol=1e-9, abs_tol=1e-6)
+    assert math.isclose(program.time, expected.time, rel_tol=1e-9, abs_tol=1e-6)
+    assert np.allclose(program.minimum, expected.minimum)
+    assert np.allclose(program.maximum, expected.maximum)
+
+
+# ##########################
+# ################### Reader
+def test_tokenize():
+    assert tokenize("g1 x10 (comment Y5) y-2.5 ; z3") == [("G", 1.0), ("X", 10.0), ("Y", -2.5)]
+    assert tokenize("G0X.5Y+1.") == [("G", 0.0), ("X", .5), ("Y", 1.0)]
+
+
+def test_read():
+    assert read("G91 G1 X10 F200") == ({"mode_distance": 91, "mode_move": 1}, {"X": 10.0, "F": 200.0}, False)
+
+    # Two codes of one group, the same word twice -> Ignored
+    modes, words, dwell = read("G0 G1 X1 X2 G4")
+    assert modes == {"mode_move": None}
+    assert words == {"X": None}
+    assert dwell
+
+
+def test_geometry():
+    program = full_parse(["G21 G90 G17", "G1 X10 F600", "G91 G1 Y10", "G90 G2 X0 Y0 R7.0710678", "G20 G1 X1"])
+    assert program.count == 5
+    assert program.xyz[2].tolist() == [10, 0, 0]
+    assert program.xyz[3].tolist() == [10, 10, 0]
+    assert program.xyz[5].tolist() == [25.4, 0, 0]
+    assert program.flags[4] & FLAG_MOVE and not program.flags[4] & FLAG_ERROR
+
+    # Semicircle around (5, 5) -> Its length, and its vertices on the circle
+    assert math.isclose(program.length[4], math.pi * math.sqrt(50), rel_tol=1e-6)
+    verts = program.verts[program.seg_offset[4]:program.seg_offset[5]]
+    assert np.allclose(np.hypot(verts[:, 0] - 5, verts[:, 1] - 5), math.sqrt(50), atol=1e-4)
+
+    # Metric rows at F600 -> mm/min. (The feed of the G20 row is in inch/min)
+    assert math.isclose(program.times(1, 5).sum(), program.length[1:5].sum() / 600 * 60, rel_tol=1e-9)
+
+
+def test_faulty_arc():
+    # R is shorter than half of the chord
+    program = full_parse(["G1 X0 Y0 F100", "G2 X20 Y0 R5"])
+    assert program.flags[2] & FLAG_ERROR
+
+
+# ##########################
+# ############## Incremental
+@pytest.mark.parametrize("seed", range(20))
+def test_update_matches_full_parse(seed):
+    rng = np.random.default_rng(seed)
+    codes = random_program(rng, 300)
+    program = full_parse(codes)
+
+    for _ in range(15):
+        codes = list(codes)
+        start = int(rng.integers(0, len(codes)))
+        end = min(start + int(rng.integers(0, 8)), len(codes))
+        codes[start:end] = random_program(rng, int(rng.integers(0, 8)))
+
+        program.update(codes)
+        assert_same(program, full_parse(codes))
+
+
+def test_update_same_code():
+    codes = random_program(np.random.default_rng(1), 100)
+    program = full_parse(codes)
+    revision = program.revision
+    assert program.update(codes) == (101, 101)
+    assert_same(program, full_parse(codes))
+    assert program.revision == revision + 1
+
+
+# ##########################
+# ################# Parallel
+def parts(codes, size):
+    """Chunks of the code as the worker processes parse them"""
+    state = nProgram().state(0)
+    arrays = []
+    for i in range(0, len(codes), size):
+        arrays.append(parse_chunk(codes[i:i + size], state))
+        state = prescan(codes[i:i + size], state)
+    return [nProgram.from_arrays(a, codes[i * size:(i + 1) * size]) for i, a in enumerate(arrays)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("size", [1, 7, 100, 1000])
+def test_parts_match_serial(seed, size):
+    codes = random_program(np.random.default_rng(seed), 700)
+    program = nProgram()
+    program.extend_parts(parts(codes, size))
+    assert_same(program, full_parse(codes))
+
+
+def test_wrong_state_is_parsed_again():
+    codes = ["G91", "G1 X1 F100"] * 50
+    chunks = parts(codes, 10)
+
+    # The third chunk is parsed from the initial state (G90), as if the prescan was wrong
+    chunks[2] = nProgram.from_arrays(parse_chunk(codes[20:30], nProgram().state(0)), codes[20:30])
+    program = nProgram()
+    steps = sum(1 for _ in program.extend_parts_steps(chunks, batch=3))
+    assert_same(program, full_parse(codes))
+
+    # One step per chunk, and the batches of the chunk parsed again
+    assert steps == len(chunks) + 4
+
+
+def test_worker_processes():
+    codes = random_program(np.random.default_rng(7), 3000)
+    state = nProgram().state(0)
+    with executor(2) as pool:
+        futures = []
+        for i in range(0, len(codes), 1000):
+            futures.append(pool.submit(nWorker(parse_chunk), codes[i:i + 1000], state))
+            state = prescan(codes[i:i + 1000], state)
+        chunks = [nProgram.from_arrays(f.result(), codes[i * 1000:(i + 1) * 1000]) for i, f in enumerate(futures)]
+
+    program = nProgram()
+    program.extend_parts(chunks)
+    assert_same(program, full_parse(codes))
+
+
+# ##########################
+# ########## Level of detail
+def run(steps):
+    while True:
+        try:
+            next(steps)
+        except StopIteration as e:
+            return e.value
+
+
+@pytest.mark.parametrize("tolerance", [.01, .1, 1])
+def test_lod_within_tolerance(tolerance):
+    from nGeometry import douglas_peucker_steps, segment_distance
+
+    rng = np.random.default_rng(3)
+    points = np.cumsum(rng.normal(size=(2000, 3)), axis=0)
+    starts = np.array([0, 500, 501, 1200])
+    keep = run(douglas_peucker_steps(points, starts, tolerance, block=100))
+
+    ends = np.append(starts[1:], len(points)) - 1
+    assert keep[starts].all() and keep[ends].all()
+
+    # Removed points are within the tolerance of the segment between their kept neighbours
+    kept = np.flatnonzero(keep)
+    removed = np.flatnonzero(~keep)
+    right = kept[np.searchsorted(kept, removed)]
+    left = kept[np.searchsorted(kept, removed) - 1]
+    assert (np.searchsorted(starts, left, "right") == np.searchsorted(starts, right, "right")).all()
+    assert (segment_distance(points[removed], points[left], points[right]) <= tolerance + 1e-9).all()
+
+
+def test_lod_levels():
+    codes = [f"G1 X{10 * math.cos(i / 100):.4f} Y{10 * math.sin(i / 100):.4f} F500" for i in range(700)]
+    program = full_parse(codes)
+    levels = run(program.lod_steps([.001, .01, .1]))
+
+    counts = [len(verts) for tolerance, verts, kinds, rows in levels]
+    assert counts == sorted(counts, reverse=True)
+    assert counts[-1] < program.size_verts / 10
+    for tolerance, verts, kinds, rows in levels:
+        assert len(verts) == len(kinds) == len(rows)
+
+        # The G1 lines are on the circle. (The first G1 starts at the origin)
+        arc = (kinds % 4 == 1) & (rows > 1)
+        assert np.allclose(np.hypot(verts[arc, 0], verts[arc, 1]), 10, atol=1e-3)
@@ -0,0 +1,61 @@
+# -*- coding:utf-8 -*-
+"""Headless checks of nSource. Run without Blender:
+    python -m pytest
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+from nSource import nSource  # noqa: E402
+
+CODES = ["G0 X0 Y0", "", "G1 X10 F500\r", "G2 X0 Y10 R10", "(comment)", "M2"]
+
+
+def write(path, text):
+    path.write_bytes(text.encode())
+    return str(path)
+
+
+@pytest.mark.parametrize("block_size", [1, 3, 7, 1 << 24])
+@pytest.mark.parametrize("ending", ["", "\n"])
+def test_lines_match_splitlines(tmp_path, monkeypatch, block_size, ending):
+    # Newlines on the borders of the blocks are found once
+    monkeypatch.setattr(nSource, "block_size", block_size)
+    text = "\n".join(CODES) + ending
+    source = nSource(write(tmp_path / "a.nc", text))
+
+    expected = text.replace("\r", "").splitlines()
+    assert len(source) == len(expected)
+    assert list(source) == expected
+    assert source[2:4] == expected[2:4]
+    assert source[-1] == expected[-1]
+    source.close()
+
+
+def test_empty_file(tmp_path):
+    source = nSource(write(tmp_path / "a.nc", ""))
+    assert len(source) == 0
+    assert list(source) == []
+    source.close()
+
+
+def test_close_while_iterating(tmp_path, monkeypatch):
+    # A running job keeps reading after the text is loaded again
+    monkeypatch.setattr(nSource, "chunk_size", 2)
+    source = nSource(write(tmp_path / "a.nc", "\n".join(CODES)))
+    lines = iter(source)
+    assert next(lines) == CODES[0]
+
+    source.close()
+    assert not source.file.closed
+    assert list(lines) == [i.replace("\r", "") for i in CODES[1:]]
+    assert source.file.closed
+
+
+def test_close_without_reading(tmp_path):
+    source = nSource(write(tmp_path / "a.nc", "\n".join(CODES)))
+    source.close()
+    assert source.file.closed
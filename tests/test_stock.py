@@ -0,0 +1,85 @@
+# -*- coding:utf-8 -*-
+"""Headless checks of nStock. Run without Blender:
+    python -m pytest
+"""
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from nProgram import nProgram  # noqa: E402
+from nStock import nStock, tool_height, TOOL_FLAT, TOOL_BALL, TOOL_V  # noqa: E402
+
+# A groove along X at Z-1, then a plunge at X20 to Z-2
+CODES = ["G0 X0 Y0 Z5", "G1 Z-1 F200", "G1 X10", "G0 Z5", "G0 X20", "G1 Z-2"]
+
+
+def simulate(stock, program, end=None):
+    """Runs the stock until the vertex end is simulated"""
+    stock.delay = 0
+    stock.update(program, end)
+    while stock.update(program, end) and (stock.steps is not None):
+        pass
+    return stock
+
+
+def height(stock, x, y):
+    heights, gx, gy = stock.grid()
+    return heights[np.abs(gy - y).argmin(), np.abs(gx - x).argmin()]
+
+
+def program_of(codes):
+    program = nProgram()
+    program.extend(codes)
+    return program
+
+
+def test_tool_height():
+    distance = np.array([0, .5, 1])
+    assert tool_height(TOOL_FLAT, 1, distance).tolist() == [0, 0, 0]
+    assert np.allclose(tool_height(TOOL_BALL, 1, distance), [0, 1 - math.sqrt(.75), 1])
+    assert np.allclose(tool_height(TOOL_V, 1, distance, math.pi / 2), [0, .5, 1])
+
+
+def test_flat_groove():
+    stock = simulate(nStock(TOOL_FLAT, diameter=2, resolution=.1), program_of(CODES))
+    assert height(stock, 5, 0) == pytest.approx(-1)
+    assert height(stock, 5, .8) == pytest.approx(-1)
+    assert height(stock, 5, 1.5) == pytest.approx(0)
+    assert height(stock, 20, 0) == pytest.approx(-2)
+    assert height(stock, 15, 0) == pytest.approx(0)
+
+    # Rapid moves above the stock cut nothing, cutting never adds material
+    assert stock.heights.max() == pytest.approx(0)
+    assert stock.heights.min() == pytest.approx(-2)
+
+
+def test_ball_groove():
+    stock = simulate(nStock(TOOL_BALL, diameter=2, resolution=.05), program_of(CODES[:3]))
+    assert height(stock, 5, 0) == pytest.approx(-1)
+    assert height(stock, 5, .5) == pytest.approx(-1 + tool_height(TOOL_BALL, 1, np.array([.5]))[0], abs=.02)
+
+
+def test_incremental_matches_whole():
+    program = program_of(CODES)
+    whole = simulate(nStock(TOOL_V, diameter=3, resolution=.1), program)
+
+    # Trail -> The vertices are simulated in parts
+    stock = nStock(TOOL_V, diameter=3, resolution=.1)
+    for end in range(2, program.size_verts + 2, 2):
+        simulate(stock, program, end)
+    assert np.array_equal(stock.heights, whole.heights)
+
+
+def test_program_change_resets():
+    program = program_of(CODES)
+    stock = simulate(nStock(), program)
+    assert stock.heights is not None
+
+    program.update(CODES[:3])
+    assert stock.update(program)
+    assert stock.heights is None